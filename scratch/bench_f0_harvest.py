@@ -0,0 +1,55 @@
+import os
+import sys
+import argparse
+
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_PATH, "src"))
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from bench_utils import timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="harvest 基频提取：整段串行 vs 静音切块多进程并行；以及内容寻址缓存命中")
+    parser.add_argument("--seconds", type=int, default=30)
+    parser.add_argument("--input", help="输入音频（缺省使用合成的类语音信号）")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    import pyworld
+    from aipet.services.f0_harvest import harvest_f0, shutdown_pool, _harvest_chunk
+
+    if args.input:
+        from aipet.services.rvc.audio import load_audio
+        audio = load_audio(args.input, 16000)
+    else:
+        from bench_rvc_segmentation import synthetic_speech
+        audio = synthetic_speech(args.seconds)
+    x = audio.astype(np.double)
+    print(f"输入音频: {len(x) / 16000:.1f}s")
+
+    serial, serial_time = timed(lambda: _harvest_chunk((x, 16000, 50, 1100, 10)), args.repeat)
+    harvest_f0(x, 16000, 50, 1100, 10, workers=args.workers)  # 预跑：启动进程池
+    parallel, parallel_time = timed(lambda: harvest_f0(x, 16000, 50, 1100, 10, workers=args.workers), args.repeat)
+    shutdown_pool()
+
+    voiced = (serial > 0) | (parallel > 0)
+    cents = np.abs(1200 * np.log2((parallel[voiced] + 1e-5) / (serial[voiced] + 1e-5)))
+    print(f"整段串行 {serial_time:.2f}s / 并行 ({args.workers} 进程) {parallel_time:.2f}s，"
+          f"加速比 {serial_time / parallel_time:.2f}x")
+    print(f"帧数 {len(serial)} / {len(parallel)}，浊音帧偏差 <50 音分占比 {np.mean(cents < 50) * 100:.1f}%"
+          f"（切点附近帧的清浊判定可能不同）")
+
+    from aipet.services.rvc.pipeline import _f0_cache
+    key = _f0_cache.make_key(x, "harvest", 16000)
+    _f0_cache.put(key, parallel)
+    hit, hit_time = timed(lambda: _f0_cache.get(_f0_cache.make_key(x, "harvest", 16000)), 100)
+    print(f"缓存命中 (含内容摘要) {hit_time * 1000:.2f} ms，结果一致: {np.array_equal(hit, parallel)}")
+    print(f"改动一个采样点后命中: {_f0_cache.get(_f0_cache.make_key(x + np.eye(1, len(x))[0], 'harvest', 16000)) is not None}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# 解决 Windows 下多个 OpenMP 运行时库冲突导致的 WinError 1114 动态链接库初始化失败问题
+os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_PATH, "src"))
+
+import numpy as np
+
+# 固定文本集：覆盖短句、长句、中英混排与数字
+TEXTS = [
+    "你好呀，今天过得怎么样？",
+    "本堂主今天心情不错，带你去往生堂转转吧。",
+    "哎呀，这个问题可难不倒我，听我慢慢给你道来。",
+    "明天上午九点半，我们在蒙德城的广场见面。",
+    "Let me think about it for a second.",
+    "春眠不觉晓，处处闻啼鸟，夜来风雨声，花落知多少。",
+]
+
+
+def log_mel(audio, sr):
+    import librosa
+    mel = librosa.feature.melspectrogram(y=audio.astype(np.float32), sr=sr, n_fft=1024, hop_length=256, n_mels=80)
+    return librosa.power_to_db(mel + 1e-10)
+
+
+def spectral_distance(ref, test, sr):
+    """两段音频 log-mel 谱在 DTW 对齐路径上的平均逐帧欧氏距离 (dB)；两种精度下语义 token 长度可能不同，需先对齐"""
+    import librosa
+    a, b = log_mel(ref, sr), log_mel(test, sr)
+    _, path = librosa.sequence.dtw(X=a, Y=b, metric="euclidean")
+    return float(np.mean([np.linalg.norm(a[:, i] - b[:, j]) / np.sqrt(a.shape[0]) for i, j in path]))
+
+
+def to_float(audio):
+    audio = np.asarray(audio)
+    return audio.astype(np.float32) / 32768.0 if audio.dtype == np.int16 else audio.astype(np.float32)
+
+
+def bench_gpt_sovits(args, int8_cache_dir):
+    """逐句合成固定文本集，返回 [(音频, 采样率, 耗时)]。top_k=1 + 固定种子，使两种精度的差异只来自量化"""
+    from aipet.services.gpt_sovits import _build_inputs, _resolve_weights_paths, get_synthesizer
+
+    gpt, sovits = _resolve_weights_paths(args.gpt, args.sovits, args.version)
+    synthesizer = get_synthesizer(gpt, sovits, args.version, "cpu", int8_cache_dir=int8_cache_dir)
+
+    def synth(text):
+        inputs = _build_inputs(text, args.text_lang, args.ref, args.prompt_text, args.prompt_lang, 1.0)
+        inputs.update({"top_k": 1, "seed": 1234})
+        sr, audio = next(synthesizer.run(inputs))
+        return to_float(audio), sr
+
+    synth(TEXTS[0])  # 预跑：填充参考音频缓存并排除首次分配开销
+    results = []
+    for text in TEXTS:
+        start = time.perf_counter()
+        audio, sr = synth(text)
+        results.append((audio, sr, time.perf_counter() - start))
+    return results
+
+
+def bench_rvc(args, int8_cache_dir, sources):
+    """对同一组输入音频做 RVC 变声，返回 [(音频, 采样率, 耗时)]"""
+    from aipet.services.rvc import rvc_convert_audio
+
+    def convert(audio, sr):
+        tgt_sr, out = rvc_convert_audio(args.rvc_pth, args.rvc_index, args.hubert, audio, sr,
+                                        f0_method="pm", int8_cache_dir=int8_cache_dir)
+        return to_float(out), tgt_sr
+
+    convert(*sources[0])  # 预跑：载入引擎与 Hubert
+    results = []
+    for audio, sr in sources:
+        start = time.perf_counter()
+        out, tgt_sr = convert(audio, sr)
+        results.append((out, tgt_sr, time.perf_counter() - start))
+    return results
+
+
+def report(name, fp32, int8):
+    print(f"\n===== {name} =====")
+    print(f"{'#':>2} {'时长(s)':>8} {'fp32 RTF':>9} {'int8 RTF':>9} {'谱距离(dB)':>11}")
+    rtf32, rtf8, dists = [], [], []
+    for i, ((a32, sr, t32), (a8, _, t8)) in enumerate(zip(fp32, int8)):
+        dur32, dur8 = len(a32) / sr, len(a8) / sr
+        dist = spectral_distance(a32, a8, sr)
+        rtf32.append(t32 / dur32)
+        rtf8.append(t8 / dur8)
+        dists.append(dist)
+        print(f"{i:>2} {dur32:>8.2f} {rtf32[-1]:>9.3f} {rtf8[-1]:>9.3f} {dist:>11.2f}")
+    print(f"平均 RTF: fp32 {np.mean(rtf32):.3f} / int8 {np.mean(rtf8):.3f}，加速比 {np.mean(rtf32) / np.mean(rtf8):.2f}x")
+    print(f"平均 log-mel 谱距离: {np.mean(dists):.2f} dB（最大 {np.max(dists):.2f} dB）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="动态 int8 量化推理 vs fp32：固定文本集上的谱距离与实时率 (RTF) 报告")
+    parser.add_argument("--gpt", default="", help="GPT(T2S) 权重，留空使用底模")
+    parser.add_argument("--sovits", default="", help="SoVITS 权重，留空使用底模")
+    parser.add_argument("--version", default="v2")
+    parser.add_argument("--ref", required=True, help="参考音频")
+    parser.add_argument("--prompt-text", required=True, help="参考音频对应文本")
+    parser.add_argument("--prompt-lang", default="zh")
+    parser.add_argument("--text-lang", default="zh")
+    parser.add_argument("--rvc-pth", help="提供时追加 RVC 变声对比（以 GPT-SoVITS fp32 输出为变声输入）")
+    parser.add_argument("--rvc-index", default="")
+    parser.add_argument("--hubert", default=os.path.join(BASE_PATH, "resources", "models", "hubert_base_state.pt"))
+    parser.add_argument("--threads", type=int, default=0, help="torch CPU 线程数，0 表示默认")
+    args = parser.parse_args()
+
+    import torch
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fp32 = bench_gpt_sovits(args, None)
+        int8 = bench_gpt_sovits(args, cache_dir)
+        report("GPT-SoVITS (T2S 解码块 + BERT + CNHuBERT)", fp32, int8)
+
+        if args.rvc_pth:
+            sources = [(audio, sr) for audio, sr, _ in fp32]
+            rvc32 = bench_rvc(args, None, sources)
+            rvc8 = bench_rvc(args, cache_dir, sources)
+            report("RVC (Hubert)", rvc32, rvc8)
+
+
+if __name__ == "__main__":
+    main()
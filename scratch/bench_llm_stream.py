@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import random
+import argparse
+
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_PATH, "src"))
+sys.path.append(os.path.dirname(__file__))
+
+from bench_utils import timed
+
+ANSWER_PHRASES = ["嗯嗯，", "我想想哦，", "今天天气不错", "，我们去蒙德城逛逛吧。", "你觉得怎么样？", "Sure, ", "let me see. ", "\n"]
+THINK_PHRASES = ["用户问的是", "我需要先回忆一下", "，然后", "考虑语气要可爱一点", "。", "Wait, ", "maybe ", "\n"]
+
+
+def make_transcript(tokens, think_ratio, seed=0):
+    """
+    合成一段 OpenAI 兼容 SSE 流（无录制文件时使用）：think_ratio 比例的 token 位于 <think> 内，结束标签被故意拆到多个 delta 中。
+    开始标签保持完整：原实现在开始标签被拆分时会把前半截当作正文输出，无法与之比对结果。
+    """
+    rng = random.Random(seed)
+    deltas = ["\n", "<think>"]
+    deltas += [rng.choice(THINK_PHRASES) for _ in range(int(tokens * think_ratio))]
+    deltas += ["</", "think", ">\n\n"]
+    deltas += [rng.choice(ANSWER_PHRASES) for _ in range(tokens - len(deltas))]
+    lines = [": keep-alive"]
+    for delta in deltas:
+        payload = {"id": "chatcmpl-bench", "object": "chat.completion.chunk",
+                   "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}
+        lines += ["data: " + json.dumps(payload, ensure_ascii=False), ""]
+    lines += ["data: [DONE]", ""]
+    return [line.encode("utf-8") for line in lines]
+
+
+def legacy_replay(lines, splitter):
+    """改造前 LLMWorker.run 的解析逻辑：每个 delta 都对累计全文做 lstrip / startswith / split 与切片"""
+    sentences, accumulated_text, emitted_text = [], "", ""
+    for line in lines:
+        if not line:
+            continue
+        decoded_line = line.decode('utf-8').strip()
+        if not decoded_line.startswith("data: "):
+            continue
+        data_str = decoded_line[6:]
+        if data_str == "[DONE]":
+            break
+        try:
+            delta = json.loads(data_str)['choices'][0]['delta']
+            if 'content' in delta:
+                accumulated_text += delta['content']
+                clean_text = accumulated_text.lstrip()
+                if clean_text.startswith("<think>"):
+                    if "</think>" in clean_text:
+                        actual_content = clean_text.split("</think>", 1)[1]
+                        new_chars = actual_content[len(emitted_text):]
+                        if new_chars:
+                            emitted_text += new_chars
+                            sentences += splitter.feed(new_chars)
+                else:
+                    new_chars = accumulated_text[len(emitted_text):]
+                    if new_chars:
+                        emitted_text += new_chars
+                        sentences += splitter.feed(new_chars)
+        except Exception:
+            pass
+    return emitted_text, sentences + splitter.flush()
+
+
+def incremental_replay(lines, splitter):
+    """当前 LLMWorker.run 的解析逻辑：iter_sse_content + ThinkTagFilter，每个片段只处理一次"""
+    from aipet.services.llm_service import ThinkTagFilter, iter_sse_content
+    think_filter = ThinkTagFilter()
+    sentences, parts = [], []
+    for chunk in iter_sse_content(lines):
+        new_chars = think_filter.feed(chunk)
+        if new_chars:
+            parts.append(new_chars)
+            sentences += splitter.feed(new_chars)
+    tail = think_filter.flush()
+    if tail:
+        parts.append(tail)
+        sentences += splitter.feed(tail)
+    return "".join(parts), sentences + splitter.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 流式解析：逐 delta 全文重扫 vs 增量状态机（SSE + <think> 过滤 + 分句）")
+    parser.add_argument("--transcript", help="录制的 SSE 原始响应文件（每行一条 SSE 行）；缺省合成 --tokens 个 delta")
+    parser.add_argument("--tokens", type=int, default=10000)
+    parser.add_argument("--think-ratio", type=float, default=0.8, help="合成流中思考内容所占比例")
+    parser.add_argument("--save", help="把合成的 SSE 流写入该文件，便于复现")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from aipet.services.llm_service import SentenceSplitter, get_splitter_policy
+
+    if args.transcript:
+        with open(args.transcript, "rb") as f:
+            lines = f.read().splitlines()
+    else:
+        lines = make_transcript(args.tokens, args.think_ratio)
+        if args.save:
+            with open(args.save, "wb") as f:
+                f.write(b"\n".join(lines))
+    print(f"SSE 行数: {len(lines)}")
+
+    policy = get_splitter_policy("gpt_sovits")
+    (old_text, old_sentences), old_time = timed(lambda: legacy_replay(lines, SentenceSplitter(policy)), args.repeat)
+    (new_text, new_sentences), new_time = timed(lambda: incremental_replay(lines, SentenceSplitter(policy)), args.repeat)
+
+    print(f"逐 delta 全文重扫: {old_time * 1000:.1f} ms / 增量状态机: {new_time * 1000:.1f} ms，加速比 {old_time / new_time:.1f}x")
+    print(f"正文 {len(new_text)} 字，分句 {len(new_sentences)} 段；"
+          f"正文一致: {old_text == new_text}，分句一致: {old_sentences == new_sentences}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import os
+import sys
+import time
+import argparse
+import threading
+
+# 解决 Windows 下多个 OpenMP 运行时库冲突导致的 WinError 1114 动态链接库初始化失败问题
+os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_PATH, "src"))
+sys.path.append(os.path.dirname(__file__))
+
+import numpy as np
+
+from mock_llm_server import add_server_arguments, server_options, start_server
+
+QUESTIONS = ["你好呀，今天过得怎么样？", "给我讲讲往生堂的故事吧。", "明天天气怎么样？", "推荐一个周末去处吧。", "你最喜欢吃什么？"]
+
+
+class ReplyTrace:
+    """记录单轮回复链路各事件的时刻（相对于提问时刻，秒）"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token = None
+        self.chat_finished = None
+        self.reply_text = ""
+        self.sentence_ready = {}   # index -> 分句就绪时刻
+        self.audio_ready = {}      # index -> 首段音频可播放时刻
+        self.audio_done = {}       # index -> 整句音频合成完毕时刻
+        self.audio_seconds = {}    # index -> 音频时长
+        self._lock = threading.Lock()
+
+    def now(self):
+        return time.perf_counter() - self.start
+
+    def done(self):
+        with self._lock:
+            return (self.chat_finished is not None and
+                    all(index in self.audio_done for index in self.sentence_ready))
+
+    def on_chunk(self, chunk):
+        if self.first_token is None:
+            self.first_token = self.now()
+
+    def on_sentence(self, index, text):
+        self.sentence_ready[index] = self.now()
+
+    def on_finished(self, text):
+        self.reply_text = text
+        self.chat_finished = self.now()
+
+    def on_audio(self, index, audio, text):
+        from aipet.services.tts_service import AudioStream
+        t = self.now()
+        if isinstance(audio, AudioStream):
+            # 流式音频：首块写入即可开始播放，后台读完整句以得到合成结束时刻与时长
+            threading.Thread(target=self._watch_stream, args=(index, audio), daemon=True).start()
+            return
+        with self._lock:
+            self.audio_ready[index] = t
+            self.audio_seconds[index] = len(audio[1]) / audio[0] if audio is not None and len(audio[1]) else 0.0
+            self.audio_done[index] = t
+
+    def _watch_stream(self, index, stream):
+        samples, sr = 0, None
+        for sr, pcm in stream:
+            with self._lock:
+                self.audio_ready.setdefault(index, self.now())
+            samples += len(pcm)
+        with self._lock:
+            self.audio_ready.setdefault(index, self.now())
+            self.audio_seconds[index] = samples / sr if sr else 0.0
+            self.audio_done[index] = self.now()
+
+    def playback(self):
+        """
+        模拟按序放音：第 k 句在其音频可播放且上一句播完后开始。
+        返回 (首段出声时刻, 句间卡顿列表, 整轮播完时刻)；句间卡顿为上一句播完到下一句可播放之间的空等时长。
+        """
+        gaps, end, first = [], None, None
+        for index in sorted(self.audio_ready):
+            if self.audio_seconds.get(index, 0.0) <= 0:
+                continue
+            ready = self.audio_ready[index]
+            if end is None:
+                first, start = ready, ready
+            else:
+                gaps.append(max(0.0, ready - end))
+                start = max(ready, end)
+            # 流式音频边合成边播放，整句播完不早于合成完毕
+            end = max(start + self.audio_seconds[index], self.audio_done[index])
+        return first, gaps, end
+
+
+def run_conversation(loop, signals, worker_factory, llm_url, question, history, timeout):
+    from aipet.services.llm_service import LLMWorker, get_splitter_policy
+
+    trace = ReplyTrace()
+    tts_worker = worker_factory()
+    connections = [
+        (signals.chat_chunk, trace.on_chunk),
+        (signals.sentence_ready, trace.on_sentence),
+        (signals.sentence_ready, tts_worker.add_task),
+        (signals.chat_finished, trace.on_finished),
+        (signals.tts_sentence_finished, trace.on_audio),
+    ]
+    for signal, slot in connections:
+        signal.connect(slot)
+    tts_worker.start()
+    llm = LLMWorker(question, "你是胡桃，往生堂第七十七代堂主。", history, "mock-key", llm_url, "mock",
+                    signals, splitter_policy=get_splitter_policy(tts_worker.voice_mode))
+    trace.start = time.perf_counter()
+    llm.start()
+
+    deadline = time.perf_counter() + timeout
+    while not trace.done() and time.perf_counter() < deadline:
+        loop.process_events(timeout=0.002)
+    if not trace.done():
+        print(f"[Warning] 第 {len(history) // 2 + 1} 轮在 {timeout}s 内未完成")
+    llm.abort()
+    tts_worker.abort()
+    for signal, slot in connections:
+        signal.disconnect(slot)
+    return trace
+
+
+def percentiles(values):
+    if not values:
+        return "—"
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return f"p50 {p50 * 1000:7.0f} ms / p90 {p90 * 1000:7.0f} ms / p99 {p99 * 1000:7.0f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端回复延迟：LLMWorker → SentenceSplitter → TTSQueueWorker，统计首次出声、句间卡顿与整轮耗时分位数")
+    parser.add_argument("--conversations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1, help="预热轮数（载入模型），不计入统计")
+    parser.add_argument("--llm-url", help="已有的 OpenAI 兼容接口地址；缺省在本进程内启动模拟服务")
+    parser.add_argument("--timeout", type=float, default=120.0, help="单轮超时（秒）")
+    parser.add_argument("--voice-mode", default="edge_tts", choices=["edge_tts", "rvc", "gpt_sovits"])
+    parser.add_argument("--gpt", default="", help="GPT(T2S) 权重，留空使用底模")
+    parser.add_argument("--sovits", default="", help="SoVITS 权重，留空使用底模")
+    parser.add_argument("--version", default="v2")
+    parser.add_argument("--ref", default="", help="GPT-SoVITS 参考音频")
+    parser.add_argument("--prompt-text", default="", help="参考音频对应文本")
+    parser.add_argument("--rvc-pth", default="", help="RVC 模型绝对路径")
+    parser.add_argument("--rvc-index", default="")
+    parser.add_argument("--hubert", default=os.path.join(BASE_PATH, "resources", "models", "hubert_base_state.pt"))
+    parser.add_argument("--no-streaming", action="store_true", help="关闭 GPT-SoVITS 流式合成")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    from aipet.events import EventBus, EventLoop, WORKER_EVENTS
+    from aipet.services.tts_service import TTSQueueWorker
+
+    # 与界面线程处理排队信号的方式一致：工作线程发出的事件投递到事件循环，由主线程依次执行
+    loop = EventLoop("BenchReplyLatency")
+    signals = EventBus(WORKER_EVENTS, dispatch=loop.post)
+    llm_url = args.llm_url
+    if not llm_url:
+        _, llm_url = start_server(**server_options(args))
+        print(f"模拟大模型服务: {llm_url}（首 token {args.ttft}s，{args.tps} token/s，思考 {args.think_tokens} token）")
+
+    def worker_factory():
+        return TTSQueueWorker(
+            enable_tts=True, signals=signals, voice_mode=args.voice_mode,
+            ref_audio_path=args.ref, prompt_text=args.prompt_text,
+            gpt_ckpt_path=args.gpt, sovits_pth_path=args.sovits, gpt_sovits_version=args.version,
+            rvc_pth=args.rvc_pth, rvc_index=args.rvc_index, hubert_path=args.hubert,
+            streaming=not args.no_streaming,
+        )
+
+    history, traces = [], []
+    for i in range(args.warmup + args.conversations):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        trace = run_conversation(loop, signals, worker_factory, llm_url, question, history[-8:], args.timeout)
+        history += [{"role": "user", "content": question}, {"role": "assistant", "content": trace.reply_text}]
+        if i < args.warmup:
+            continue
+        traces.append(trace)
+        first, gaps, end = trace.playback()
+        print(f"#{len(traces):>3} 首 token {trace.first_token or 0:6.2f}s  首次出声 {first or 0:6.2f}s  "
+              f"句数 {len(trace.sentence_ready):>2}  最大卡顿 {max(gaps, default=0):5.2f}s  播完 {end or 0:6.2f}s")
+
+    playbacks = [trace.playback() for trace in traces]
+    print(f"\n===== {args.voice_mode}，{len(traces)} 轮 =====")
+    print(f"首 token     {percentiles([t.first_token for t in traces if t.first_token is not None])}")
+    print(f"首句分出     {percentiles([t.sentence_ready[0] for t in traces if 0 in t.sentence_ready])}")
+    print(f"首次出声     {percentiles([p[0] for p in playbacks if p[0] is not None])}")
+    print(f"句间卡顿     {percentiles([gap for p in playbacks for gap in p[1]])}")
+    print(f"文本生成完毕 {percentiles([t.chat_finished for t in traces if t.chat_finished is not None])}")
+    print(f"整轮播完     {percentiles([p[2] for p in playbacks if p[2] is not None])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import time
+
+
+def timed(fn, repeat=1):
+    """重复调用 fn 共 repeat 次，返回 (最后一次的结果, 平均每次耗时秒数)；供各基准脚本与 ONNX 导出校验计时"""
+    result, start = None, time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
@@ -0,0 +1,72 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# 解决 Windows 下多个 OpenMP 运行时库冲突导致的 WinError 1114 动态链接库初始化失败问题
+os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_PATH, "src"))
+
+
+def child(path, mode):
+    """子进程：以指定方式载入权重并遍历全部张量（模拟推理时所有页都被访问），输出耗时与独占内存"""
+    import torch
+    import psutil
+    from aipet.services.weights_store import load_converted, torch_load
+
+    proc = psutil.Process()
+    base_uss = proc.memory_full_info().uss
+    start = time.perf_counter()
+    checkpoint = load_converted(path) if mode == "safetensors" else torch_load(path)
+    load_time = time.perf_counter() - start
+
+    state_dict = checkpoint.get("weight", checkpoint)
+    with torch.no_grad():
+        total = sum(float(t.float().sum()) for t in state_dict.values() if isinstance(t, torch.Tensor))
+    touch_time = time.perf_counter() - start
+    # USS 只统计进程独占的页；内存映射的只读页属于共享页缓存，多进程载入同一模型时不会重复计入
+    uss = proc.memory_full_info().uss - base_uss
+    print(json.dumps({"load": load_time, "touch": touch_time, "uss": uss, "checksum": total}))
+
+
+def run(path, mode):
+    out = subprocess.run([sys.executable, __file__, "--child", mode, path], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pickle (torch.load) 与 safetensors 内存映射两种权重载入方式的冷启动耗时/独占内存对比")
+    parser.add_argument("path", help="原始权重文件 (.ckpt / .pth / .pt)，需已运行 python src/main.py --convert-weights 转换")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", choices=["pickle", "safetensors"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.path, args.child)
+        return
+
+    from aipet.services.weights_store import is_converted
+    if not is_converted(args.path):
+        print(f"未找到最新的 safetensors 转换产物: {args.path}")
+        return
+
+    results = {}
+    for mode in ("pickle", "safetensors"):
+        runs = [run(args.path, mode) for _ in range(args.repeat)]
+        results[mode] = {k: sum(r[k] for r in runs) / len(runs) for k in ("load", "touch", "uss")}
+        results[mode]["checksum"] = runs[0]["checksum"]
+
+    print(f"{'方式':<12} {'载入(s)':>10} {'载入+遍历(s)':>14} {'独占内存(MB)':>14}")
+    for mode, r in results.items():
+        print(f"{mode:<12} {r['load']:>10.3f} {r['touch']:>14.3f} {r['uss'] / 1024 / 1024:>14.1f}")
+    p, s = results["pickle"], results["safetensors"]
+    print(f"载入加速比: {p['load'] / s['load']:.1f}x，独占内存减少: {(p['uss'] - s['uss']) / 1024 / 1024:.1f} MB")
+    print(f"张量校验和: pickle {p['checksum']:.6g} / safetensors {s['checksum']:.6g}")
+
+
+if __name__ == "__main__":
+    main()
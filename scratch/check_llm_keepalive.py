@@ -0,0 +1,39 @@
+import os
+import sys
+import argparse
+
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_PATH, "src"))
+sys.path.append(os.path.dirname(__file__))
+
+from mock_llm_server import start_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查 LLMWorker 多轮对话是否复用连接池中的同一条 keep-alive 连接")
+    parser.add_argument("--turns", type=int, default=2)
+    args = parser.parse_args()
+
+    from aipet.events import EventBus, WORKER_EVENTS
+    from aipet.services.llm_service import LLMWorker
+
+    server, url = start_server(ttft=0.01, tokens_per_second=500.0, think_tokens=20, reply_tokens=30)
+    replies = []
+    for i in range(args.turns):
+        signals = EventBus(WORKER_EVENTS)
+        signals.chat_finished.connect(replies.append)
+        worker = LLMWorker(f"第 {i + 1} 轮", "你是胡桃。", [], "mock-key", url, "mock", signals)
+        worker.start()
+        worker.join(timeout=30)
+
+    print(f"完成 {len(replies)}/{args.turns} 轮，服务端共接受 {server.connection_count} 条 TCP 连接")
+    server.shutdown()
+    if len(replies) != args.turns or server.connection_count != 1:
+        print("[FAIL] 连接未被复用")
+        return 1
+    print("[OK] 多轮对话复用了同一条连接")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
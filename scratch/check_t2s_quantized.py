@@ -0,0 +1,99 @@
+import os
+import sys
+import argparse
+from types import SimpleNamespace
+
+# 解决 Windows 下多个 OpenMP 运行时库冲突导致的 WinError 1114 动态链接库初始化失败问题
+os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+
+# GPT-SoVITS 内部使用 AR.* 形式的绝对导入，需要把其包目录加入查找路径
+BASE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_PATH, "src"))
+sys.path.append(os.path.join(BASE_PATH, "src", "aipet", "services", "gpt_sovits"))
+
+import torch
+from torch import nn
+
+from AR.models.t2s_model import T2SMLP, T2SBlock, T2STransformer, StaticKVCache
+from AR.models.t2s_quantized import build_float_linears, build_quantized_transformer
+from aipet.services.quantization import quantize_dynamic_int8
+
+
+def build_decoder(num_layers, hidden_dim, num_heads):
+    """只含 build_quantized_transformer 所需字段的随机权重 decoder（不需要真实权重与嵌入层）"""
+    layer = nn.TransformerEncoderLayer(hidden_dim, num_heads, hidden_dim * 4, dropout=0.0, batch_first=True)
+    h = nn.TransformerEncoder(layer, num_layers, enable_nested_tensor=False).eval()
+    return SimpleNamespace(num_layers=num_layers, num_head=num_heads, model_dim=hidden_dim, h=h)
+
+
+def build_float_transformer(decoder):
+    """与 Text2SemanticDecoder.__init__ 相同方式构造 fp32 的 TorchScript 解码器，作为对照"""
+    blocks = []
+    for layer in decoder.h.layers:
+        mlp = T2SMLP(layer.linear1.weight, layer.linear1.bias, layer.linear2.weight, layer.linear2.bias)
+        blocks.append(T2SBlock(
+            decoder.num_head,
+            decoder.model_dim,
+            mlp,
+            layer.self_attn.in_proj_weight,
+            layer.self_attn.in_proj_bias,
+            layer.self_attn.out_proj.weight,
+            layer.self_attn.out_proj.bias,
+            layer.norm1.weight,
+            layer.norm1.bias,
+            layer.norm1.eps,
+            layer.norm2.weight,
+            layer.norm2.bias,
+            layer.norm2.eps,
+        ))
+    return T2STransformer(decoder.num_layers, blocks)
+
+
+def run_steps(transformer, prompt, steps):
+    """处理 prompt 后分别以 torch.cat 与预分配缓存两种方式解码，返回两条路径的最后一步输出"""
+    src_len = prompt.shape[1]
+    attn_mask = torch.zeros((1, 1, src_len, src_len), dtype=torch.bool)
+    _, k_cache, v_cache = transformer.process_prompt(prompt, attn_mask, None)
+    kv = StaticKVCache(k_cache, v_cache, src_len + steps)
+
+    torch.manual_seed(1)
+    inputs = [torch.randn(1, 1, prompt.shape[2]) for _ in range(steps)]
+    for x in inputs:
+        y_dynamic, k_cache, v_cache = transformer.decode_next_token(x, k_cache, v_cache)
+        y_static = transformer.decode_next_token_static(x, kv.k, kv.v, kv.next_position())
+    return y_dynamic, y_static
+
+
+@torch.no_grad()
+def main():
+    parser = argparse.ArgumentParser(description="冒烟测试：构造 int8 量化 T2S 解码器并跑通 prompt 与逐 token 解码")
+    parser.add_argument("--layers", type=int, default=2)
+    parser.add_argument("--hidden", type=int, default=64)
+    parser.add_argument("--heads", type=int, default=4)
+    parser.add_argument("--prompt", type=int, default=12)
+    parser.add_argument("--steps", type=int, default=3)
+    parser.add_argument("--tol", type=float, default=0.1)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    decoder = build_decoder(args.layers, args.hidden, args.heads)
+    quantized = build_quantized_transformer(decoder, quantize_dynamic_int8(build_float_linears(decoder).eval()))
+    reference = build_float_transformer(decoder)
+
+    prompt = torch.randn(1, args.prompt, args.hidden)
+    q_dynamic, q_static = run_steps(quantized, prompt, args.steps)
+    f_dynamic, _ = run_steps(reference, prompt, args.steps)
+
+    static_diff = (q_dynamic - q_static).abs().max().item()
+    quant_diff = (q_dynamic - f_dynamic).abs().max().item()
+    print(f"int8 两种 KV 缓存路径最大误差: {static_diff:.2e}")
+    print(f"int8 与 fp32 解码输出最大误差: {quant_diff:.4f} (阈值 {args.tol})")
+    if static_diff > 1e-4 or quant_diff > args.tol:
+        print("[FAIL] int8 量化解码器输出偏差过大")
+        return 1
+    print("[OK] int8 量化解码器可正常解码")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+本地 OpenAI 兼容的模拟大模型服务：按脚本或随机生成回复，以 SSE 流式返回，首 token 延迟、吐字速度与 <think> 思考前缀均可配置。
+无需真实的 SiliconFlow 账号即可调试和测量桌宠的回复链路；把 settings.json 中 llm.base_url 指向
+http://127.0.0.1:<端口>/v1/chat/completions、api_key 填任意非空值即可。
+
+    python scratch/mock_llm_server.py --port 8765 --ttft 0.6 --tps 40 --think-tokens 200
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RANDOM_PHRASES = [
+    "嗯嗯，", "本堂主今天心情不错，", "带你去往生堂转转吧。", "哎呀，这个问题可难不倒我！", "听我慢慢给你道来，",
+    "明天上午九点半，", "我们在蒙德城的广场见面。", "你觉得怎么样呀？", "嘿嘿，", "别担心，", "一切都会好起来的。",
+    "太阳出来我晒太阳，", "月亮出来我晒月亮咯~", "Let me think, ", "that sounds great! ",
+]
+THINK_PHRASES = ["用户在问", "我需要想一想", "，语气要活泼一些", "。", "先确认一下意图", "，然后组织回答", "\n"]
+
+# 近似的分词：中日韩字符逐字一个 token，英文单词连同其后空白一个 token，其余字符逐个
+_TOKEN_RE = re.compile(r"[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]|[A-Za-z0-9']+\s*|\s+|.")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text)
+
+
+class ReplyScript:
+    """回复来源：提供脚本时按顺序循环使用，否则从短语表随机拼出约 reply_tokens 个 token 的回复"""
+
+    def __init__(self, replies=None, reply_tokens=80, think_tokens=0, seed=0):
+        self.replies = replies or []
+        self.reply_tokens = reply_tokens
+        self.think_tokens = think_tokens
+        self._rng = random.Random(seed)
+        self._index = 0
+        self._lock = threading.Lock()
+
+    def next_tokens(self):
+        with self._lock:
+            if self.replies:
+                reply = self.replies[self._index % len(self.replies)]
+                self._index += 1
+                tokens = tokenize(reply)
+            else:
+                tokens = []
+                while len(tokens) < self.reply_tokens:
+                    tokens += tokenize(self._rng.choice(RANDOM_PHRASES))
+            if self.think_tokens:
+                think = []
+                while len(think) < self.think_tokens:
+                    think += tokenize(self._rng.choice(THINK_PHRASES))
+                tokens = ["<think>", "\n"] + think[:self.think_tokens] + ["\n", "</think>", "\n\n"] + tokens
+        return tokens
+
+
+def _chunk_payload(model, content=None, finish_reason=None):
+    delta = {"content": content} if content is not None else {}
+    return {
+        "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def make_handler(script, ttft, tokens_per_second, jitter):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # 保持连接，便于验证客户端的连接复用
+
+        def log_message(self, format, *args):
+            pass
+
+        def setup(self):
+            super().setup()
+            # 统计客户端新建的 TCP 连接数，连接复用正常时多轮对话只应建立一次
+            with self.server.stats_lock:
+                self.server.connection_count += 1
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_POST(self):
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            except ValueError:
+                self._send_json(400, {"error": {"message": "invalid json"}})
+                return
+            model = request.get("model", "mock")
+            tokens = script.next_tokens()
+
+            if not request.get("stream"):
+                time.sleep(ttft + len(tokens) / tokens_per_second)
+                self._send_json(200, {
+                    "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                                 "finish_reason": "stop"}],
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                time.sleep(ttft)
+                interval = 1.0 / tokens_per_second
+                next_time = time.perf_counter()
+                for token in tokens:
+                    payload = json.dumps(_chunk_payload(model, token), ensure_ascii=False)
+                    self._write_chunk(f"data: {payload}\n\n".encode("utf-8"))
+                    next_time += interval * random.uniform(1 - jitter, 1 + jitter)
+                    time.sleep(max(0.0, next_time - time.perf_counter()))
+                payload = json.dumps(_chunk_payload(model, finish_reason="stop"), ensure_ascii=False)
+                self._write_chunk(f"data: {payload}\n\ndata: [DONE]\n\n".encode("utf-8"))
+                self._write_chunk(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                # 客户端打断：连接已被关闭
+                self.close_connection = True
+
+    return Handler
+
+
+def start_server(host="127.0.0.1", port=0, replies=None, ttft=0.5, tokens_per_second=30.0, think_tokens=0,
+                 reply_tokens=80, jitter=0.2, seed=0):
+    """在后台线程中启动模拟服务，返回 (server, 接口地址)；port 为 0 时由系统分配空闲端口"""
+    script = ReplyScript(replies, reply_tokens=reply_tokens, think_tokens=think_tokens, seed=seed)
+    server = ThreadingHTTPServer((host, port), make_handler(script, ttft, tokens_per_second, jitter))
+    server.daemon_threads = True
+    server.connection_count = 0
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://{server.server_address[0]}:{server.server_address[1]}/v1/chat/completions"
+    return server, url
+
+
+def load_replies(path):
+    """脚本文件：JSON 字符串数组，或每行一条回复的纯文本"""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith(".json"):
+        return json.loads(text)
+    return [line.replace("\\n", "\n") for line in text.splitlines() if line.strip()]
+
+
+def add_server_arguments(parser):
+    parser.add_argument("--replies", help="脚本回复文件（.json 字符串数组或每行一条的文本），缺省随机生成")
+    parser.add_argument("--ttft", type=float, default=0.5, help="首 token 延迟（秒）")
+    parser.add_argument("--tps", type=float, default=30.0, help="吐字速度（token/秒）")
+    parser.add_argument("--think-tokens", type=int, default=0, help="回复前 <think> 思考内容的 token 数")
+    parser.add_argument("--reply-tokens", type=int, default=80, help="随机回复的 token 数")
+    parser.add_argument("--jitter", type=float, default=0.2, help="token 间隔的随机抖动比例")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def server_options(args):
+    return dict(
+        replies=load_replies(args.replies) if args.replies else None,
+        ttft=args.ttft, tokens_per_second=args.tps, think_tokens=args.think_tokens,
+        reply_tokens=args.reply_tokens, jitter=args.jitter, seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容的模拟大模型 SSE 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server, url = start_server(args.host, args.port, **server_options(args))
+    print(f"模拟大模型服务已启动: {url}（Ctrl+C 退出）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,12 @@ if sys.platform == "win32" and hasattr(os, "add_dll_directory"):
                 except Exception:
                     pass
 
-from aipet.ui.pet_window import DesktopPet
+def __getattr__(name):
+    # 延迟导入 DesktopPet：仅导入 aipet 子模块（如服务层、配置）时无需拉起整个 Qt 界面
+    if name == "DesktopPet":
+        from aipet.ui.pet_window import DesktopPet
+        return DesktopPet
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     "DesktopPet",
@@ -0,0 +1,53 @@
+# 与推理引擎无关的音频辅助函数：只依赖 numpy 与 soundfile（librosa 按需导入），
+# 纯 Edge-TTS 模式下调用不会连带载入 torch 与 RVC 引擎。
+import io
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+
+def decode_audio_bytes(data, sr=None):
+    """
+    在内存中解码压缩音频字节流（Edge-TTS 输出的 MP3、WAV 等），避免临时文件往返
+
+    参数:
+        data: 音频文件的完整字节内容
+        sr: 目标采样率；为 None 时保持原始采样率
+    返回:
+        (float32 单声道 numpy 数组, 采样率)
+    """
+    try:
+        # libsndfile >= 1.1.0 原生支持 MP3 解码，可直接读取内存缓冲
+        audio, orig_sr = sf.read(io.BytesIO(data), dtype="float32")
+    except Exception:
+        # 旧版 libsndfile 不支持 MP3 时，退回由 librosa(audioread) 解码临时文件
+        import librosa
+        fd, tmp_path = tempfile.mkstemp(suffix=".mp3")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            audio, orig_sr = librosa.load(tmp_path, sr=None, mono=True)
+        finally:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    if len(audio.shape) > 1:
+        audio = np.mean(audio, axis=-1)
+    audio = audio.astype(np.float32)
+    if sr is not None and orig_sr != sr:
+        import librosa
+        audio = librosa.resample(audio, orig_sr=orig_sr, target_sr=sr)
+        orig_sr = sr
+    return audio, orig_sr
+
+
+def float_to_pcm16(audio):
+    """将 [-1, 1] 浮点音频转换为 int16 PCM，超出范围时整体压缩防止爆音"""
+    audio_max = np.abs(audio).max() if audio.size else 0
+    if audio_max > 1:
+        audio = audio / audio_max
+    return (audio * 32767).astype(np.int16)
@@ -42,3 +42,12 @@ if not os.path.exists(TEMP_AUDIO_DIR):
         pass
 
 TEMP_AUDIO_PATH = os.path.join(TEMP_AUDIO_DIR, "temp_speech.wav")
+
+# 合成语音的磁盘缓存目录（内容寻址，按容量 LRU 淘汰）
+SPEECH_CACHE_DIR = os.path.join(BASE_DIR, "cache", "speech")
+
+# GPT-SoVITS 短语级文本特征（音素 + BERT）的落盘缓存目录
+TEXT_FEATURE_CACHE_DIR = os.path.join(BASE_DIR, "cache", "text_features")
+
+# 动态 int8 量化推理模式下，量化后模型权重的缓存目录
+INT8_MODEL_CACHE_DIR = os.path.join(BASE_DIR, "cache", "int8_models")
@@ -0,0 +1,132 @@
+import queue
+import threading
+
+# 后台工作线程（LLMWorker / TTSQueueWorker / WarmupWorker / 放音设备）发出的事件，与 signals.WorkerSignals 同名
+WORKER_EVENTS = (
+    "chat_finished", "tts_finished", "chat_chunk", "sentence_ready", "tts_sentence_finished",
+    "audio_playback_started", "audio_playback_finished", "warmup_progress", "warmup_finished",
+)
+
+# PetRuntime 对外发布的事件，界面（DesktopPet）、命令行与基准脚本均作为订阅者：
+#   reply_started(generation)                         新一轮对话开始（旧一轮的播放与合成已作废）
+#   chat_chunk(text)                                  流式文字增量
+#   sentence_ready(index, text)                       分句就绪
+#   chat_finished(text)                               文本生成完毕（含出错提示）
+#   playback_started(generation, index, text, ms)     某句开始播放，ms 为时长（流式音频为 0，未知）
+#   playback_finished(generation, index, text, idle)  某句播完，idle 表示设备中已无排队的句子
+#   reply_finished(generation, text)                  文本生成完毕且全部语音播完
+#   warmup_progress(name, done, total) / warmup_finished()
+RUNTIME_EVENTS = (
+    "reply_started", "chat_chunk", "sentence_ready", "chat_finished", "playback_started", "playback_finished",
+    "reply_finished", "warmup_progress", "warmup_finished",
+)
+
+
+class Signal:
+    """
+    不依赖 Qt 的信号，用法与 pyqtSignal 一致 (connect / disconnect / emit)。
+    未指定 dispatch 时在发送线程中同步调用各回调；指定时把每次回调交给 dispatch 调度（如投递到事件循环线程）。
+    """
+
+    def __init__(self, dispatch=None):
+        self._slots = []
+        self._lock = threading.Lock()
+        self._dispatch = dispatch
+
+    def connect(self, slot):
+        with self._lock:
+            self._slots.append(slot)
+
+    def disconnect(self, slot=None):
+        with self._lock:
+            if slot is None:
+                self._slots.clear()
+            else:
+                self._slots.remove(slot)
+
+    def emit(self, *args):
+        with self._lock:
+            slots = list(self._slots)
+        for slot in slots:
+            if self._dispatch is not None:
+                self._dispatch(slot, *args)
+                continue
+            try:
+                slot(*args)
+            except Exception as e:
+                print(f"[EventBus] 事件回调执行失败: {e}")
+
+
+class EventBus:
+    """按名称列表创建的一组 Signal，可直接替代 WorkerSignals 传给各工作线程"""
+
+    def __init__(self, names, dispatch=None):
+        self.names = tuple(names)
+        for name in self.names:
+            setattr(self, name, Signal(dispatch))
+
+    def forward_to(self, target):
+        """把同名事件转发到另一组信号（如 Qt 的 WorkerSignals，由 Qt 排队切回界面线程）"""
+        for name in self.names:
+            signal = getattr(target, name, None)
+            if signal is not None:
+                getattr(self, name).connect(signal.emit)
+
+
+class EventLoop:
+    """
+    单线程事件循环：投递的回调按先后顺序在同一线程中依次执行，与 Qt 界面线程处理排队信号的语义一致，
+    回调之间无需加锁。可由后台线程驱动 (start)，也可由调用方线程手动驱动 (process_events)。
+    """
+
+    def __init__(self, name="PetRuntime"):
+        self.name = name
+        self._tasks = queue.Queue()
+        self._thread = None
+        self._running = False
+
+    def post(self, fn, *args):
+        self._tasks.put((fn, args))
+
+    def _run_task(self, fn, args):
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"[EventLoop] 回调 {getattr(fn, '__name__', fn)} 执行失败: {e}")
+
+    def process_events(self, timeout=0.0):
+        """执行已投递的回调；队列为空时最多等待 timeout 秒。返回执行的回调数"""
+        count = 0
+        try:
+            fn, args = self._tasks.get(timeout=timeout) if timeout > 0 else self._tasks.get_nowait()
+        except queue.Empty:
+            return 0
+        while True:
+            if fn is None:
+                self._running = False
+                return count
+            self._run_task(fn, args)
+            count += 1
+            try:
+                fn, args = self._tasks.get_nowait()
+            except queue.Empty:
+                return count
+
+    def in_loop_thread(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while self._running:
+            self.process_events(timeout=0.5)
+
+    def stop(self):
+        self._running = False
+        self._tasks.put((None, ()))
+        if self._thread is not None and not self.in_loop_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
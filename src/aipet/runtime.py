@@ -0,0 +1,434 @@
+import os
+import glob
+import threading
+
+from aipet.config import (BASE_DIR, TEMP_AUDIO_DIR, SPEECH_CACHE_DIR, TEXT_FEATURE_CACHE_DIR,
+                          INT8_MODEL_CACHE_DIR)
+from aipet.utils import load_json
+from aipet.events import EventBus, EventLoop, RUNTIME_EVENTS, WORKER_EVENTS
+from aipet.services.llm_service import LLMWorker, get_splitter_policy
+from aipet.services.tts_service import TTSQueueWorker, AudioStream, TextCleaner
+from aipet.services.audio_sink import create_audio_sink
+from aipet.services.speech_cache import SpeechCache
+from aipet.services.chat_memory import ChatMemory, LLMSummarizer, make_token_counter
+from aipet.services.warmup import WarmupWorker
+
+
+def cleanup_temp_audios():
+    """清理上一轮对话产生的临时语音文件，避免硬盘膨胀"""
+    for f in glob.glob(os.path.join(TEMP_AUDIO_DIR, "temp_speech_*.wav")):
+        try:
+            os.remove(f)
+        except Exception:
+            pass
+
+
+class PetRuntime:
+    """
+    与界面无关的对话 + 语音运行时：LLM 流式生成 → 分句 → TTS 流水线合成 → 按序送入放音设备。
+
+    工作线程与放音设备的回调全部投递到同一个事件循环线程中依次处理，与原先经由 Qt 排队信号切回界面线程的
+    处理顺序一致，运行时状态只在该线程中读写。对外通过 events（见 events.RUNTIME_EVENTS）发布事件，
+    回调运行在事件循环线程中；桌宠界面、命令行与基准脚本都只是订阅者，界面需自行切回 Qt 线程。
+    """
+
+    def __init__(self, config, voice_dir=None, system_prompt="", audio_backend=None, audio_output_file=None):
+        self.config = config
+        self.system_prompt = system_prompt
+        self.voice_profile = {}
+        self.voice_full_profile = {}
+        self.loop = EventLoop()
+        self.events = EventBus(RUNTIME_EVENTS)
+
+        app_cfg = config['app']
+        # 按 token 预算管理对话记忆，较早的轮次在后台折叠成滚动摘要
+        self.chat_memory = ChatMemory(
+            budget_tokens=app_cfg.get('memory_budget_tokens', 2048),
+            count_tokens=make_token_counter(app_cfg.get('memory_tokenizer', 'estimate')),
+            summarizer=LLMSummarizer(lambda: self.config['llm']) if app_cfg.get('memory_summarize', True) else None,
+            keep_recent_turns=app_cfg.get('memory_keep_recent_turns', 2),
+        )
+
+        # 合成语音磁盘缓存：相同声音配置下重复出现的句子直接复用已合成的音频
+        self.speech_cache = None
+        if app_cfg.get('enable_speech_cache', True):
+            try:
+                cache_mb = app_cfg.get('speech_cache_mb', 256)
+                self.speech_cache = SpeechCache(SPEECH_CACHE_DIR, max_bytes=cache_mb * 1024 * 1024)
+            except Exception as e:
+                print(f"[Warning] 语音缓存初始化失败: {e}")
+
+        # 流式放音设备：由声卡回调驱动句间无缝播放，并汇报每句真实的开始/结束时刻
+        self.audio_sink = create_audio_sink(
+            audio_backend or app_cfg.get('audio_backend', 'auto'),
+            sample_rate=app_cfg.get('audio_sample_rate'),
+            on_started=lambda key: self.loop.post(self._on_playback_started, *key),
+            on_finished=lambda key: self.loop.post(self._on_playback_finished, *key),
+            path=audio_output_file or app_cfg.get('audio_output_file') or None
+        )
+
+        # 本轮放音队列状态（仅在事件循环线程中读写）
+        self.synthesized_audio = {}      # 已合成的单句 {index: (audio, text)}
+        self.next_play_index = 0         # 顺序送入放音设备的索引
+        self.playing_sentences = {}      # 已送入设备尚未播完的句子 {index: (text, duration_ms)}
+        self.play_generation = 0         # 播放代次，打断时递增以作废残留的旧事件
+        self.sentence_count = 0          # 本轮已切出的句子数
+        self.reply_text = None           # 本轮文本生成完毕后的全文
+        self._reply_tts = False
+        self._reply_done = True
+        self._generation_lock = threading.Lock()
+
+        self.llm_worker = None
+        self.tts_queue_worker = None
+        self.prerender_worker = None
+        self.warmup_worker = None
+
+        if voice_dir:
+            self.set_voice(voice_dir)
+        self.loop.start()
+
+    # ---------- 声音配置 ----------
+
+    def set_voice(self, voice_dir):
+        """载入声音角色目录下的 profile.json"""
+        v_prof = load_json(os.path.join(voice_dir, "profile.json")) or {}
+        voice_profile = v_prof.get('tts', {})
+        voice_profile['_base_path'] = voice_dir
+        self.voice_profile = voice_profile
+        self.voice_full_profile = v_prof
+
+    def get_voice_mode(self):
+        """读取发音配置文件参数，保持平滑向后兼容"""
+        voice_mode = self.voice_full_profile.get('voice_mode')
+        if not voice_mode:
+            rvc_enable = self.voice_full_profile.get('rvc', {}).get('enable', False)
+            voice_mode = 'rvc' if rvc_enable else 'gpt_sovits'
+        return voice_mode
+
+    def create_tts_queue_worker(self, voice_mode, signals):
+        """按当前声音配置构建 TTS 队列合成器（对话播放与固定语句预渲染共用）"""
+        rvc_cfg = self.voice_full_profile.get('rvc', {})
+        ref_audio = self.voice_profile.get('ref_audio')
+        voice_base_path = self.voice_profile.get('_base_path')
+        prompt_text = self.voice_profile.get('prompt_text', '')
+        prompt_lang = self.voice_profile.get('prompt_lang', 'zh')
+        text_lang = self.voice_profile.get('text_lang', 'zh')
+
+        # 加载 GPT-SoVITS 专属推理模型与参数
+        gsv_cfg = self.voice_full_profile.get('gpt_sovits', {})
+        gpt_ckpt = gsv_cfg.get('ckpt', '')
+        sovits_pth = gsv_cfg.get('pth', '')
+        gpt_version = gsv_cfg.get('version', 'v2')
+        temperature = gsv_cfg.get('temperature', 0.4)
+
+        gpt_ckpt_abs = os.path.join(voice_base_path, gpt_ckpt) if gpt_ckpt else ""
+        sovits_pth_abs = os.path.join(voice_base_path, sovits_pth) if sovits_pth else ""
+        ref_audio_abs = os.path.join(voice_base_path, ref_audio) if ref_audio else ""
+
+        # 提取 RVC 参数与 Hubert 基础特征模型文件绝对路径
+        rvc_pth = rvc_cfg.get('pth', '')
+        rvc_index = rvc_cfg.get('index', '')
+        f0_up_key = rvc_cfg.get('f0_up_key', 0)
+        f0_method = rvc_cfg.get('f0_method', 'harvest')
+        index_rate = rvc_cfg.get('index_rate', 0.75)
+        rms_mix_rate = rvc_cfg.get('rms_mix_rate', 0.25)
+        protect = rvc_cfg.get('protect', 0.33)
+
+        hubert_path = os.path.join(BASE_DIR, "resources", "models", "hubert_base_state.pt")
+
+        return TTSQueueWorker(
+            enable_tts=True,
+            signals=signals,
+            voice_mode=voice_mode,
+            ref_audio_path=ref_audio_abs,
+            prompt_text=prompt_text,
+            prompt_lang=prompt_lang,
+            text_lang=text_lang,
+            gpt_ckpt_path=gpt_ckpt_abs,
+            sovits_pth_path=sovits_pth_abs,
+            gpt_sovits_version=gpt_version,
+            voice_base_path=voice_base_path,
+            rvc_pth=rvc_pth,
+            rvc_index=rvc_index,
+            hubert_path=hubert_path,
+            f0_up_key=f0_up_key,
+            f0_method=f0_method,
+            index_rate=index_rate,
+            rms_mix_rate=rms_mix_rate,
+            protect=protect,
+            temperature=temperature,
+            dump_audio=self.config['app'].get('debug_dump_audio', False),
+            streaming=gsv_cfg.get('streaming', True),
+            speech_cache=self.speech_cache,
+            batch_sentences=gsv_cfg.get('batch_sentences', 4),
+            prompt_cache_dir=os.path.join(voice_base_path, "prompt_cache") if voice_base_path else None,
+            text_feature_spill_dir=TEXT_FEATURE_CACHE_DIR if self.config['app'].get('text_feature_cache_spill', False) else None,
+            gpt_sovits_engine=gsv_cfg.get('engine', 'torch'),
+            onnx_dir=os.path.join(voice_base_path, "onnx") if voice_base_path else None,
+            synthesizer_cache_mb=self.config['app'].get('gpt_sovits_cache_mb', 1024),
+            int8_cache_dir=INT8_MODEL_CACHE_DIR if self.config['app'].get('int8_inference', False) else None
+        )
+
+    # ---------- 对话主流程 ----------
+
+    def process_chat(self, text):
+        """
+        用户提问入口，任意线程均可调用：立即作废上一轮的播放，其余步骤投递到事件循环线程中执行。
+        返回本轮的播放代次，reply_started / playback_* / reply_finished 事件均携带该代次。
+        """
+        with self._generation_lock:
+            self.play_generation += 1
+            generation = self.play_generation
+        self.audio_sink.stop()
+        self.loop.post(self._start_reply, generation, text)
+        return generation
+
+    def interrupt(self):
+        """打断当前回复（停止放音并中止生成与合成），不开始新一轮"""
+        with self._generation_lock:
+            self.play_generation += 1
+        self.audio_sink.stop()
+        self.loop.post(self._interrupt)
+
+    def _interrupt(self):
+        self._abort_workers()
+        self._reply_done = True
+
+    def is_speaking(self):
+        return bool(self.playing_sentences)
+
+    def _abort_workers(self):
+        if self.llm_worker and self.llm_worker.is_alive():
+            self.llm_worker.abort()
+        if self.tts_queue_worker and self.tts_queue_worker.is_alive():
+            self.tts_queue_worker.abort()
+        # 对话优先：中止后台预渲染，把推理资源让给本轮合成
+        if self.prerender_worker:
+            self.prerender_worker.abort()
+            self.prerender_worker = None
+
+    def _worker_signals(self, generation):
+        """为本轮的工作线程创建事件总线：回调投递到事件循环线程并绑定代次，被打断的旧一轮残留事件直接丢弃"""
+        signals = EventBus(WORKER_EVENTS, dispatch=self.loop.post)
+        signals.chat_chunk.connect(lambda chunk: self._on_chat_chunk(generation, chunk))
+        signals.sentence_ready.connect(lambda index, text: self._on_sentence_ready(generation, index, text))
+        signals.chat_finished.connect(lambda text: self._on_chat_finished(generation, text))
+        signals.tts_sentence_finished.connect(
+            lambda index, audio, text: self._on_tts_sentence_finished(generation, index, audio, text))
+        return signals
+
+    def _start_reply(self, generation, text):
+        if generation != self.play_generation:
+            return  # 尚未开始就已被更新的提问取代
+
+        # 1. 中止仍在运行的 LLM / TTS 工作线程并清理上一轮的临时音频
+        self._abort_workers()
+        cleanup_temp_audios()
+
+        # 2. 初始化本轮放音队列状态
+        self.synthesized_audio.clear()
+        self.next_play_index = 0
+        self.playing_sentences.clear()
+        self.sentence_count = 0
+        self.reply_text = None
+        self._reply_done = False
+        self.events.reply_started.emit(generation)
+
+        # 3. 按 token 预算取出人设提示词（含滚动摘要）与历史上下文，再把本轮提问记入记忆
+        prompt, history = self.chat_memory.build_context(self.system_prompt, text)
+        self.chat_memory.add("user", text)
+
+        llm_cfg = self.config['llm']
+        voice_mode = self.get_voice_mode()
+        signals = self._worker_signals(generation)
+
+        # 4. 启动流式大语言模型 Worker，开启 TTS 时按发音模式选择分句策略以缩短首句出声延迟
+        self._reply_tts = self.config['app'].get('enable_tts', True)
+        splitter_policy = get_splitter_policy(voice_mode, self.config['app'].get('splitter')) if self._reply_tts else None
+        self.llm_worker = LLMWorker(text, prompt, history, llm_cfg.get('api_key', ''), llm_cfg.get('base_url', ''),
+                                    llm_cfg.get('model', ''), signals, splitter_policy=splitter_policy)
+        self.llm_worker.start()
+
+        # 5. 开启 TTS 语音合成时并行拉起顺序 TTS 队列合成器
+        self.tts_queue_worker = None
+        if self._reply_tts:
+            self.tts_queue_worker = self.create_tts_queue_worker(voice_mode, signals)
+            self.tts_queue_worker.start()
+
+    def _on_chat_chunk(self, generation, chunk):
+        if generation == self.play_generation:
+            self.events.chat_chunk.emit(chunk)
+
+    def _on_sentence_ready(self, generation, index, text):
+        """分句就绪后推送给后台 TTS 队列合成线程"""
+        if generation != self.play_generation:
+            return
+        self.sentence_count = max(self.sentence_count, index + 1)
+        self.events.sentence_ready.emit(index, text)
+        if self.tts_queue_worker and self.tts_queue_worker.is_alive():
+            self.tts_queue_worker.add_task(index, text)
+
+    def _on_chat_finished(self, generation, text):
+        """流式大模型生成全文本结束，保存对话历史"""
+        if generation != self.play_generation:
+            return
+        self.reply_text = text
+        self.chat_memory.add("assistant", text)
+        self.events.chat_finished.emit(text)
+        self._maybe_finish_reply()
+
+    def _on_tts_sentence_finished(self, generation, index, audio, text):
+        """单句音频合成完毕，载入缓存并触发队列放音"""
+        if generation != self.play_generation:
+            return
+        # 合成出错时存空占位，防止索引缺失卡死播放链
+        self.synthesized_audio[index] = (audio, text)
+        self._check_playback_queue()
+        self._maybe_finish_reply()
+
+    def _check_playback_queue(self):
+        """严格按 index 顺序把已合成的句子送入放音设备，句间由设备无缝衔接"""
+        while self.next_play_index in self.synthesized_audio:
+            index = self.next_play_index
+            audio, text = self.synthesized_audio[index]
+            self.next_play_index += 1
+
+            # 若此句音频为空（合成失败），则跳过放音直接送入下一句
+            if audio is None or (not isinstance(audio, AudioStream) and len(audio[1]) == 0):
+                continue
+
+            key = (self.play_generation, index)
+            self.audio_sink.open(key)
+            if isinstance(audio, AudioStream):
+                # 流式音频尚未合成完毕、时长未知，由后台线程边合成边写入设备
+                self.playing_sentences[index] = (text, 0)
+                threading.Thread(target=self._feed_audio_stream, args=(key, audio), daemon=True).start()
+            else:
+                # 由内存中的 PCM 采样数直接计算本句音频的精确时长
+                sr, pcm = audio
+                self.playing_sentences[index] = (text, int(len(pcm) / float(sr) * 1000))
+                self.audio_sink.write(key, sr, pcm)
+                self.audio_sink.end(key)
+
+    def _feed_audio_stream(self, key, stream):
+        """后台写入线程：把流式合成的音频块依次写入放音设备（代次过期则静默退出）"""
+        for sr, pcm in stream:
+            if key[0] != self.play_generation:
+                return
+            self.audio_sink.write(key, sr, pcm)
+        self.audio_sink.end(key)
+
+    def _on_playback_started(self, generation, index):
+        if generation != self.play_generation or index not in self.playing_sentences:
+            return
+        text, duration = self.playing_sentences[index]
+        self.events.playback_started.emit(generation, index, text, duration)
+
+    def _on_playback_finished(self, generation, index):
+        if generation != self.play_generation or index not in self.playing_sentences:
+            return
+        text, _ = self.playing_sentences.pop(index)
+        idle = not self.playing_sentences and self.next_play_index not in self.synthesized_audio
+        self.events.playback_finished.emit(generation, index, text, idle)
+        self._maybe_finish_reply()
+
+    def _maybe_finish_reply(self):
+        """文本生成完毕，且（开启 TTS 时）全部句子都已送入设备并播完后，发布 reply_finished"""
+        if self._reply_done or self.reply_text is None:
+            return
+        if self._reply_tts and (self.next_play_index < self.sentence_count or self.playing_sentences):
+            return
+        self._reply_done = True
+        self.events.reply_finished.emit(self.play_generation, self.reply_text)
+
+    # ---------- 预热与预渲染 ----------
+
+    def start_warmup(self):
+        """启动后台预热线程，按当前发音模式提前载入 torch 与推理模型"""
+        self.loop.post(self._start_warmup)
+
+    def _start_warmup(self):
+        voice_base_path = self.voice_profile.get('_base_path') or ""
+        gsv_cfg = self.voice_full_profile.get('gpt_sovits', {})
+        rvc_cfg = self.voice_full_profile.get('rvc', {})
+        gpt_ckpt = gsv_cfg.get('ckpt', '')
+        sovits_pth = gsv_cfg.get('pth', '')
+        rvc_pth = rvc_cfg.get('pth', '')
+
+        signals = EventBus(WORKER_EVENTS, dispatch=self.loop.post)
+        signals.warmup_progress.connect(self.events.warmup_progress.emit)
+        signals.warmup_finished.connect(self._on_warmup_finished)
+        self.warmup_worker = WarmupWorker(
+            signals,
+            voice_mode=self.get_voice_mode(),
+            gpt_ckpt_path=os.path.join(voice_base_path, gpt_ckpt) if gpt_ckpt else "",
+            sovits_pth_path=os.path.join(voice_base_path, sovits_pth) if sovits_pth else "",
+            gpt_sovits_version=gsv_cfg.get('version', 'v2'),
+            rvc_pth_path=os.path.join(voice_base_path, rvc_pth) if rvc_pth else "",
+            hubert_path=os.path.join(BASE_DIR, "resources", "models", "hubert_base_state.pt"),
+            gpt_sovits_engine=gsv_cfg.get('engine', 'torch'),
+            onnx_dir=os.path.join(voice_base_path, "onnx"),
+            synthesizer_cache_mb=self.config['app'].get('gpt_sovits_cache_mb', 1024),
+            int8_cache_dir=INT8_MODEL_CACHE_DIR if self.config['app'].get('int8_inference', False) else None
+        )
+        self.warmup_worker.start()
+
+    def _on_warmup_finished(self):
+        """预热完成，按需接着预渲染固定语句"""
+        self.warmup_worker = None
+        chatting = self.tts_queue_worker is not None and self.tts_queue_worker.is_alive()
+        if self.config['app'].get('prerender_phrases', False) and self.prerender_worker is None and not chatting:
+            self._start_prerender()
+        self.events.warmup_finished.emit()
+
+    def start_prerender(self):
+        """
+        在后台线程中把 random_talk 固定语句合成进语音缓存，之后由 speak_phrase 直接播放。
+        thinking_talk 只在回复进行中以气泡显示、不发声，因此不预渲染。
+        """
+        self.loop.post(self._start_prerender)
+
+    def _start_prerender(self):
+        if self.speech_cache is None or not self.config['app'].get('enable_tts', True):
+            return
+        phrases = self.config.get('interaction', {}).get('random_talk', [])
+        if not phrases:
+            return
+        self.prerender_worker = self.create_tts_queue_worker(self.get_voice_mode(), EventBus(WORKER_EVENTS))
+        threading.Thread(target=self.prerender_worker.prerender, args=(phrases,), daemon=True).start()
+
+    def speak_phrase(self, text):
+        """
+        任意线程均可调用：空闲时（无进行中的回复、设备未在放音）用语音缓存中预渲染好的音频说出固定语句。
+        未命中缓存时静默跳过，不临时合成，以免与随后的对话争抢推理资源。
+        """
+        self.loop.post(self._speak_phrase, text)
+
+    def _speak_phrase(self, text):
+        if self.speech_cache is None or not self.config['app'].get('enable_tts', True):
+            return
+        if not self._reply_done or self.playing_sentences:
+            return
+        worker = self.create_tts_queue_worker(self.get_voice_mode(), EventBus(WORKER_EVENTS))
+        clean_text = TextCleaner.clean(text)
+        if not clean_text:
+            return
+        audio = self.speech_cache.get(self.speech_cache.make_key(worker.profile_hash, clean_text))
+        if audio is None:
+            return
+        # 固定语句不进入放音队列（index 为 -1，设备回调会被忽略），新一轮对话的 process_chat 会将其打断
+        key = (self.play_generation, -1)
+        self.audio_sink.open(key)
+        self.audio_sink.write(key, *audio)
+        self.audio_sink.end(key)
+
+    def close(self):
+        """安全释放所有后台工作线程、放音设备与事件循环"""
+        with self._generation_lock:
+            self.play_generation += 1
+        self.audio_sink.close()
+        for worker in (self.llm_worker, self.tts_queue_worker, self.prerender_worker, self.warmup_worker):
+            if worker is not None:
+                worker.abort()
+        self.loop.stop()
+        cleanup_temp_audios()
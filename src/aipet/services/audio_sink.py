@@ -0,0 +1,270 @@
+import threading
+import time
+import wave
+from collections import OrderedDict, deque
+from math import gcd
+
+import numpy as np
+
+
+def resample_pcm16(pcm, sr_from, sr_to):
+    """将 int16 单声道 PCM 重采样到放音设备的采样率（多相滤波，整数比例）"""
+    if sr_from == sr_to or len(pcm) == 0:
+        return pcm
+    from scipy.signal import resample_poly
+    g = gcd(int(sr_from), int(sr_to))
+    out = resample_poly(pcm.astype(np.float32), int(sr_to) // g, int(sr_from) // g)
+    return np.clip(out, -32768, 32767).astype(np.int16)
+
+
+class _Segment:
+    """放音队列中的一段音频（通常对应一句话），可分多次写入 PCM 块"""
+    __slots__ = ("key", "chunks", "offset", "ended", "started", "played")
+
+    def __init__(self, key):
+        self.key = key
+        self.chunks = deque()
+        self.offset = 0          # 队首块已读取的采样数
+        self.ended = False       # 生产方已声明写入完毕
+        self.started = False     # 已送出第一个采样
+        self.played = 0          # 本段已送出的采样总数
+
+
+class AudioSink:
+    """
+    回调驱动的流式放音基类。
+    按 open() 的先后顺序依次播放各段音频，段与段之间无缝衔接；某段尚未写完而数据耗尽时输出静音等待，不会越过它播放后面的段。
+    由声卡（或模拟时钟）拉取数据时触发 on_started(key) / on_finished(key)，回调运行在放音线程中，调用方需自行切回 UI 线程（如发送 Qt 信号）。
+    """
+
+    def __init__(self, sample_rate=48000, block_size=1024, on_started=None, on_finished=None):
+        self.sample_rate = int(sample_rate)
+        self.block_size = block_size
+        self.on_started = on_started
+        self.on_finished = on_finished
+        self._segments = OrderedDict()
+        self._lock = threading.Lock()
+        self._frames_played = 0
+        self._current = None
+
+    # ---------------- 生产方接口 ----------------
+
+    def open(self, key):
+        """登记一段新音频，播放顺序即 open 的调用顺序"""
+        with self._lock:
+            self._segments[key] = _Segment(key)
+
+    def write(self, key, sr, pcm):
+        """向已登记的段追加 PCM 块；段已被 stop() 丢弃时静默忽略"""
+        pcm = resample_pcm16(np.asarray(pcm, dtype=np.int16).reshape(-1), sr, self.sample_rate)
+        with self._lock:
+            seg = self._segments.get(key)
+            if seg is not None and len(pcm) > 0:
+                seg.chunks.append(pcm)
+        self._wake()
+
+    def end(self, key):
+        """声明该段写入完毕，播放到末尾时触发 on_finished"""
+        with self._lock:
+            seg = self._segments.get(key)
+            if seg is not None:
+                seg.ended = True
+        self._wake()
+
+    def play(self, key, sr, pcm):
+        """一次性播放整段音频的便捷写法"""
+        self.open(key)
+        self.write(key, sr, pcm)
+        self.end(key)
+
+    def stop(self):
+        """立即清空所有待播放的段（不会再触发这些段的事件）"""
+        with self._lock:
+            self._segments.clear()
+            self._current = None
+
+    # ---------------- 播放状态 ----------------
+
+    @property
+    def played_seconds(self):
+        """自打开设备以来实际送出的有效音频总时长（秒）"""
+        return self._frames_played / float(self.sample_rate)
+
+    def position(self):
+        """当前正在播放的段及其已播放时长：(key, 秒)，空闲时返回 (None, 0.0)"""
+        with self._lock:
+            seg = self._current
+            if seg is None:
+                return None, 0.0
+            return seg.key, seg.played / float(self.sample_rate)
+
+    def is_idle(self):
+        with self._lock:
+            return not self._segments
+
+    # ---------------- 消费方（放音线程） ----------------
+
+    def _read(self, frames):
+        """从队列拉取 frames 个采样，不足部分补静音；返回 (int16 数组, 有效采样数)"""
+        out = np.zeros(frames, dtype=np.int16)
+        filled = 0
+        events = []
+        with self._lock:
+            while filled < frames and self._segments:
+                seg = next(iter(self._segments.values()))
+                if not seg.chunks:
+                    if seg.ended:
+                        # 本段播放完毕，弹出并进入下一段
+                        self._segments.popitem(last=False)
+                        if self._current is seg:
+                            self._current = None
+                        events.append((self.on_finished, seg.key))
+                        continue
+                    # 数据尚未到达：输出静音等待，保持段顺序
+                    break
+                if not seg.started:
+                    seg.started = True
+                    self._current = seg
+                    events.append((self.on_started, seg.key))
+                chunk = seg.chunks[0]
+                n = min(frames - filled, len(chunk) - seg.offset)
+                out[filled:filled + n] = chunk[seg.offset:seg.offset + n]
+                filled += n
+                seg.offset += n
+                seg.played += n
+                if seg.offset >= len(chunk):
+                    seg.chunks.popleft()
+                    seg.offset = 0
+            self._frames_played += filled
+        for callback, key in events:
+            if callback is not None:
+                try:
+                    callback(key)
+                except Exception as e:
+                    print(f"[AudioSink] 事件回调异常: {e}")
+        return out, filled
+
+    def _wake(self):
+        pass
+
+    def start(self):
+        raise NotImplementedError
+
+    def close(self):
+        self.stop()
+
+
+class SoundDeviceSink(AudioSink):
+    """基于 sounddevice (PortAudio) 的实机放音后端，Windows / macOS / Linux 通用"""
+
+    def __init__(self, sample_rate=None, block_size=1024, on_started=None, on_finished=None, device=None):
+        import sounddevice as sd
+        self._sd = sd
+        if sample_rate is None:
+            sample_rate = int(sd.query_devices(device, kind='output')['default_samplerate'])
+        super().__init__(sample_rate, block_size, on_started, on_finished)
+        self.device = device
+        self._stream = None
+
+    def _callback(self, outdata, frames, time_info, status):
+        data, _ = self._read(frames)
+        outdata[:, 0] = data
+
+    def start(self):
+        self._stream = self._sd.OutputStream(
+            samplerate=self.sample_rate, blocksize=self.block_size, device=self.device,
+            channels=1, dtype='int16', callback=self._callback
+        )
+        self._stream.start()
+
+    def close(self):
+        super().close()
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+
+
+class NullSink(AudioSink):
+    """
+    无声卡后端：由后台线程按实时速率模拟声卡拉取数据，事件时序与实机一致。
+    指定 path 时把实际送出的音频写入 WAV 文件，便于无头 Linux 环境下检查输出。
+    """
+
+    def __init__(self, sample_rate=48000, block_size=1024, on_started=None, on_finished=None, path=None, realtime=True):
+        super().__init__(sample_rate or 48000, block_size, on_started, on_finished)
+        self.path = path
+        self.realtime = realtime
+        self._wav = None
+        self._running = False
+        self._has_data = threading.Event()
+        self._thread = None
+
+    def _wake(self):
+        self._has_data.set()
+
+    def _run(self):
+        block_time = self.block_size / float(self.sample_rate)
+        next_tick = time.monotonic()
+        while self._running:
+            if self.is_idle():
+                # 空闲时挂起，避免空转占用 CPU
+                self._has_data.wait(0.5)
+                self._has_data.clear()
+                next_tick = time.monotonic()
+                continue
+            data, filled = self._read(self.block_size)
+            if self._wav is not None and filled:
+                self._wav.writeframes(data[:filled].tobytes())
+            if self.realtime:
+                next_tick += block_time
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def start(self):
+        if self.path:
+            self._wav = wave.open(self.path, 'wb')
+            self._wav.setnchannels(1)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(self.sample_rate)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="NullAudioSink", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        super().close()
+        self._running = False
+        self._has_data.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+def create_audio_sink(backend="auto", sample_rate=None, on_started=None, on_finished=None, path=None):
+    """
+    按配置创建并启动放音后端：
+      - "sounddevice"：实机放音
+      - "null"：无声卡模拟（可配合 path 写出 WAV）
+      - "auto"：优先 sounddevice，不可用（未安装或无输出设备）时回退到 null
+    """
+    if backend in ("auto", "sounddevice"):
+        try:
+            sink = SoundDeviceSink(sample_rate, on_started=on_started, on_finished=on_finished)
+            sink.start()
+            print(f"[AudioSink] 使用 sounddevice 放音后端 ({sink.sample_rate} Hz)")
+            return sink
+        except Exception as e:
+            if backend == "sounddevice":
+                raise
+            print(f"[AudioSink] sounddevice 不可用，回退到静音后端: {e}")
+    sink = NullSink(sample_rate, on_started=on_started, on_finished=on_finished, path=path)
+    sink.start()
+    print(f"[AudioSink] 使用 null 放音后端 ({sink.sample_rate} Hz)" + (f"，输出写入 {path}" if path else ""))
+    return sink
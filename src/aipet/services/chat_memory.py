@@ -0,0 +1,191 @@
+import re
+import threading
+
+# 每条消息的格式开销（role 标记与分隔符），OpenAI 系聊天模板约为 3~4 个 token
+MESSAGE_OVERHEAD_TOKENS = 4
+# 历史占用超过预算的该比例时，在后台把较早的轮次折叠进滚动摘要
+SUMMARIZE_RATIO = 0.75
+SUMMARY_HEADER = "【此前对话的摘要】"
+SUMMARY_INSTRUCTION = (
+    "请把以下对话内容压缩成一段简洁的中文摘要，保留用户的身份信息、偏好、约定的事项和尚未解决的问题，"
+    "省略寒暄与重复内容，只输出摘要本身。"
+)
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+def estimate_tokens(text):
+    """无分词器时的 token 估算：中日韩字符与全角标点约 1 字 1 token，其余字符约 4 个 1 token"""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def make_token_counter(spec="estimate"):
+    """
+    按配置构造 token 计数函数 text -> int：
+        "estimate"：按字符类别估算（默认，无额外依赖）
+        "tiktoken" / "tiktoken:<编码名>"：使用 tiktoken（缺省 cl100k_base）
+        "hf:<模型名或目录>"：使用 transformers 的 AutoTokenizer，可与所用模型的分词器保持一致
+    所需库缺失或载入失败时退回估算。
+    """
+    spec = spec or "estimate"
+    try:
+        if spec.startswith("tiktoken"):
+            import tiktoken
+            encoding = tiktoken.get_encoding(spec.partition(":")[2] or "cl100k_base")
+            return lambda text: len(encoding.encode(text, disallowed_special=())) if text else 0
+        if spec.startswith("hf:"):
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(spec[3:])
+            return lambda text: len(tokenizer.encode(text, add_special_tokens=False)) if text else 0
+    except Exception as e:
+        print(f"[Memory] 分词器 {spec} 载入失败，改用字符估算: {e}")
+    return estimate_tokens
+
+
+class LLMSummarizer:
+    """用当前配置的大模型（非流式调用）生成滚动摘要；get_llm_config 在每次调用时取 config['llm']，设置修改后立即生效"""
+
+    def __init__(self, get_llm_config, timeout=60):
+        self.get_llm_config = get_llm_config
+        self.timeout = timeout
+
+    def __call__(self, previous_summary, messages):
+        from aipet.services.llm_service import get_session, ThinkTagFilter
+
+        lines = []
+        if previous_summary:
+            lines.append(f"{SUMMARY_HEADER}\n{previous_summary}")
+        for message in messages:
+            speaker = "用户" if message["role"] == "user" else "助手"
+            lines.append(f"{speaker}：{message['content']}")
+
+        cfg = self.get_llm_config()
+        r = get_session().post(
+            cfg.get('base_url', ''),
+            headers={"Authorization": f"Bearer {cfg.get('api_key', '')}"},
+            json={
+                "model": cfg.get('model', ''),
+                "messages": [
+                    {"role": "system", "content": SUMMARY_INSTRUCTION},
+                    {"role": "user", "content": "\n".join(lines)},
+                ],
+                "stream": False,
+            },
+            timeout=self.timeout,
+            proxies={"http": None, "https": None},
+        )
+        r.raise_for_status()
+        content = r.json()['choices'][0]['message']['content'] or ""
+        # 推理模型的回复可能带有 <think> 思考内容
+        think_filter = ThinkTagFilter()
+        return (think_filter.feed(content) + think_filter.flush()).strip()
+
+
+class ChatMemory:
+    """
+    按 token 预算管理的对话记忆：最近的轮次原文保留，较早的轮次由后台线程折叠进滚动摘要。
+
+    发给模型的上下文为 [system: 人设提示词 + 摘要] + 历史轮次 + 本轮提问。两次摘要之间历史只追加不滑动，
+    上一轮请求的消息序列始终是下一轮的前缀，服务端的前缀缓存 (prompt caching) 可以命中；
+    摘要只在后台折叠完成时整体更新一次，更新前后 system 部分逐字节不变。
+    摘要尚未完成而历史已超出预算时，临时从最早的轮次开始截掉（不修改记忆本身）。
+    """
+
+    def __init__(self, budget_tokens=2048, count_tokens=None, summarizer=None, keep_recent_turns=2):
+        self.budget_tokens = budget_tokens
+        self.count_tokens = count_tokens or estimate_tokens
+        self.summarizer = summarizer
+        self.keep_recent_turns = keep_recent_turns
+        self.summary = ""
+        self._summary_tokens = 0
+        self._messages = []   # [(消息, token 数)]，仅 user / assistant
+        self._dropped = 0     # 已折叠进摘要的消息数，用于把后台结果对应到绝对位置
+        self._epoch = 0       # clear() 时递增，作废仍在进行的摘要
+        self._summarizing = False
+        self._lock = threading.Lock()
+
+    def _message_tokens(self, content):
+        return self.count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+    def system_content(self, system_prompt):
+        """人设提示词与摘要拼成的 system 消息内容；摘要不变时逐字节稳定"""
+        with self._lock:
+            summary = self.summary
+        if not summary:
+            return system_prompt
+        return f"{system_prompt}\n\n{SUMMARY_HEADER}\n{summary}"
+
+    def add(self, role, content):
+        """追加一条消息；一轮回复完成后若超过摘要阈值，在后台启动折叠，不与本轮的流式请求争抢"""
+        tokens = self._message_tokens(content)
+        with self._lock:
+            self._messages.append(({"role": role, "content": content}, tokens))
+        if role == "assistant":
+            self.maybe_summarize()
+
+    def clear(self):
+        with self._lock:
+            self._messages.clear()
+            self.summary = ""
+            self._summary_tokens = 0
+            self._dropped = 0
+            self._epoch += 1
+
+    def history_tokens(self):
+        with self._lock:
+            return self._summary_tokens + sum(tokens for _, tokens in self._messages)
+
+    def build_context(self, system_prompt, user_text):
+        """
+        生成本轮请求的 (system 提示词, 历史消息列表)，本轮提问由调用方追加在最后。
+        历史按预算从最新往回取，整体超出时丢弃最早的轮次；返回后再调用 add() 记录本轮提问。
+        """
+        system = self.system_content(system_prompt)
+        budget = (self.budget_tokens - self._message_tokens(system) - self._message_tokens(user_text))
+        with self._lock:
+            messages = list(self._messages)
+        total = sum(tokens for _, tokens in messages)
+        start = 0
+        while start < len(messages) and total > budget:
+            total -= messages[start][1]
+            start += 1
+        # 不以 assistant 消息开头，避免历史断在半轮中间
+        while start < len(messages) and messages[start][0]["role"] == "assistant":
+            start += 1
+        return system, [dict(message) for message, _ in messages[start:]]
+
+    def maybe_summarize(self):
+        """历史超过预算的 SUMMARIZE_RATIO 时，把最近 keep_recent_turns 轮之前的消息交给后台线程折叠进摘要"""
+        if self.summarizer is None:
+            return
+        with self._lock:
+            total = self._summary_tokens + sum(tokens for _, tokens in self._messages)
+            keep = self.keep_recent_turns * 2
+            if self._summarizing or total <= self.budget_tokens * SUMMARIZE_RATIO or len(self._messages) <= keep:
+                return
+            fold = [message for message, _ in self._messages[:len(self._messages) - keep]]
+            end = self._dropped + len(fold)
+            job = (self._epoch, end, self.summary, fold)
+            self._summarizing = True
+        threading.Thread(target=self._summarize, args=job, daemon=True).start()
+
+    def _summarize(self, epoch, end, previous_summary, fold):
+        try:
+            summary = self.summarizer(previous_summary, fold)
+            summary_tokens = self.count_tokens(summary)
+            print(f"[Memory] 已将 {len(fold)} 条较早的消息折叠进摘要 ({summary_tokens} tokens)")
+        except Exception as e:
+            # 摘要失败时保留原摘要并丢弃这批消息，记忆占用仍受预算约束
+            print(f"[Warning] 对话摘要生成失败，较早的消息将被丢弃: {e}")
+            summary, summary_tokens = previous_summary, self._summary_tokens
+        with self._lock:
+            self._summarizing = False
+            if epoch != self._epoch:
+                return
+            del self._messages[:end - self._dropped]
+            self._dropped = end
+            self.summary = summary
+            self._summary_tokens = summary_tokens
@@ -0,0 +1,109 @@
+"""
+多进程并行的 pyworld.harvest 基频提取。
+harvest 为纯 CPU 串行算法且持有 GIL，长句提取耗时与音频时长成正比；这里在静音处把音频切成若干块，
+分发到进程池中同时提取后按帧拼接。本模块只依赖 numpy 与 pyworld，子进程导入时不会拉起 torch。
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import pyworld
+except ImportError:
+    pyworld = None
+
+# 每块的最短时长（秒）：过短的块进程间调度开销大于并行收益
+MIN_CHUNK_SECONDS = 1.0
+# 在目标切点前后多大范围内（秒）寻找能量最低的帧作为切点
+CUT_SEARCH_SECONDS = 0.25
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def default_workers():
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+def get_pool(workers=None):
+    """惰性创建全局进程池（首次提交任务时才真正启动子进程）"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers or default_workers())
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+def _harvest_chunk(args):
+    """子进程任务：对一块音频执行 harvest + stonemask"""
+    x, fs, f0_floor, f0_ceil, frame_period = args
+    f0, t = pyworld.harvest(x, fs=fs, f0_ceil=f0_ceil, f0_floor=f0_floor, frame_period=frame_period)
+    return pyworld.stonemask(x, f0, t, fs)
+
+
+def split_at_silences(x, hop, parts, min_frames, search_frames):
+    """
+    把音频切成约 parts 块，切点取在每个等分点前后 search_frames 帧内逐帧幅度和最小处。
+    返回以采样点计的边界列表 [0, b1, ..., len(x)]，中间边界均为 hop 的整数倍，使各块的帧网格与整段一致。
+    """
+    n_frames = len(x) // hop
+    step = max(min_frames, n_frames // max(1, parts))
+    if n_frames < 2 * step:
+        return [0, len(x)]
+    energy = np.add.reduceat(np.abs(x[: n_frames * hop]), np.arange(0, n_frames * hop, hop))
+
+    bounds = [0]
+    target = step
+    while target <= n_frames - step // 2:
+        lo = max(bounds[-1] + 1, target - search_frames)
+        hi = min(n_frames - 1, target + search_frames)
+        if lo >= hi:
+            break
+        bounds.append(lo + int(np.argmin(energy[lo:hi])))
+        target = bounds[-1] + step
+    return [b * hop for b in bounds] + [len(x)]
+
+
+def harvest_f0(x, fs, f0_floor, f0_ceil, frame_period, workers=None):
+    """
+    提取整段音频的 harvest 基频，帧数与 pyworld.harvest(x) 一致 (len(x) // hop + 1)。
+    音频不足两块时直接在当前进程提取；进程池不可用时退回串行提取。
+    """
+    if pyworld is None:
+        raise ImportError("pyworld is required for harvest method.")
+    x = np.ascontiguousarray(x, dtype=np.double)
+    hop = int(round(fs * frame_period / 1000))
+    workers = workers or default_workers()
+    bounds = split_at_silences(
+        x, hop, workers,
+        min_frames=int(MIN_CHUNK_SECONDS * fs) // hop,
+        search_frames=int(CUT_SEARCH_SECONDS * fs) // hop,
+    )
+    jobs = [(x[a:b], fs, f0_floor, f0_ceil, frame_period) for a, b in zip(bounds[:-1], bounds[1:])]
+    if len(jobs) == 1 or workers <= 1:
+        return _harvest_chunk((x, fs, f0_floor, f0_ceil, frame_period))
+
+    try:
+        results = list(get_pool(workers).map(_harvest_chunk, jobs))
+    except Exception as e:
+        print(f"[Warning] harvest 进程池执行失败，改为串行提取: {e}")
+        shutdown_pool()
+        results = [_harvest_chunk(job) for job in jobs]
+
+    # 每块各自带一帧末尾帧 (len // hop + 1)，拼接时去掉非末块的最后一帧
+    f0 = np.concatenate([r[:-1] for r in results[:-1]] + [results[-1]])
+    expected = len(x) // hop + 1
+    if len(f0) < expected:
+        f0 = np.pad(f0, (0, expected - len(f0)))
+    return f0[:expected]
@@ -220,6 +220,54 @@ class T2SBlock:
         )
         return x, k_cache, v_cache
 
+    def decode_next_token_static(
+        self,
+        x: torch.Tensor,
+        k_buf: torch.Tensor,
+        v_buf: torch.Tensor,
+        pos: int,
+        torch_sdpa: bool = True,
+    ):
+        q, k, v = F.linear(x, self.qkv_w, self.qkv_b).chunk(3, dim=-1)
+
+        # 原地写入预分配缓存的第 pos 个位置，只对 [0, pos] 的有效长度视图做注意力，省去逐 token 的 torch.cat 拷贝
+        k_buf[:, pos : pos + 1] = k
+        v_buf[:, pos : pos + 1] = v
+
+        batch_size = q.shape[0]
+        q_len = q.shape[1]
+        kv_len = pos + 1
+
+        q = q.view(batch_size, q_len, self.num_heads, -1).transpose(1, 2)
+        k = k_buf[:, :kv_len].view(batch_size, kv_len, self.num_heads, -1).transpose(1, 2)
+        v = v_buf[:, :kv_len].view(batch_size, kv_len, self.num_heads, -1).transpose(1, 2)
+
+        if torch_sdpa:
+            attn = F.scaled_dot_product_attention(q, k, v)
+        else:
+            attn = scaled_dot_product_attention(q, k, v, None)
+
+        attn = attn.transpose(1, 2).reshape(batch_size, q_len, -1)
+        attn = F.linear(attn, self.out_w, self.out_b)
+
+        x = x + attn
+        x = F.layer_norm(
+            x,
+            [self.hidden_dim],
+            self.norm_w1,
+            self.norm_b1,
+            self.norm_eps1,
+        )
+        x = x + self.mlp.forward(x)
+        x = F.layer_norm(
+            x,
+            [self.hidden_dim],
+            self.norm_w2,
+            self.norm_b2,
+            self.norm_eps2,
+        )
+        return x
+
 
 @torch.jit.script
 class T2STransformer:
@@ -256,6 +304,55 @@ class T2STransformer:
             )
         return x, k_cache, v_cache
 
+    def decode_next_token_static(
+        self,
+        x: torch.Tensor,
+        k_buf: List[torch.Tensor],
+        v_buf: List[torch.Tensor],
+        pos: int,
+        torch_sdpa: bool = True,
+    ):
+        for i in range(self.num_blocks):
+            x = self.blocks[i].decode_next_token_static(x, k_buf[i], v_buf[i], pos, torch_sdpa)
+        return x
+
+
+class StaticKVCache:
+    """
+    预分配固定容量的逐层 KV 缓存：解码时原地写入下一个位置，容量不足时按 2 倍几何扩容，
+    取代每生成一个 token 就对每一层执行 torch.cat 带来的 O(n²) 拷贝。
+    """
+
+    def __init__(self, k_cache: List[torch.Tensor], v_cache: List[torch.Tensor], capacity: int):
+        self.length = k_cache[0].shape[1]
+        self.capacity = max(capacity, self.length + 1)
+        self.k = [self._alloc(t, self.capacity) for t in k_cache]
+        self.v = [self._alloc(t, self.capacity) for t in v_cache]
+
+    @staticmethod
+    def _alloc(src: torch.Tensor, capacity: int):
+        buf = src.new_empty((src.shape[0], capacity, src.shape[2]))
+        buf[:, : src.shape[1]] = src
+        return buf
+
+    def reserve(self, length: int):
+        """保证缓存至少可容纳 length 个位置"""
+        if length <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < length:
+            capacity *= 2
+        self.k = [self._alloc(t[:, : self.length], capacity) for t in self.k]
+        self.v = [self._alloc(t[:, : self.length], capacity) for t in self.v]
+        self.capacity = capacity
+
+    def next_position(self) -> int:
+        """占用下一个写入位置并返回其下标"""
+        pos = self.length
+        self.reserve(pos + 1)
+        self.length += 1
+        return pos
+
 
 class Text2SemanticDecoder(nn.Module):
     def __init__(self, config, norm_first=False, top_k=3):
@@ -829,6 +926,9 @@ class Text2SemanticDecoder(nn.Module):
         mute_emb_sim_matrix = kwargs.get("mute_emb_sim_matrix", None)
         chunk_split_thershold = kwargs.get("chunk_split_thershold", 0.3)
         check_token_num = 2
+        # 静态 KV 缓存模式：按 音素数 × 每音素预计语义 token 数 预分配缓存，解码过程中原地写入
+        static_kv_cache = kwargs.get("static_kv_cache", False)
+        kv_tokens_per_phone = kwargs.get("kv_tokens_per_phone", 3.0)
 
 
         x = self.ar_text_embedding(x)
@@ -884,10 +984,21 @@ class Text2SemanticDecoder(nn.Module):
 
         token_counter = 0
         curr_ptr = prefix_len
+        kv = None
+        if static_kv_cache:
+            est_new_tokens = min(1500, int(x_len * kv_tokens_per_phone))
+            y_buf = y.new_empty((y.shape[0], y.shape[1] + est_new_tokens))
+            y_buf[:, : y.shape[1]] = y
+            y_used = y.shape[1]
         for idx in tqdm(range(1500)):
             token_counter+=1
             if xy_attn_mask is not None:
                 xy_dec, k_cache, v_cache = self.t2s_transformer.process_prompt(xy_pos, xy_attn_mask, None)
+                if static_kv_cache:
+                    kv = StaticKVCache(k_cache, v_cache, src_len + est_new_tokens)
+            elif kv is not None:
+                pos = kv.next_position()
+                xy_dec = self.t2s_transformer.decode_next_token_static(xy_pos, kv.k, kv.v, pos)
             else:
                 xy_dec, k_cache, v_cache = self.t2s_transformer.decode_next_token(xy_pos, k_cache, v_cache)
 
@@ -902,7 +1013,14 @@ class Text2SemanticDecoder(nn.Module):
                 logits, y, top_k=top_k, top_p=top_p, repetition_penalty=repetition_penalty, temperature=temperature
             )[0]
 
-            y = torch.concat([y, samples], dim=1)
+            if static_kv_cache:
+                if y_used == y_buf.shape[1]:
+                    y_buf = torch.concat([y_buf, torch.empty_like(y_buf)], dim=1)
+                y_buf[:, y_used : y_used + 1] = samples
+                y_used += 1
+                y = y_buf[:, :y_used]
+            else:
+                y = torch.concat([y, samples], dim=1)
 
             if early_stop_num != -1 and (y.shape[1] - prefix_len) > early_stop_num:
                 print("use early stop num:", early_stop_num)
@@ -183,7 +183,8 @@ class T2SFirstStageDecoder(nn.Module):
 
         y = torch.concat([y, samples], dim=1)
 
-        return y, cache["k"], cache["v"], cache["y_emb"], x_example
+        # 额外输出首步 logits，便于在图外按推理时的温度 / top_k / top_p 重新采样
+        return y, cache["k"], cache["v"], cache["y_emb"], x_example, logits
 
 
 class T2SStageDecoder(nn.Module):
@@ -319,12 +320,12 @@ class Text2SemanticDecoder(nn.Module):
         prefix_len = prompts.shape[1]
 
         x = self.onnx_encoder(x, bert_feature)
-        y, k, v, y_emb, stage, x_example = self.first_stage_decoder(x, prompts)
+        y, k, v, y_emb, x_example, _ = self.first_stage_decoder(x, prompts)
 
         stop = False
         for idx in range(1, 1500):
-            enco = self.stage_decoder(y, k, v, y_emb, stage, x_example)
-            y, k, v, y_emb, stage, logits, samples = enco
+            enco = self.stage_decoder(y, k, v, y_emb, x_example)
+            y, k, v, y_emb, logits, samples = enco
             if early_stop_num != -1 and (y.shape[1] - prefix_len) > early_stop_num:
                 stop = True
             if torch.argmax(logits, dim=-1)[0] == self.EOS or samples[0, 0] == self.EOS:
@@ -0,0 +1,234 @@
+# 动态 int8 量化版 T2S 解码块：与 t2s_model.T2SBlock 计算一致，只是四个线性层换成量化 Linear 模块。
+# T2SBlock 为 TorchScript 类并直接以 F.linear 使用浮点权重张量，无法就地替换，因此单独实现一份。
+# TorchScript 的 T2STransformer 只接受 List[T2SBlock]，量化块无法放入，故再配一个同接口的纯 Python 解码器，
+# 供 Text2SemanticDecoder 按鸭子类型调用（process_prompt / decode_next_token / decode_next_token_static 签名不变）。
+from typing import List, Optional
+
+import torch
+from torch import nn
+from torch.nn import functional as F
+
+from AR.models.t2s_model import scaled_dot_product_attention
+
+
+class T2SBlockLinears(nn.Module):
+    """单个解码块的四个线性层：qkv 投影、注意力输出投影与前馈网络两层"""
+
+    def __init__(self, hidden_dim: int, ffn_dim: int):
+        super().__init__()
+        self.qkv = nn.Linear(hidden_dim, hidden_dim * 3)
+        self.out = nn.Linear(hidden_dim, hidden_dim)
+        self.fc1 = nn.Linear(hidden_dim, ffn_dim)
+        self.fc2 = nn.Linear(ffn_dim, hidden_dim)
+
+
+class T2SLinears(nn.Module):
+    """全部解码块线性层的容器，作为量化与量化权重缓存的单位"""
+
+    def __init__(self, num_layers: int, hidden_dim: int, ffn_dim: int):
+        super().__init__()
+        self.blocks = nn.ModuleList([T2SBlockLinears(hidden_dim, ffn_dim) for _ in range(num_layers)])
+
+
+def _linears_shape(decoder):
+    return decoder.num_layers, decoder.model_dim, decoder.h.layers[0].linear1.out_features
+
+
+def build_skeleton_linears(decoder) -> T2SLinears:
+    """构造与 decoder 结构一致、未载入权重的线性层容器"""
+    return T2SLinears(*_linears_shape(decoder))
+
+
+@torch.no_grad()
+def build_float_linears(decoder) -> T2SLinears:
+    """从 Text2SemanticDecoder 的 TransformerEncoder 拷出 fp32 线性层权重"""
+    linears = build_skeleton_linears(decoder)
+    for block, layer in zip(linears.blocks, decoder.h.layers):
+        block.qkv.weight.copy_(layer.self_attn.in_proj_weight)
+        block.qkv.bias.copy_(layer.self_attn.in_proj_bias)
+        block.out.weight.copy_(layer.self_attn.out_proj.weight)
+        block.out.bias.copy_(layer.self_attn.out_proj.bias)
+        block.fc1.weight.copy_(layer.linear1.weight)
+        block.fc1.bias.copy_(layer.linear1.bias)
+        block.fc2.weight.copy_(layer.linear2.weight)
+        block.fc2.bias.copy_(layer.linear2.bias)
+    return linears.float()
+
+
+class QuantizedT2SBlock:
+    def __init__(self, num_heads: int, hidden_dim: int, linears: T2SBlockLinears, layer):
+        self.num_heads = num_heads
+        self.hidden_dim = hidden_dim
+        self.qkv = linears.qkv
+        self.out = linears.out
+        self.fc1 = linears.fc1
+        self.fc2 = linears.fc2
+        self.norm_w1 = layer.norm1.weight
+        self.norm_b1 = layer.norm1.bias
+        self.norm_eps1 = layer.norm1.eps
+        self.norm_w2 = layer.norm2.weight
+        self.norm_b2 = layer.norm2.bias
+        self.norm_eps2 = layer.norm2.eps
+
+    def to_mask(self, x: torch.Tensor, padding_mask: Optional[torch.Tensor]):
+        if padding_mask is None:
+            return x
+
+        if padding_mask.dtype == torch.bool:
+            return x.masked_fill(padding_mask, 0)
+        else:
+            return x * padding_mask
+
+    def _attn_out_and_mlp(self, x: torch.Tensor, attn: torch.Tensor):
+        x = x + attn
+        x = F.layer_norm(x, [self.hidden_dim], self.norm_w1, self.norm_b1, self.norm_eps1)
+        x = x + self.fc2(F.relu(self.fc1(x)))
+        x = F.layer_norm(x, [self.hidden_dim], self.norm_w2, self.norm_b2, self.norm_eps2)
+        return x
+
+    def process_prompt(
+        self,
+        x: torch.Tensor,
+        attn_mask: torch.Tensor,
+        padding_mask: Optional[torch.Tensor] = None,
+        torch_sdpa: bool = True,
+    ):
+        q, k, v = self.qkv(self.to_mask(x, padding_mask)).chunk(3, dim=-1)
+
+        batch_size = q.shape[0]
+        q_len = q.shape[1]
+        kv_len = k.shape[1]
+
+        q = self.to_mask(q, padding_mask)
+        k_cache = self.to_mask(k, padding_mask)
+        v_cache = self.to_mask(v, padding_mask)
+
+        q = q.view(batch_size, q_len, self.num_heads, -1).transpose(1, 2)
+        k = k_cache.view(batch_size, kv_len, self.num_heads, -1).transpose(1, 2)
+        v = v_cache.view(batch_size, kv_len, self.num_heads, -1).transpose(1, 2)
+
+        if torch_sdpa:
+            attn = F.scaled_dot_product_attention(q, k, v, ~attn_mask)
+        else:
+            attn = scaled_dot_product_attention(q, k, v, attn_mask)
+
+        attn = attn.transpose(1, 2).reshape(batch_size, q_len, -1)
+        attn = self.out(self.to_mask(attn, padding_mask))
+        return self._attn_out_and_mlp(x, attn), k_cache, v_cache
+
+    def decode_next_token(
+        self,
+        x: torch.Tensor,
+        k_cache: torch.Tensor,
+        v_cache: torch.Tensor,
+        attn_mask: torch.Tensor = None,
+        torch_sdpa: bool = True,
+    ):
+        q, k, v = self.qkv(x).chunk(3, dim=-1)
+
+        k_cache = torch.cat([k_cache, k], dim=1)
+        v_cache = torch.cat([v_cache, v], dim=1)
+
+        batch_size = q.shape[0]
+        q_len = q.shape[1]
+        kv_len = k_cache.shape[1]
+
+        q = q.view(batch_size, q_len, self.num_heads, -1).transpose(1, 2)
+        k = k_cache.view(batch_size, kv_len, self.num_heads, -1).transpose(1, 2)
+        v = v_cache.view(batch_size, kv_len, self.num_heads, -1).transpose(1, 2)
+
+        if torch_sdpa:
+            attn = F.scaled_dot_product_attention(q, k, v, (~attn_mask) if attn_mask is not None else None)
+        else:
+            attn = scaled_dot_product_attention(q, k, v, attn_mask)
+
+        attn = attn.transpose(1, 2).reshape(batch_size, q_len, -1)
+        attn = self.out(attn)
+        return self._attn_out_and_mlp(x, attn), k_cache, v_cache
+
+    def decode_next_token_static(
+        self,
+        x: torch.Tensor,
+        k_buf: torch.Tensor,
+        v_buf: torch.Tensor,
+        pos: int,
+        torch_sdpa: bool = True,
+    ):
+        q, k, v = self.qkv(x).chunk(3, dim=-1)
+
+        k_buf[:, pos : pos + 1] = k
+        v_buf[:, pos : pos + 1] = v
+
+        batch_size = q.shape[0]
+        q_len = q.shape[1]
+        kv_len = pos + 1
+
+        q = q.view(batch_size, q_len, self.num_heads, -1).transpose(1, 2)
+        k = k_buf[:, :kv_len].view(batch_size, kv_len, self.num_heads, -1).transpose(1, 2)
+        v = v_buf[:, :kv_len].view(batch_size, kv_len, self.num_heads, -1).transpose(1, 2)
+
+        if torch_sdpa:
+            attn = F.scaled_dot_product_attention(q, k, v)
+        else:
+            attn = scaled_dot_product_attention(q, k, v, None)
+
+        attn = attn.transpose(1, 2).reshape(batch_size, q_len, -1)
+        attn = self.out(attn)
+        return self._attn_out_and_mlp(x, attn)
+
+
+class QuantizedT2STransformer:
+    """与 t2s_model.T2STransformer 接口一致的纯 Python 解码器，逐层调用 QuantizedT2SBlock"""
+
+    def __init__(self, num_blocks: int, blocks: List[QuantizedT2SBlock], quantized_linears: T2SLinears):
+        self.num_blocks = num_blocks
+        self.blocks = blocks
+        self.quantized_linears = quantized_linears  # 持有量化模块的引用
+
+    def process_prompt(
+        self,
+        x: torch.Tensor,
+        attn_mask: torch.Tensor,
+        padding_mask: Optional[torch.Tensor] = None,
+        torch_sdpa: bool = True,
+    ):
+        k_cache: List[torch.Tensor] = []
+        v_cache: List[torch.Tensor] = []
+        for block in self.blocks:
+            x, k_cache_, v_cache_ = block.process_prompt(x, attn_mask, padding_mask, torch_sdpa)
+            k_cache.append(k_cache_)
+            v_cache.append(v_cache_)
+        return x, k_cache, v_cache
+
+    def decode_next_token(
+        self,
+        x: torch.Tensor,
+        k_cache: List[torch.Tensor],
+        v_cache: List[torch.Tensor],
+        attn_mask: torch.Tensor = None,
+        torch_sdpa: bool = True,
+    ):
+        for i, block in enumerate(self.blocks):
+            x, k_cache[i], v_cache[i] = block.decode_next_token(x, k_cache[i], v_cache[i], attn_mask, torch_sdpa)
+        return x, k_cache, v_cache
+
+    def decode_next_token_static(
+        self,
+        x: torch.Tensor,
+        k_buf: List[torch.Tensor],
+        v_buf: List[torch.Tensor],
+        pos: int,
+        torch_sdpa: bool = True,
+    ):
+        for i, block in enumerate(self.blocks):
+            x = block.decode_next_token_static(x, k_buf[i], v_buf[i], pos, torch_sdpa)
+        return x
+
+
+def build_quantized_transformer(decoder, quantized_linears: T2SLinears) -> QuantizedT2STransformer:
+    """以量化线性层替换 decoder.t2s_transformer 的计算，层归一化参数仍与原模型共享"""
+    blocks = [
+        QuantizedT2SBlock(decoder.num_head, decoder.model_dim, linears, layer)
+        for linears, layer in zip(quantized_linears.blocks, decoder.h.layers)
+    ]
+    return QuantizedT2STransformer(decoder.num_layers, blocks, quantized_linears)
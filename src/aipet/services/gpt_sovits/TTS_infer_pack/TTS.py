@@ -1,8 +1,10 @@
 import gc
+import hashlib
 import math
 import os
 import random
 import sys
+import threading
 import time
 import traceback
 from copy import deepcopy
@@ -35,6 +37,8 @@ from tools.i18n.i18n import I18nAuto, scan_language_list
 from TTS_infer_pack.text_segmentation_method import splits
 from TTS_infer_pack.TextPreprocessor import TextPreprocessor
 from sv import SV
+from aipet.services.weights_store import load_checkpoint, torch_load
+from aipet.services.quantization import load_or_quantize, quantized_cache_path
 
 resample_transform_dict = {}
 
@@ -335,6 +339,8 @@ class TTS_Config:
         self.vits_weights_path = self.configs.get("vits_weights_path", None)
         self.bert_base_path = self.configs.get("bert_base_path", None)
         self.cnhuhbert_base_path = self.configs.get("cnhuhbert_base_path", None)
+        # 非空时在 CPU 上对 T2S 解码块、BERT 与 CNHuBERT 启用动态 int8 量化，量化权重缓存到该目录
+        self.int8_cache_dir = self.configs.get("int8_cache_dir", None) if str(self.device) == "cpu" else None
         self.languages = self.v1_languages if self.version == "v1" else self.v2_languages
 
         self.use_vocoder: bool = False
@@ -418,6 +424,28 @@ class TTS_Config:
         return isinstance(other, TTS_Config) and self.configs_path == other.configs_path
 
 
+# 与角色无关的基础模型 (BERT / CNHuBERT / 说话人验证)，键为 (类别, 路径, 设备, 是否半精度)，
+# 所有 TTS 实例共用同一份权重，切换角色时只载入各自的 T2S 与 SoVITS。
+# 共享模型不可在单个实例上改精度或迁移设备（enable_half_precision / set_device 会影响全部实例）。
+_shared_base_models = {}
+_shared_base_models_lock = threading.Lock()
+
+
+def _get_shared_base_model(key, build):
+    with _shared_base_models_lock:
+        model = _shared_base_models.get(key)
+        if model is None:
+            model = build()
+            _shared_base_models[key] = model
+        return model
+
+
+def shared_base_models() -> dict:
+    """当前已载入的共享基础模型快照：{(类别, 路径, 设备, 是否半精度): 模型}"""
+    with _shared_base_models_lock:
+        return dict(_shared_base_models)
+
+
 class TTS:
     def __init__(self, configs: Union[dict, str, TTS_Config]):
         if isinstance(configs, TTS_Config):
@@ -459,6 +487,7 @@ class TTS:
             "bert_features": None,
             "norm_text": None,
             "aux_ref_audio_paths": [],
+            "sv_emb": None,
         }
 
         self.stop_flag: bool = False
@@ -473,22 +502,84 @@ class TTS:
         self.init_cnhuhbert_weights(self.configs.cnhuhbert_base_path)
         # self.enable_half_precision(self.configs.is_half)
 
+    def _base_model_key(self, kind: str, base_path: str):
+        return (
+            kind,
+            base_path,
+            str(self.configs.device),
+            bool(self.configs.is_half and str(self.configs.device) != "cpu"),
+            bool(self.configs.int8_cache_dir),
+        )
+
     def init_cnhuhbert_weights(self, base_path: str):
-        print(f"Loading CNHuBERT weights from {base_path}")
-        self.cnhuhbert_model = CNHubert(base_path)
-        self.cnhuhbert_model = self.cnhuhbert_model.eval()
-        self.cnhuhbert_model = self.cnhuhbert_model.to(self.configs.device)
-        if self.configs.is_half and str(self.configs.device) != "cpu":
-            self.cnhuhbert_model = self.cnhuhbert_model.half()
+        def build():
+            if self.configs.int8_cache_dir:
+                return self._build_quantized_cnhubert(base_path)
+            print(f"Loading CNHuBERT weights from {base_path}")
+            model = CNHubert(base_path)
+            model = model.eval()
+            model = model.to(self.configs.device)
+            if self.configs.is_half and str(self.configs.device) != "cpu":
+                model = model.half()
+            return model
+
+        self.cnhuhbert_model = _get_shared_base_model(self._base_model_key("cnhubert", base_path), build)
 
     def init_bert_weights(self, base_path: str):
-        print(f"Loading BERT weights from {base_path}")
-        self.bert_tokenizer = AutoTokenizer.from_pretrained(base_path)
-        self.bert_model = AutoModelForMaskedLM.from_pretrained(base_path)
-        self.bert_model = self.bert_model.eval()
-        self.bert_model = self.bert_model.to(self.configs.device)
-        if self.configs.is_half and str(self.configs.device) != "cpu":
-            self.bert_model = self.bert_model.half()
+        def build():
+            if self.configs.int8_cache_dir:
+                return AutoTokenizer.from_pretrained(base_path), self._build_quantized_bert(base_path)
+            print(f"Loading BERT weights from {base_path}")
+            tokenizer = AutoTokenizer.from_pretrained(base_path)
+            model = AutoModelForMaskedLM.from_pretrained(base_path)
+            model = model.eval()
+            model = model.to(self.configs.device)
+            if self.configs.is_half and str(self.configs.device) != "cpu":
+                model = model.half()
+            return tokenizer, model
+
+        self.bert_tokenizer, self.bert_model = _get_shared_base_model(self._base_model_key("bert", base_path), build)
+
+    def _build_quantized_bert(self, base_path: str):
+        from transformers import AutoConfig
+        from transformers.modeling_utils import no_init_weights
+
+        def build_float():
+            print(f"Loading BERT weights from {base_path}")
+            return AutoModelForMaskedLM.from_pretrained(base_path).float()
+
+        def build_skeleton():
+            with no_init_weights():
+                return AutoModelForMaskedLM.from_config(AutoConfig.from_pretrained(base_path))
+
+        cache_path = quantized_cache_path(self.configs.int8_cache_dir, "bert", base_path)
+        return load_or_quantize(cache_path, build_float, build_skeleton)
+
+    def _build_quantized_cnhubert(self, base_path: str):
+        from transformers import AutoConfig, HubertModel
+        from transformers.modeling_utils import no_init_weights
+
+        def build_float():
+            print(f"Loading CNHuBERT weights from {base_path}")
+            return CNHubert(base_path).float()
+
+        def build_skeleton():
+            with no_init_weights():
+                return CNHubert(base_path, model=HubertModel(AutoConfig.from_pretrained(base_path)))
+
+        cache_path = quantized_cache_path(self.configs.int8_cache_dir, "cnhubert", base_path)
+        return load_or_quantize(cache_path, build_float, build_skeleton)
+
+    def _quantize_t2s_transformer(self, weights_path: str):
+        """以动态 int8 量化的线性层重建 T2S 自回归解码块（嵌入、预测头与层归一化仍为 fp32）"""
+        from AR.models.t2s_quantized import build_float_linears, build_quantized_transformer, build_skeleton_linears
+
+        decoder = self.t2s_model.model
+        cache_path = quantized_cache_path(self.configs.int8_cache_dir, "t2s", weights_path)
+        linears = load_or_quantize(
+            cache_path, lambda: build_float_linears(decoder), lambda: build_skeleton_linears(decoder)
+        )
+        decoder.t2s_transformer = build_quantized_transformer(decoder, linears)
 
     def init_vits_weights(self, weights_path: str):
         self.configs.vits_weights_path = weights_path
@@ -502,7 +593,8 @@ class TTS:
             raise FileExistsError(info)
 
         # dict_s2 = torch.load(weights_path, map_location=self.configs.device,weights_only=False)
-        dict_s2 = load_sovits_new(weights_path)
+        # 已转换为 safetensors 时以内存映射载入，参数直接引用映射页 (assign=True)
+        dict_s2, mmapped = load_checkpoint(weights_path, load_sovits_new)
         hps = dict_s2["config"]
         hps["model"]["semantic_frame_rate"] = "25hz"
         if "enc_p.text_embedding.weight" not in dict_s2["weight"]:
@@ -560,7 +652,7 @@ class TTS:
 
         if if_lora_v3 == False:
             print(
-                f"Loading VITS weights from {weights_path}. {vits_model.load_state_dict(dict_s2['weight'], strict=False)}"
+                f"Loading VITS weights from {weights_path}. {vits_model.load_state_dict(dict_s2['weight'], strict=False, assign=mmapped)}"
             )
         else:
             print(
@@ -596,16 +688,18 @@ class TTS:
         self.configs.t2s_weights_path = weights_path
         self.configs.save_configs()
         self.configs.hz = 50
-        dict_s1 = torch.load(weights_path, map_location=self.configs.device, weights_only=False)
+        dict_s1, mmapped = load_checkpoint(weights_path, torch_load)
         config = dict_s1["config"]
         self.configs.max_sec = config["data"]["max_sec"]
         t2s_model = Text2SemanticLightningModule(config, "****", is_train=False)
-        t2s_model.load_state_dict(dict_s1["weight"])
+        t2s_model.load_state_dict(dict_s1["weight"], assign=mmapped)
         t2s_model = t2s_model.to(self.configs.device)
         t2s_model = t2s_model.eval()
         self.t2s_model = t2s_model
         if self.configs.is_half and str(self.configs.device) != "cpu":
             self.t2s_model = self.t2s_model.half()
+        if self.configs.int8_cache_dir:
+            self._quantize_t2s_transformer(weights_path)
 
         codebook = t2s_model.model.ar_audio_embedding.weight.clone()
         mute_emb = codebook[self.configs.mute_tokens[self.configs.version]].unsqueeze(0)
@@ -686,7 +780,9 @@ class TTS:
     def init_sv_model(self):
         if self.sv_model is not None:
             return
-        self.sv_model = SV(self.configs.device, self.configs.is_half)
+        self.sv_model = _get_shared_base_model(
+            self._base_model_key("sv", ""), lambda: SV(self.configs.device, self.configs.is_half)
+        )
 
     def enable_half_precision(self, enable: bool = True, save: bool = True):
         """
@@ -768,6 +864,12 @@ class TTS:
             self.prompt_cache["refer_spec"] = [spec_audio]
         else:
             self.prompt_cache["refer_spec"][0] = spec_audio
+        # 主参考音频的说话人嵌入只与参考音频有关，算一次后随 prompt_cache 复用
+        if self.is_v2pro:
+            with torch.no_grad():
+                self.prompt_cache["sv_emb"] = self.sv_model.compute_embedding3(spec_audio[1])
+        else:
+            self.prompt_cache["sv_emb"] = None
 
     def _get_ref_spec(self, ref_audio_path):
         # 兼容性修复：避免在 Windows 上因缺失 torchcodec / ffmpeg 解码器而导致 torchaudio.load 报错
@@ -847,6 +949,83 @@ class TTS:
             prompt_semantic = codes[0, 0].to(self.configs.device)
             self.prompt_cache["prompt_semantic"] = prompt_semantic
 
+    def prompt_cache_path(self, cache_dir: str, ref_audio_path: str, prompt_text: str, prompt_lang: str) -> str:
+        """
+        参考音频预处理结果的磁盘缓存路径。键由参考音频内容哈希、参考文本与语言、模型版本、精度、是否 int8 量化，
+        以及 SoVITS 权重与 BERT / chinese-hubert 底模的路径、修改时间和大小共同决定，任一变化即落到新文件。
+        """
+        h = hashlib.sha1()
+        with open(ref_audio_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        items = [h.hexdigest(), prompt_text, prompt_lang, self.configs.version, str(self.configs.is_half)]
+        # int8 量化的 BERT / chinese-hubert 输出与 fp32 不同，两种模式的缓存不能混用
+        items.append(f"int8={bool(self.configs.int8_cache_dir)}")
+        for path in (self.configs.vits_weights_path, self.configs.bert_base_path, self.configs.cnhuhbert_base_path):
+            try:
+                st = os.stat(path)
+                items.append(f"{os.path.abspath(path)}|{st.st_mtime}|{st.st_size}")
+            except OSError:
+                items.append(str(path))
+        key = hashlib.sha1("\0".join(items).encode("utf-8")).hexdigest()
+        return os.path.join(cache_dir, f"{key}.pt")
+
+    def load_prompt_cache(self, path: str, ref_audio_path: str) -> bool:
+        """
+        从磁盘缓存恢复参考音频的 prompt_semantic、参考频谱、说话人嵌入及参考文本的音素与 BERT 特征，
+        以 mmap 方式映射文件，跳过 chinese-hubert 与 BERT 的前向计算。文件不存在或损坏时返回 False。
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            data = torch.load(path, map_location=self.configs.device, weights_only=True, mmap=True)
+        except Exception as e:
+            print(f"参考音频缓存读取失败，将重新计算: {e}")
+            return False
+        self.prompt_cache["prompt_semantic"] = data["prompt_semantic"]
+        self.prompt_cache["refer_spec"] = [(data["refer_spec"], data["refer_audio"])]
+        self.prompt_cache["sv_emb"] = data["sv_emb"]
+        self.prompt_cache["raw_audio"] = data["raw_audio"]
+        self.prompt_cache["raw_sr"] = data["raw_sr"]
+        self.prompt_cache["prompt_text"] = data["prompt_text"]
+        self.prompt_cache["prompt_lang"] = data["prompt_lang"]
+        self.prompt_cache["phones"] = data["phones"]
+        self.prompt_cache["bert_features"] = data["bert_features"]
+        self.prompt_cache["norm_text"] = data["norm_text"]
+        self.prompt_cache["ref_audio_path"] = ref_audio_path
+        # 缓存只含主参考音频，辅助参考音频交由 run() 按路径重新计算
+        self.prompt_cache["aux_ref_audio_paths"] = []
+        print(f"已从缓存载入参考音频特征: {path}")
+        return True
+
+    def save_prompt_cache(self, path: str):
+        """将当前主参考音频与参考文本的预处理结果写入磁盘缓存（先写临时文件再原子替换）"""
+        spec, refer_audio = self.prompt_cache["refer_spec"][0]
+        data = {
+            "prompt_semantic": self.prompt_cache["prompt_semantic"],
+            "refer_spec": spec,
+            "refer_audio": refer_audio,
+            "sv_emb": self.prompt_cache["sv_emb"],
+            "raw_audio": self.prompt_cache["raw_audio"],
+            "raw_sr": int(self.prompt_cache["raw_sr"]),
+            "prompt_text": self.prompt_cache["prompt_text"],
+            "prompt_lang": self.prompt_cache["prompt_lang"],
+            "phones": list(self.prompt_cache["phones"]),
+            "bert_features": self.prompt_cache["bert_features"],
+            "norm_text": self.prompt_cache["norm_text"],
+        }
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            torch.save({k: v.detach().cpu() if isinstance(v, torch.Tensor) else v for k, v in data.items()}, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"参考音频缓存写入失败: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
     def batch_sequences(self, sequences: List[torch.Tensor], axis: int = 0, pad_value: int = 0, max_length: int = None):
         seq = sequences[0]
         ndim = seq.dim()
@@ -1017,7 +1196,7 @@ class TTS:
         Args:
             inputs (dict):
                 {
-                    "text": "",                   # str.(required) text to be synthesized
+                    "text": "",                   # str.(required) text to be synthesized. a list of str synthesizes each sentence in one batched run and yields one audio per sentence, in order.
                     "text_lang: "",               # str.(required) language of the text to be synthesized
                     "ref_audio_path": "",         # str.(required) reference audio path
                     "aux_ref_audio_paths": [],    # list.(optional) auxiliary reference audio paths for multi-speaker tone fusion
@@ -1042,6 +1221,8 @@ class TTS:
                     "overlap_length": 2,          # int. overlap length of semantic tokens for streaming mode.
                     "min_chunk_length": 16,        # int. The minimum chunk length of semantic tokens for streaming mode. (affects audio chunk size)
                     "fixed_length_chunk": False,  # bool. When turned on, it can achieve faster streaming response, but with lower quality. (lower quality, faster response speed)
+                    "static_kv_cache": False,     # bool. preallocate the T2S KV cache and write it in place while decoding (naive / streaming inference only).
+                    "prompt_cache_dir": None,     # str.(optional) directory of the on-disk reference prompt cache (semantic tokens, spectrogram, phones, bert features).
                 }
         returns:
             Tuple[int, np.ndarray]: sampling rate and audio data.
@@ -1049,6 +1230,8 @@ class TTS:
         ########## variables initialization ###########
         self.stop_flag: bool = False
         text: str = inputs.get("text", "")
+        # 传入句子列表时按句返回：一次批量推理后为每句各 yield 一段音频
+        per_sentence: bool = isinstance(text, (list, tuple))
         text_lang: str = inputs.get("text_lang", "")
         ref_audio_path: str = inputs.get("ref_audio_path", "")
         aux_ref_audio_paths: list = inputs.get("aux_ref_audio_paths", [])
@@ -1075,8 +1258,15 @@ class TTS:
         overlap_length = inputs.get("overlap_length", 2)
         min_chunk_length = inputs.get("min_chunk_length", 16)
         fixed_length_chunk = inputs.get("fixed_length_chunk", False)
+        static_kv_cache = inputs.get("static_kv_cache", False)
+        prompt_cache_dir = inputs.get("prompt_cache_dir", None)
         chunk_split_thershold = 0.0 # 该值代表语义token与mute token的余弦相似度阈值，若大于该阈值，则视为可切分点。
 
+        if per_sentence and (return_fragment or streaming_mode):
+            print("按句批量合成不支持分段返回/流式推理模式，已自动关闭")
+            return_fragment = False
+            streaming_mode = False
+
         if parallel_infer and not streaming_mode:
             print(i18n("并行推理模式已开启"))
             self.t2s_model.model.infer_panel = self.t2s_model.model.infer_panel_batch_infer
@@ -1144,6 +1334,29 @@ class TTS:
 
         ###### setting reference audio and prompt text preprocessing ########
         t0 = time.perf_counter()
+        if not no_prompt_text:
+            prompt_text = prompt_text.strip("\n")
+            if prompt_text[-1] not in splits:
+                prompt_text += "。" if prompt_lang != "en" else "."
+            print(i18n("实际输入的参考文本:"), prompt_text)
+
+        # 参考音频或参考文本变化时优先从磁盘缓存恢复；未命中则照常计算，结束后回写缓存
+        prompt_cache_file = None
+        if (
+            prompt_cache_dir
+            and not no_prompt_text
+            and ref_audio_path not in [None, ""]
+            and os.path.exists(ref_audio_path)
+            and (
+                ref_audio_path != self.prompt_cache["ref_audio_path"]
+                or prompt_text != self.prompt_cache["prompt_text"]
+                or prompt_lang != self.prompt_cache["prompt_lang"]
+            )
+        ):
+            prompt_cache_file = self.prompt_cache_path(prompt_cache_dir, ref_audio_path, prompt_text, prompt_lang)
+            if self.load_prompt_cache(prompt_cache_file, ref_audio_path):
+                prompt_cache_file = None
+
         if (ref_audio_path is not None) and (
             ref_audio_path != self.prompt_cache["ref_audio_path"]
             or (self.is_v2pro and self.prompt_cache["refer_spec"][0][1] is None)
@@ -1166,11 +1379,7 @@ class TTS:
                 self.prompt_cache["refer_spec"].append(self._get_ref_spec(path))
 
         if not no_prompt_text:
-            prompt_text = prompt_text.strip("\n")
-            if prompt_text[-1] not in splits:
-                prompt_text += "。" if prompt_lang != "en" else "."
-            print(i18n("实际输入的参考文本:"), prompt_text)
-            if self.prompt_cache["prompt_text"] != prompt_text:
+            if self.prompt_cache["prompt_text"] != prompt_text or self.prompt_cache["prompt_lang"] != prompt_lang:
                 phones, bert_features, norm_text = self.text_preprocessor.segment_and_extract_feature_for_text(
                     prompt_text, prompt_lang, self.configs.version
                 )
@@ -1180,12 +1389,25 @@ class TTS:
                 self.prompt_cache["bert_features"] = bert_features
                 self.prompt_cache["norm_text"] = norm_text
 
+        if prompt_cache_file is not None:
+            self.save_prompt_cache(prompt_cache_file)
+
         ###### text preprocessing ########
         t1 = time.perf_counter()
         data: list = None
+        sentence_ids: list = None
         if not (return_fragment or streaming_mode):
-            data = self.text_preprocessor.preprocess(text, text_lang, text_split_method, self.configs.version)
+            if per_sentence:
+                data, sentence_ids = self.text_preprocessor.preprocess_sentences(
+                    list(text), text_lang, text_split_method, self.configs.version
+                )
+            else:
+                data = self.text_preprocessor.preprocess(text, text_lang, text_split_method, self.configs.version)
             if len(data) == 0:
+                if per_sentence:
+                    for _ in text:
+                        yield 16000, np.zeros(0, dtype=np.int16)
+                    return
                 yield 16000, np.zeros(int(16000), dtype=np.int16)
                 return
 
@@ -1272,11 +1494,14 @@ class TTS:
                 refer_audio_spec = []
                 
                 sv_emb = [] if self.is_v2pro else None
-                for spec, audio_tensor in self.prompt_cache["refer_spec"]:
+                for i, (spec, audio_tensor) in enumerate(self.prompt_cache["refer_spec"]):
                     spec = spec.to(dtype=self.precision, device=self.configs.device)
                     refer_audio_spec.append(spec)
                     if self.is_v2pro:
-                        sv_emb.append(self.sv_model.compute_embedding3(audio_tensor))
+                        if i == 0 and self.prompt_cache["sv_emb"] is not None:
+                            sv_emb.append(self.prompt_cache["sv_emb"])
+                        else:
+                            sv_emb.append(self.sv_model.compute_embedding3(audio_tensor))
 
                 if not streaming_mode:
                     print(f"############ {i18n('预测语义Token')} ############")
@@ -1292,6 +1517,7 @@ class TTS:
                         early_stop_num=self.configs.hz * self.configs.max_sec,
                         max_len=max_len,
                         repetition_penalty=repetition_penalty,
+                        static_kv_cache=static_kv_cache,
                     )
                     t4 = time.perf_counter()
                     t_34 += t4 - t3
@@ -1386,6 +1612,7 @@ class TTS:
                         chunk_length=min_chunk_length,
                         mute_emb_sim_matrix=self.configs.mute_emb_sim_matrix if not fixed_length_chunk else None,
                         chunk_split_thershold=chunk_split_thershold,
+                        static_kv_cache=static_kv_cache,
                     )
                     t4 = time.perf_counter()
                     t_34 += t4 - t3
@@ -1518,6 +1745,24 @@ class TTS:
                 if len(audio) == 0:
                     yield output_sr, np.zeros(int(output_sr), dtype=np.int16)
                     return
+                if per_sentence:
+                    # 先按 batch_index_list 还原片段顺序，再把同一句的片段归组，逐句后处理并产出
+                    fragments = self.recovery_order(audio, batch_index_list) if split_bucket else sum(audio, [])
+                    for sentence_id in range(len(text)):
+                        group = [frag for frag, sid in zip(fragments, sentence_ids) if sid == sentence_id]
+                        if len(group) == 0:
+                            yield output_sr, np.zeros(0, dtype=np.int16)
+                            continue
+                        yield self.audio_postprocess(
+                            [group],
+                            output_sr,
+                            None,
+                            speed_factor,
+                            False,
+                            fragment_interval,
+                            super_sampling if self.configs.use_vocoder and self.configs.version == "v3" else False,
+                        )
+                    return
                 yield self.audio_postprocess(
                     audio,
                     output_sr,
@@ -1,6 +1,8 @@
 import os
 import sys
+import hashlib
 import threading
+from collections import OrderedDict
 
 from tqdm import tqdm
 
@@ -49,12 +51,152 @@ def merge_short_text_in_array(texts: str, threshold: int) -> list:
     return result
 
 
+class PhraseFeatureCache:
+    """
+    短语级文本特征 LRU 缓存：键为 (规范化文本, 语言, 版本)，值为 (phones, word2ph, norm_text, 音素级 BERT 特征)。
+    内存中按 BERT 特征字节数限额淘汰；设置 spill_dir 后同时以 float16 落盘，进程重启后仍可命中。
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, spill_dir: str = None, max_spill_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_spill_bytes = max_spill_bytes
+        self.spill_dir = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (phones, word2ph, norm_text, bert)
+        self._total_bytes = 0
+        if spill_dir:
+            self.set_spill_dir(spill_dir)
+
+    def set_spill_dir(self, spill_dir: str):
+        os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = spill_dir
+        self._evict_spill()
+
+    @staticmethod
+    def make_key(text: str, language: str, version: str) -> str:
+        return hashlib.sha1(f"{version}\0{language}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str, device):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._load_spilled(key, device)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._insert(key, entry)
+        return entry
+
+    def put(self, key: str, entry: tuple):
+        with self._lock:
+            self._insert(key, entry)
+        if self.spill_dir:
+            self._spill(key, entry)
+
+    def _insert(self, key, entry):
+        """调用方需持有锁"""
+        size = entry[3].numel() * entry[3].element_size()
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total_bytes -= old[3].numel() * old[3].element_size()
+        self._entries[key] = entry
+        self._total_bytes += size
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, _, _, bert) = self._entries.popitem(last=False)
+            self._total_bytes -= bert.numel() * bert.element_size()
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, key + ".pt")
+
+    def _spill(self, key, entry):
+        phones, word2ph, norm_text, bert = entry
+        path = self._spill_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            data = {
+                "phones": list(phones),
+                "word2ph": list(word2ph) if word2ph is not None else None,
+                "norm_text": norm_text,
+                "bert": bert.detach().to("cpu", torch.float16),
+            }
+            torch.save(data, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"文本特征缓存写入失败: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _load_spilled(self, key, device):
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            data = torch.load(path, map_location="cpu", weights_only=True)
+            os.utime(path)
+        except Exception as e:
+            print(f"文本特征缓存读取失败，已丢弃: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        bert = data["bert"].to(device=device, dtype=torch.float32)
+        return data["phones"], data["word2ph"], data["norm_text"], bert
+
+    def _evict_spill(self):
+        """按修改时间淘汰最久未使用的落盘条目，使目录总大小不超过 max_spill_bytes"""
+        files = []
+        for name in os.listdir(self.spill_dir):
+            if not name.endswith(".pt"):
+                continue
+            path = os.path.join(self.spill_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_spill_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        """命中 / 未命中次数、命中率及常驻条目数与字节数，供调试与基准脚本按需查询"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
+
+
 class TextPreprocessor:
     def __init__(self, bert_model: AutoModelForMaskedLM, tokenizer: AutoTokenizer, device: torch.device):
         self.bert_model = bert_model
         self.tokenizer = tokenizer
         self.device = device
         self.bert_lock = threading.RLock()
+        # 陪伴聊天中短句大量重复，命中缓存时跳过 G2P 与 chinese-roberta-large 前向
+        self.feature_cache = PhraseFeatureCache()
 
     def preprocess(self, text: str, lang: str, text_split_method: str, version: str = "v2") -> List[Dict]:
         print(f"############ {i18n('切分文本')} ############")
@@ -74,6 +216,21 @@ class TextPreprocessor:
             result.append(res)
         return result
 
+    def preprocess_sentences(
+        self, sentences: List[str], lang: str, text_split_method: str, version: str = "v2"
+    ) -> Tuple[List[Dict], List[int]]:
+        """
+        逐句预处理多条已切分好的句子，句与句之间不做短句合并，
+        返回 (切分片段特征列表, 每个片段所属的句子下标)，用于批量合成后按句重新拼回音频。
+        """
+        result = []
+        sentence_ids = []
+        for sentence_id, sentence in enumerate(sentences):
+            for res in self.preprocess(sentence, lang, text_split_method, version):
+                result.append(res)
+                sentence_ids.append(sentence_id)
+        return result, sentence_ids
+
     def pre_seg_text(self, text: str, lang: str, text_split_method: str):
         text = text.strip("\n")
         if len(text) == 0:
@@ -174,8 +331,7 @@ class TextPreprocessor:
             norm_text_list = []
             for i in range(len(textlist)):
                 lang = langlist[i]
-                phones, word2ph, norm_text = self.clean_text_inf(textlist[i], lang, version)
-                bert = self.get_bert_inf(phones, word2ph, norm_text, lang)
+                phones, word2ph, norm_text, bert = self.get_phrase_features(textlist[i], lang, version)
                 phones_list.append(phones)
                 norm_text_list.append(norm_text)
                 bert_list.append(bert)
@@ -188,6 +344,17 @@ class TextPreprocessor:
 
             return phones, bert, norm_text
 
+    def get_phrase_features(self, text: str, language: str, version: str):
+        """单语种短语的 G2P 与音素级 BERT 特征，优先查询短语缓存"""
+        key = self.feature_cache.make_key(text, language, version)
+        entry = self.feature_cache.get(key, self.device)
+        if entry is None:
+            phones, word2ph, norm_text = self.clean_text_inf(text, language, version)
+            bert = self.get_bert_inf(phones, word2ph, norm_text, language)
+            entry = (phones, word2ph, norm_text, bert)
+            self.feature_cache.put(key, entry)
+        return entry
+
     def get_bert_feature(self, text: str, word2ph: list) -> torch.Tensor:
         with torch.no_grad():
             inputs = self.tokenizer(text, return_tensors="pt")
@@ -6,6 +6,10 @@ GPT-SoVITS 语音合成服务的初始化与高阶接口封装。
 
 import os
 import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
 import numpy as np
 import soundfile as sf
 
@@ -47,12 +51,93 @@ if current_dir not in sys.path:
 sys.modules['GPT_SoVITS'] = sys.modules[__name__]
 
 # 导入内部核心推理解析包
-from TTS_infer_pack.TTS import TTS, TTS_Config
+from TTS_infer_pack.TTS import TTS, TTS_Config, shared_base_models
+
+# 缓存已加载的 TTS 模型实例，键为：(t2s_weights_path, vits_weights_path, version, device, engine, onnx_dir, int8_cache_dir)，
+# 按最近使用顺序排列 (LRU)。BERT / CNHuBERT 等基础模型由全部实例共享，不计入单个条目
+_synthesizer_cache = OrderedDict()
+# 保护缓存字典与统计的全局锁；只在查表与登记时持有，模型载入在锁外进行
+_synthesizer_lock = threading.Lock()
+# 正在载入的推理器，键同上，值为 Future：后台预热与合成线程同时请求同一模型时等待同一次载入，
+# 载入其它角色的线程不受阻塞
+_synthesizer_pending = {}
+
+# 缓存上限：角色专属模型 (T2S + SoVITS，v2 约 250MB/角色) 的总字节数，可由 set_cache_budget 调整
+GPT_SOVITS_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+_cache_nbytes = {}  # cache_key -> 该条目角色专属模型的字节数
+_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+# 短语级文本特征缓存的落盘目录，为 None 时仅缓存在内存中
+_text_feature_spill_dir = None
+
+
+def set_text_feature_spill_dir(spill_dir: str):
+    """设置短语级文本特征缓存的落盘目录，对已载入与之后载入的推理器均生效"""
+    global _text_feature_spill_dir
+    with _synthesizer_lock:
+        if spill_dir == _text_feature_spill_dir:
+            return
+        _text_feature_spill_dir = spill_dir
+        for synthesizer in _synthesizer_cache.values():
+            synthesizer.text_preprocessor.feature_cache.set_spill_dir(spill_dir)
+
+def _module_nbytes(module):
+    """统计模块全部参数与缓冲区占用的字节数，用于缓存内存上限判定"""
+    if module is None:
+        return 0
+    total = 0
+    for t in list(module.parameters()) + list(module.buffers()):
+        total += t.numel() * t.element_size()
+    return total
+
+
+def _synthesizer_nbytes(synthesizer: TTS) -> int:
+    """单个推理器独占的模型字节数（T2S + SoVITS + v3/v4 声码器），共享的基础模型不计入"""
+    return sum(_module_nbytes(m) for m in (synthesizer.t2s_model, synthesizer.vits_model, synthesizer.vocoder))
+
+
+def _enforce_cache_limit():
+    """按 LRU 顺序淘汰旧推理器，直到总字节数落在上限之内（至少保留最近使用的一个）。需在持有 _synthesizer_lock 时调用"""
+    while len(_synthesizer_cache) > 1 and sum(_cache_nbytes.values()) > GPT_SOVITS_CACHE_MAX_BYTES:
+        key, _ = _synthesizer_cache.popitem(last=False)
+        nbytes = _cache_nbytes.pop(key, 0)
+        _cache_stats["evictions"] += 1
+        print(f"[GPT-SoVITS] 内存上限已满，淘汰语音合成引擎: {os.path.basename(key[1])} ({nbytes / 1024 / 1024:.1f} MB)")
+
 
-# 缓存已加载的 TTS 模型示例，键为：(t2s_weights_path, vits_weights_path, version, device)
-_synthesizer_cache = {}
+def set_cache_budget(max_bytes: int):
+    """设置推理器缓存的总字节上限（只计角色专属模型），调小时立即按 LRU 淘汰"""
+    global GPT_SOVITS_CACHE_MAX_BYTES
+    with _synthesizer_lock:
+        if max_bytes == GPT_SOVITS_CACHE_MAX_BYTES:
+            return
+        GPT_SOVITS_CACHE_MAX_BYTES = max_bytes
+        _enforce_cache_limit()
 
-def get_synthesizer(t2s_weights_path: str, vits_weights_path: str, version: str = "v2", device: str = "cpu") -> TTS:
+
+def cache_stats() -> dict:
+    """
+    推理器缓存统计：各条目常驻字节数（按最近使用排序）、共享基础模型字节数、命中/未命中/淘汰次数。
+    """
+    with _synthesizer_lock:
+        entries = [{"key": key, "nbytes": _cache_nbytes.get(key, 0)} for key in _synthesizer_cache]
+        stats = dict(_cache_stats)
+    shared = {}
+    for key, model in shared_base_models().items():
+        if isinstance(model, tuple):  # BERT 为 (tokenizer, model)
+            model = model[1]
+        shared[key] = _module_nbytes(getattr(model, "embedding_model", model))
+    stats.update({
+        "entries": entries,
+        "budget_bytes": GPT_SOVITS_CACHE_MAX_BYTES,
+        "resident_bytes": sum(e["nbytes"] for e in entries),
+        "shared_bytes": sum(shared.values()),
+        "shared": shared,
+    })
+    return stats
+
+
+def get_synthesizer(t2s_weights_path: str, vits_weights_path: str, version: str = "v2", device: str = "cpu",
+                    engine: str = "torch", onnx_dir: str = None, int8_cache_dir: str = None) -> TTS:
     """
     根据给定的模型路径与版本，获取或实例化对应的 TTS 推理器（带内存缓存）。
     
@@ -61,13 +146,68 @@ def get_synthesizer(t2s_weights_path: str, vits_weights_path: str, version: str
         vits_weights_path: SoVITS 模型的绝对路径
         version: 模型版本，可选 v1, v2, v2Pro, v2ProPlus 等
         device: 推理设备，可选 "cpu", "cuda", "mps"
+        engine: 推理后端，"torch" 或 "onnx"（T2S 解码与 SoVITS 解码改由 ONNX Runtime 执行，需先导出）
+        onnx_dir: engine="onnx" 时 ONNX 图所在目录（由 python src/main.py --export-onnx 导出）
+        int8_cache_dir: 非空时在 CPU 上对 T2S 解码块、BERT 与 CNHuBERT 启用动态 int8 量化，量化权重缓存到该目录
     返回:
         TTS 推理器实例
     """
-    cache_key = (t2s_weights_path, vits_weights_path, version, device)
-    if cache_key in _synthesizer_cache:
-        return _synthesizer_cache[cache_key]
-        
+    if engine != "onnx":
+        engine, onnx_dir = "torch", None
+    if device != "cpu":
+        int8_cache_dir = None
+    cache_key = (t2s_weights_path, vits_weights_path, version, device, engine, onnx_dir, int8_cache_dir)
+    with _synthesizer_lock:
+        synthesizer = _synthesizer_cache.get(cache_key)
+        if synthesizer is not None:
+            _synthesizer_cache.move_to_end(cache_key)
+            _cache_stats["hits"] += 1
+            return synthesizer
+
+        pending = _synthesizer_pending.get(cache_key)
+        if pending is None:
+            _cache_stats["misses"] += 1
+            pending = _synthesizer_pending[cache_key] = Future()
+            building = True
+        else:
+            building = False
+
+    if not building:
+        # 其它线程正在载入同一模型，等待其结果（载入失败时同样抛出该异常）
+        return pending.result()
+
+    try:
+        synthesizer = _build_synthesizer(t2s_weights_path, vits_weights_path, version, device, int8_cache_dir)
+        if engine == "onnx" and device == "cpu":
+            from .onnx_engine import attach_onnx_engine
+            attach_onnx_engine(synthesizer, onnx_dir)
+        # TTS.run 不可重入（会改写 stop_flag、参考音频缓存并按调用切换 T2S 解码路径），
+        # 对话合成与后台预渲染共用同一推理器时以该锁串行化
+        synthesizer.run_lock = threading.Lock()
+        nbytes = _synthesizer_nbytes(synthesizer)
+    except BaseException as e:
+        with _synthesizer_lock:
+            del _synthesizer_pending[cache_key]
+        pending.set_exception(e)
+        raise
+
+    with _synthesizer_lock:
+        del _synthesizer_pending[cache_key]
+        # 载入期间落盘目录可能已被修改，登记时按当前设置应用
+        if _text_feature_spill_dir:
+            synthesizer.text_preprocessor.feature_cache.set_spill_dir(_text_feature_spill_dir)
+        _synthesizer_cache[cache_key] = synthesizer
+        _cache_nbytes[cache_key] = nbytes
+        _enforce_cache_limit()
+        print(f"[GPT-SoVITS] 引擎缓存: {len(_synthesizer_cache)} 个角色，"
+              f"{sum(_cache_nbytes.values()) / 1024 / 1024:.1f} / {GPT_SOVITS_CACHE_MAX_BYTES / 1024 / 1024:.0f} MB（共享基础模型另计）")
+    pending.set_result(synthesizer)
+    return synthesizer
+
+
+def _build_synthesizer(t2s_weights_path: str, vits_weights_path: str, version: str, device: str,
+                       int8_cache_dir: str = None) -> TTS:
+    """实例化 TTS 推理器并在 CPU 下统一转为 float32"""
     # 计算项目绝对根路径与基础 BERT/Hubert 路径
     project_root = os.path.abspath(os.path.join(current_dir, "..", "..", "..", ".."))
     base_model_dir = os.path.join(project_root, "resources", "models", "gpt_sovits_base")
@@ -85,10 +225,11 @@ def get_synthesizer(t2s_weights_path: str, vits_weights_path: str, version: str
             "vits_weights_path": vits_weights_path,
             "cnhuhbert_base_path": cnhuhbert_base_path,
             "bert_base_path": bert_base_path,
+            "int8_cache_dir": int8_cache_dir,
         }
     }
     
-    print(f"[GPT-SoVITS] 正在载入语音合成引擎 (版本: {version}, 设备: {device})...")
+    print(f"[GPT-SoVITS] 正在载入语音合成引擎 (版本: {version}, 设备: {device}{', int8 量化' if int8_cache_dir else ''})...")
     print(f"  - GPT 权重: {t2s_weights_path}")
     print(f"  - SoVITS 权重: {vits_weights_path}")
     
@@ -106,51 +247,20 @@ def get_synthesizer(t2s_weights_path: str, vits_weights_path: str, version: str
             synthesizer.t2s_model = synthesizer.t2s_model.float()
         if synthesizer.vits_model is not None:
             synthesizer.vits_model = synthesizer.vits_model.float()
-    
-    # 缓存实例
-    _synthesizer_cache[cache_key] = synthesizer
     return synthesizer
 
-def gpt_sovits_convert(
-    text: str,
-    text_lang: str,
-    ref_wav_path: str,
-    prompt_text: str,
-    prompt_lang: str,
-    output_wav_path: str,
-    gpt_ckpt_path: str = None,
-    sovits_pth_path: str = None,
-    version: str = "v2",
-    device: str = "cpu",
-    temperature: float = 0.4 # 增加采样温度控制参数
-):
-    """
-    调用本地 GPT-SoVITS 引擎进行文本到语音的合成，并保存为 wav 文件。
-    
-    参数:
-        text: 待合成的目标文本
-        text_lang: 目标文本语言 (zh: 中文, ja: 日文, en: 英文, auto: 自动切分)
-        ref_wav_path: 参考音频路径 (通常为 3-10 秒的 wav 剪辑)
-        prompt_text: 参考音频对应的文本内容
-        prompt_lang: 参考音频的语言
-        output_wav_path: 输出音频的绝对路径
-        gpt_ckpt_path: 微调 GPT 模型 (.ckpt) 绝对路径；若为 None 则自动使用官方通用底模
-        sovits_pth_path: 微调 SoVITS 模型 (.pth) 绝对路径；若为 None 则自动使用官方通用底模
-        version: 模型版本 (v1, v2, v2Pro, v2ProPlus)
-        device: 推理硬件平台 ("cpu", "cuda")
-        temperature: 推理采样温度 (常用于降低自回归预测的电流噪声)
-    """
+def _resolve_weights_paths(gpt_ckpt_path: str, sovits_pth_path: str, version: str):
+    """判定并适配零样本与微调模式的权重路径，缺失时退回官方通用底模"""
     project_root = os.path.abspath(os.path.join(current_dir, "..", "..", "..", ".."))
     base_model_dir = os.path.join(project_root, "resources", "models", "gpt_sovits_base")
-    
-    # 判定并适配零样本与微调模式的权重路径
+
     if not gpt_ckpt_path or not os.path.exists(gpt_ckpt_path):
         # 零样本降级，使用官方默认底模
         if version == "v1":
             gpt_ckpt_path = os.path.join(base_model_dir, "s1bert25hz-2kh-longer-epoch=68e-step=50232.ckpt")
         else:
             gpt_ckpt_path = os.path.join(base_model_dir, "gsv-v2final-pretrained", "s1bert25hz-5kh-longer-epoch=12-step=369668.ckpt")
-            
+
     if not sovits_pth_path or not os.path.exists(sovits_pth_path):
         # 零样本降级，使用官方默认底模
         if version == "v1":
@@ -161,12 +271,56 @@ def gpt_sovits_convert(
             sovits_pth_path = os.path.join(base_model_dir, "v2Pro", "s2Gv2ProPlus.pth")
         else:
             sovits_pth_path = os.path.join(base_model_dir, "gsv-v2final-pretrained", "s2G2333k.pth")
-            
-    # 获取或载入 synthesizer 实例
-    synthesizer = get_synthesizer(gpt_ckpt_path, sovits_pth_path, version, device)
-    
-    # 构造推理输入字典
-    inputs = {
+
+    return gpt_ckpt_path, sovits_pth_path
+
+
+def export_voice_onnx(gpt_ckpt_path: str, sovits_pth_path: str, version: str, onnx_dir: str,
+                      ref_wav_path: str = None, prompt_text: str = None, prompt_lang: str = "zh",
+                      text_lang: str = "zh", verify_text: str = "你好呀，今天过得怎么样？"):
+    """
+    把角色的 GPT/SoVITS 权重导出为 ONNX 图；提供参考音频时随后在同一组输入上校验
+    ONNX 与 PyTorch 两条路径的输出一致性并报告加速比。
+    """
+    from .onnx_export import export_onnx
+    from .onnx_engine import attach_onnx_engine, verify_onnx_engine
+
+    gpt_ckpt_path, sovits_pth_path = _resolve_weights_paths(gpt_ckpt_path, sovits_pth_path, version)
+    export_onnx(gpt_ckpt_path, sovits_pth_path, onnx_dir)
+    if not (ref_wav_path and os.path.exists(ref_wav_path)):
+        print("[ONNX] 未提供参考音频，跳过一致性校验")
+        return None
+    synthesizer = _build_synthesizer(gpt_ckpt_path, sovits_pth_path, version, "cpu")
+    if not attach_onnx_engine(synthesizer, onnx_dir):
+        return None
+    return verify_onnx_engine(synthesizer, verify_text, text_lang.lower(), ref_wav_path, prompt_text, prompt_lang.lower())
+
+
+def convert_voice_weights(gpt_ckpt_path: str, sovits_pth_path: str, version: str):
+    """
+    把 GPT/SoVITS 权重一次性转换为 safetensors + JSON 配置（写在原文件旁边），
+    之后 TTS 载入时自动以内存映射方式读取。已是最新的转换产物会跳过。返回新转换的文件数。
+    """
+    from process_ckpt import load_sovits_new
+    from aipet.services.weights_store import convert_checkpoint, is_converted, torch_load
+
+    gpt_ckpt_path, sovits_pth_path = _resolve_weights_paths(gpt_ckpt_path, sovits_pth_path, version)
+    converted = 0
+    for path, loader in ((gpt_ckpt_path, torch_load), (sovits_pth_path, load_sovits_new)):
+        if not os.path.exists(path):
+            print(f"[Weights] 权重文件不存在，跳过: {path}")
+            continue
+        if is_converted(path):
+            print(f"[Weights] 已是最新，跳过: {path}")
+            continue
+        convert_checkpoint(path, loader(path))
+        converted += 1
+    return converted
+
+
+def _build_inputs(text, text_lang, ref_wav_path, prompt_text, prompt_lang, temperature, prompt_cache_dir=None):
+    """构造 TTS.run 的推理输入字典"""
+    return {
         "text": text,
         "text_lang": text_lang.lower(),
         "ref_audio_path": ref_wav_path,
@@ -178,15 +332,189 @@ def gpt_sovits_convert(
         "text_split_method": "cut5",  # 默认使用按标点与长度切分的 cut5 算法
         "batch_size": 1,
         "speed_factor": 1.0,
-        "streaming_mode": False
+        # 单句逐条合成：走逐 token 的 naive 解码路径，并启用预分配的静态 KV 缓存
+        "parallel_infer": False,
+        "static_kv_cache": True,
+        "streaming_mode": False,
+        # 参考音频语义 token / 频谱 / 参考文本 BERT 特征的磁盘缓存目录，换角色或重启后免去重复前向计算
+        "prompt_cache_dir": prompt_cache_dir
     }
-    
+
+
+def gpt_sovits_synthesize(
+    text: str,
+    text_lang: str,
+    ref_wav_path: str,
+    prompt_text: str,
+    prompt_lang: str,
+    gpt_ckpt_path: str = None,
+    sovits_pth_path: str = None,
+    version: str = "v2",
+    device: str = "cpu",
+    temperature: float = 0.4,
+    prompt_cache_dir: str = None,
+    engine: str = "torch",
+    onnx_dir: str = None,
+    int8_cache_dir: str = None
+):
+    """
+    调用本地 GPT-SoVITS 引擎进行文本到语音的合成，直接在内存中返回音频数据。
+
+    参数同 gpt_sovits_convert（无 output_wav_path），另有:
+        prompt_cache_dir: 参考音频预处理结果的磁盘缓存目录（通常位于角色 profile.json 同级），为 None 时不缓存
+        engine / onnx_dir: 推理后端，见 get_synthesizer
+        int8_cache_dir: 非空时启用动态 int8 量化推理，见 get_synthesizer
+    返回:
+        (采样率, int16 PCM 数组)
+    """
+    gpt_ckpt_path, sovits_pth_path = _resolve_weights_paths(gpt_ckpt_path, sovits_pth_path, version)
+
+    # 获取或载入 synthesizer 实例
+    synthesizer = get_synthesizer(gpt_ckpt_path, sovits_pth_path, version, device, engine, onnx_dir, int8_cache_dir)
+    inputs = _build_inputs(text, text_lang, ref_wav_path, prompt_text, prompt_lang, temperature, prompt_cache_dir)
+
     # 执行推理，TTS.run 是一个生成器，由于关闭了流式，只会 yield 一次完整的合成音频
-    results = list(synthesizer.run(inputs))
+    with synthesizer.run_lock:
+        results = list(synthesizer.run(inputs))
     if len(results) > 0:
         sr, audio_data = results[0]
-        # 保存为 16bit PCM wav 音频
-        sf.write(output_wav_path, audio_data, sr, format="wav", subtype="PCM_16")
-        print(f"[GPT-SoVITS] 语音合成成功，输出至: {output_wav_path}")
-    else:
-        raise RuntimeError("GPT-SoVITS 推理未产生有效的音频数据输出。")
+        return sr, audio_data
+    raise RuntimeError("GPT-SoVITS 推理未产生有效的音频数据输出。")
+
+
+def gpt_sovits_synthesize_batch(
+    texts: list,
+    text_lang: str,
+    ref_wav_path: str,
+    prompt_text: str,
+    prompt_lang: str,
+    gpt_ckpt_path: str = None,
+    sovits_pth_path: str = None,
+    version: str = "v2",
+    device: str = "cpu",
+    temperature: float = 0.4,
+    batch_threshold: float = 0.75,
+    prompt_cache_dir: str = None,
+    engine: str = "torch",
+    onnx_dir: str = None,
+    int8_cache_dir: str = None,
+):
+    """
+    一次推理批量合成多句文本：各句切分后按长度分桶 (to_batch)，每桶以并行解码路径
+    (infer_panel_batch_infer) 一起生成语义 token，再经 recovery_order 还原顺序后按句拼回音频。
+
+    参数:
+        texts: 待合成的句子列表
+        batch_threshold: 分桶阈值，桶内长度中位数与均值之比低于该值时拆分为更小的桶
+        其余参数同 gpt_sovits_synthesize
+    返回:
+        与 texts 一一对应的 [(采样率, int16 PCM 数组)]，无可发音内容的句子对应空数组
+    """
+    gpt_ckpt_path, sovits_pth_path = _resolve_weights_paths(gpt_ckpt_path, sovits_pth_path, version)
+    synthesizer = get_synthesizer(gpt_ckpt_path, sovits_pth_path, version, device, engine, onnx_dir, int8_cache_dir)
+
+    inputs = _build_inputs(list(texts), text_lang, ref_wav_path, prompt_text, prompt_lang, temperature, prompt_cache_dir)
+    inputs.update({
+        "batch_size": len(texts),
+        "batch_threshold": batch_threshold,
+        "split_bucket": True,
+        "parallel_infer": True,  # 批量解码必须走并行推理路径
+        "static_kv_cache": False,
+    })
+
+    with synthesizer.run_lock:
+        results = list(synthesizer.run(inputs))
+    if len(results) != len(texts):
+        # 推理中途被停止或出错时只会产出一段占位音频，交由调用方逐句重试
+        raise RuntimeError(f"GPT-SoVITS 批量推理产出 {len(results)} 段音频，与输入的 {len(texts)} 句不一致。")
+    return results
+
+
+def gpt_sovits_stream(
+    text: str,
+    text_lang: str,
+    ref_wav_path: str,
+    prompt_text: str,
+    prompt_lang: str,
+    gpt_ckpt_path: str = None,
+    sovits_pth_path: str = None,
+    version: str = "v2",
+    device: str = "cpu",
+    temperature: float = 0.4,
+    min_chunk_length: int = 16,
+    overlap_length: int = 2,
+    prompt_cache_dir: str = None,
+    engine: str = "torch",
+    onnx_dir: str = None,
+    int8_cache_dir: str = None,
+):
+    """
+    流式调用本地 GPT-SoVITS 引擎，每生成一段语义 token 即解码并产出一块音频，
+    使播放可以在首个 chunk 就绪后立即开始，而不必等待整句合成完毕。
+
+    参数:
+        min_chunk_length: 每块音频对应的最少语义 token 数（越小首包越快，音质略降）
+        overlap_length: 相邻块之间用于 SOLA 拼接的重叠 token 数
+        其余参数同 gpt_sovits_synthesize
+    产出:
+        (采样率, int16 PCM 数组) 音频块
+    """
+    gpt_ckpt_path, sovits_pth_path = _resolve_weights_paths(gpt_ckpt_path, sovits_pth_path, version)
+    synthesizer = get_synthesizer(gpt_ckpt_path, sovits_pth_path, version, device, engine, onnx_dir, int8_cache_dir)
+
+    inputs = _build_inputs(text, text_lang, ref_wav_path, prompt_text, prompt_lang, temperature, prompt_cache_dir)
+    inputs.update({
+        "streaming_mode": True,
+        "parallel_infer": False,  # 流式模式不支持并行推理
+        "split_bucket": False,
+        "overlap_length": overlap_length,
+        "min_chunk_length": min_chunk_length,
+    })
+
+    # 整个流式生成期间持有推理锁，调用方须在中止时 close() 本生成器以释放
+    with synthesizer.run_lock:
+        for sr, audio_chunk in synthesizer.run(inputs):
+            if len(audio_chunk) > 0:
+                yield sr, audio_chunk
+
+
+def gpt_sovits_convert(
+    text: str,
+    text_lang: str,
+    ref_wav_path: str,
+    prompt_text: str,
+    prompt_lang: str,
+    output_wav_path: str,
+    gpt_ckpt_path: str = None,
+    sovits_pth_path: str = None,
+    version: str = "v2",
+    device: str = "cpu",
+    temperature: float = 0.4 # 增加采样温度控制参数
+):
+    """
+    调用本地 GPT-SoVITS 引擎进行文本到语音的合成，并保存为 wav 文件。
+    
+    参数:
+        text: 待合成的目标文本
+        text_lang: 目标文本语言 (zh: 中文, ja: 日文, en: 英文, auto: 自动切分)
+        ref_wav_path: 参考音频路径 (通常为 3-10 秒的 wav 剪辑)
+        prompt_text: 参考音频对应的文本内容
+        prompt_lang: 参考音频的语言
+        output_wav_path: 输出音频的绝对路径
+        gpt_ckpt_path: 微调 GPT 模型 (.ckpt) 绝对路径；若为 None 则自动使用官方通用底模
+        sovits_pth_path: 微调 SoVITS 模型 (.pth) 绝对路径；若为 None 则自动使用官方通用底模
+        version: 模型版本 (v1, v2, v2Pro, v2ProPlus)
+        device: 推理硬件平台 ("cpu", "cuda")
+        temperature: 推理采样温度 (常用于降低自回归预测的电流噪声)
+    """
+    sr, audio_data = gpt_sovits_synthesize(
+        text, text_lang, ref_wav_path, prompt_text, prompt_lang,
+        gpt_ckpt_path=gpt_ckpt_path,
+        sovits_pth_path=sovits_pth_path,
+        version=version,
+        device=device,
+        temperature=temperature,
+    )
+    # 保存为 16bit PCM wav 音频
+    sf.write(output_wav_path, audio_data, sr, format="wav", subtype="PCM_16")
+    print(f"[GPT-SoVITS] 语音合成成功，输出至: {output_wav_path}")
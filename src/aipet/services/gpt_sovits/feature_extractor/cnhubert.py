@@ -20,7 +20,7 @@ cnhubert_base_path = None
 
 
 class CNHubert(nn.Module):
-    def __init__(self, base_path: str = None):
+    def __init__(self, base_path: str = None, model: HubertModel = None):
         super().__init__()
         if base_path is None:
             base_path = cnhubert_base_path
@@ -28,7 +28,8 @@ class CNHubert(nn.Module):
             ...
         else:
             raise FileNotFoundError(base_path)
-        self.model = HubertModel.from_pretrained(base_path, local_files_only=True)
+        # model 非空时直接使用（如待载入 int8 量化权重的空模型），不再读取预训练权重
+        self.model = model if model is not None else HubertModel.from_pretrained(base_path, local_files_only=True)
         self.feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(base_path, local_files_only=True)
 
     def forward(self, x):
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+GPT-SoVITS 的 ONNX Runtime CPU 推理后端。
+文本预处理、BERT、参考音频特征仍走 PyTorch；T2S 自回归解码与 SoVITS 波形解码替换为 onnx_export 导出的图，
+逐 token 解码时以 IO Binding 把上一步输出的 KV 缓存直接作为下一步输入，避免在 numpy 与 ORT 之间反复拷贝。
+"""
+
+import os
+import sys
+import json
+
+import numpy as np
+import torch
+
+from AR.models.utils import sample
+from .onnx_export import (T2S_ENCODER_FILE, T2S_FIRST_STAGE_FILE, T2S_STAGE_FILE, VITS_FILE, META_FILE,
+                          weights_fingerprint)
+
+
+def load_meta(onnx_dir: str):
+    path = os.path.join(onnx_dir, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_export_current(onnx_dir: str, t2s_weights_path: str, vits_weights_path: str) -> bool:
+    """导出目录中的图是否由当前这对权重导出（比较 meta.json 中记录的权重指纹）"""
+    meta = load_meta(onnx_dir)
+    if meta is None:
+        return False
+    try:
+        return meta["t2s"] == weights_fingerprint(t2s_weights_path) and meta["vits"] == weights_fingerprint(vits_weights_path)
+    except OSError:
+        return False
+
+
+def create_session_options(intra_op_threads: int = None, inter_op_threads: int = 1):
+    """
+    CPU 推理的会话参数：自回归解码为串行小算子序列，算子内并行默认取物理核数（按逻辑核数的一半估算）、算子间并行固定为 1，
+    顺序执行模式并开启全部图优化。
+    """
+    import onnxruntime as ort
+    if intra_op_threads is None:
+        intra_op_threads = max(1, (os.cpu_count() or 2) // 2)
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = inter_op_threads
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return options
+
+
+class OnnxT2SDecoder:
+    """以 ONNX 图执行 T2S 自回归解码，接口与 Text2SemanticDecoder.infer_panel_naive_batched 一致"""
+
+    def __init__(self, onnx_dir: str, meta: dict, options, fallback=None):
+        import onnxruntime as ort
+        providers = ["CPUExecutionProvider"]
+        self.encoder = ort.InferenceSession(os.path.join(onnx_dir, T2S_ENCODER_FILE), options, providers=providers)
+        self.first_stage = ort.InferenceSession(os.path.join(onnx_dir, T2S_FIRST_STAGE_FILE), options, providers=providers)
+        self.stage = ort.InferenceSession(os.path.join(onnx_dir, T2S_STAGE_FILE), options, providers=providers)
+        self.stage_outputs = [o.name for o in self.stage.get_outputs()]
+        self.eos = meta["eos"]
+        self.fallback = fallback  # 无参考音频 (ref free) 时退回 PyTorch 路径
+
+    def infer_panel_naive_batched(
+        self,
+        x,
+        x_lens,
+        prompts,
+        bert_feature,
+        top_k: int = -100,
+        top_p: int = 100,
+        early_stop_num: int = -1,
+        temperature: float = 1.0,
+        repetition_penalty: float = 1.35,
+        **kwargs,
+    ):
+        if prompts is None:
+            return self.fallback(x, x_lens, prompts, bert_feature, top_k, top_p, early_stop_num,
+                                 temperature, repetition_penalty, **kwargs)
+        y_list = []
+        idx_list = []
+        for i in range(len(x)):
+            y, idx = self.decode(
+                x[i].unsqueeze(0), prompts[i].unsqueeze(0), bert_feature[i].unsqueeze(0),
+                top_k=top_k, top_p=top_p, early_stop_num=early_stop_num,
+                temperature=temperature, repetition_penalty=repetition_penalty,
+            )
+            y_list.append(y[0])
+            idx_list.append(idx)
+        return y_list, idx_list
+
+    def decode(self, x, prompts, bert_feature, top_k=-100, top_p=100, early_stop_num=-1,
+               temperature=1.0, repetition_penalty=1.35):
+        """单句解码，采样与停止条件同 infer_panel_naive：返回 (含前缀的 token 序列, 新生成 token 数)"""
+        import onnxruntime as ort
+        feeds = {
+            "all_phoneme_ids": x.cpu().numpy().astype(np.int64),
+            "bert_feature": bert_feature.float().cpu().numpy(),
+        }
+        x_emb = self.encoder.run(None, feeds)[0]
+
+        prompts = prompts.cpu().long()
+        _, k, v, y_emb, x_example, logits = self.first_stage.run(
+            None, {"x": x_emb, "prompts": prompts.numpy()}
+        )
+        k = ort.OrtValue.ortvalue_from_numpy(k)
+        v = ort.OrtValue.ortvalue_from_numpy(v)
+        y_emb = ort.OrtValue.ortvalue_from_numpy(y_emb)
+        x_example = ort.OrtValue.ortvalue_from_numpy(x_example)
+
+        y = prompts
+        prefix_len = y.shape[1]
+        binding = self.stage.io_binding()
+        for idx in range(1500):
+            logits = torch.from_numpy(np.asarray(logits)).float()
+            if idx < 11:  ###至少预测出10个token不然不给停止（0.4s）
+                logits = logits[:, :-1]
+            samples = sample(
+                logits, y, top_k=top_k, top_p=top_p, repetition_penalty=repetition_penalty, temperature=temperature
+            )[0]
+            y = torch.concat([y, samples.long()], dim=1)
+
+            stop = False
+            if early_stop_num != -1 and (y.shape[1] - prefix_len) > early_stop_num:
+                stop = True
+            if torch.argmax(logits, dim=-1)[0] == self.eos or samples[0, 0] == self.eos:
+                stop = True
+                y = y[:, :-1]
+            if idx == 1499:
+                stop = True
+            if stop:
+                if y.shape[1] == 0:
+                    y = torch.concat([y, torch.zeros_like(samples).long()], dim=1)
+                break
+
+            # 图内自带的采样结果不使用，只取 logits 与更新后的 KV 缓存；KV 缓存以 OrtValue 原样回填下一步
+            binding.clear_binding_inputs()
+            binding.clear_binding_outputs()
+            binding.bind_cpu_input("iy", y.numpy())
+            binding.bind_ortvalue_input("ik", k)
+            binding.bind_ortvalue_input("iv", v)
+            binding.bind_ortvalue_input("iy_emb", y_emb)
+            binding.bind_ortvalue_input("ix_example", x_example)
+            for name in self.stage_outputs:
+                binding.bind_output(name, "cpu")
+            self.stage.run_with_iobinding(binding)
+            outputs = dict(zip(self.stage_outputs, binding.get_outputs()))
+            k, v, y_emb = outputs["k"], outputs["v"], outputs["y_emb"]
+            logits = outputs["logits"].numpy()
+        return y, idx
+
+
+class OnnxVitsDecoder:
+    """以 ONNX 图执行 SoVITS 解码，接口与 SynthesizerTrn.decode 一致；多参考音频融合或变速时退回 PyTorch 路径"""
+
+    def __init__(self, onnx_dir: str, meta: dict, options, fallback=None):
+        import onnxruntime as ort
+        self.session = ort.InferenceSession(os.path.join(onnx_dir, VITS_FILE), options, providers=["CPUExecutionProvider"])
+        self.is_v2pro = meta["is_v2pro"]
+        self.fallback = fallback
+
+    def decode(self, codes, text, refer, noise_scale=0.5, speed=1, sv_emb=None):
+        if isinstance(refer, list):
+            if len(refer) != 1:
+                return self.fallback(codes, text, refer, noise_scale=noise_scale, speed=speed, sv_emb=sv_emb)
+            refer = refer[0]
+            sv_emb = sv_emb[0] if isinstance(sv_emb, list) else sv_emb
+        if speed != 1:
+            return self.fallback(codes, text, [refer], noise_scale=noise_scale, speed=speed,
+                                 sv_emb=[sv_emb] if sv_emb is not None else None)
+        feeds = {
+            "codes": codes.cpu().numpy().astype(np.int64),
+            "text": text.cpu().numpy().astype(np.int64),
+            "refer": refer.float().cpu().numpy(),
+            "noise_scale": np.array(noise_scale, dtype=np.float32),
+        }
+        if self.is_v2pro:
+            feeds["sv_emb"] = sv_emb.float().cpu().numpy()
+        audio = self.session.run(["audio"], feeds)[0]
+        return torch.from_numpy(audio).view(1, 1, -1).to(codes.device)
+
+
+def attach_onnx_engine(synthesizer, onnx_dir: str, intra_op_threads: int = None) -> bool:
+    """
+    把 TTS 推理器的 T2S 解码与 SoVITS 解码替换为 ONNX Runtime 实现。
+    导出目录缺失、与当前权重不匹配或 onnxruntime 不可用时打印提示并返回 False，推理器保持 PyTorch 路径。
+    """
+    configs = synthesizer.configs
+    if configs.use_vocoder:
+        print("[ONNX] SoVITS v3/v4 模型不支持 ONNX 后端，继续使用 PyTorch")
+        return False
+    if not is_export_current(onnx_dir, configs.t2s_weights_path, configs.vits_weights_path):
+        print(f"[ONNX] 未找到与当前权重匹配的 ONNX 导出 ({onnx_dir})，继续使用 PyTorch。"
+              f"可运行 python src/main.py --export-onnx <角色名> 导出")
+        return False
+    try:
+        options = create_session_options(intra_op_threads)
+        meta = load_meta(onnx_dir)
+        t2s = synthesizer.t2s_model.model
+        vits = synthesizer.vits_model
+        t2s_decoder = OnnxT2SDecoder(onnx_dir, meta, options, fallback=t2s.infer_panel_naive_batched)
+        vits_decoder = OnnxVitsDecoder(onnx_dir, meta, options, fallback=vits.decode)
+    except Exception as e:
+        print(f"[ONNX] 载入 ONNX Runtime 会话失败，继续使用 PyTorch: {e}")
+        return False
+    # 只覆盖逐句整段合成路径；流式 (infer_panel_naive / decode_streaming) 与并行批量 (infer_panel_batch_infer)
+    # 解码仍为 PyTorch，TTSQueueWorker 在 ONNX 后端下会关闭这两种模式
+    t2s.infer_panel_naive_batched = t2s_decoder.infer_panel_naive_batched
+    vits.decode = vits_decoder.decode
+    synthesizer.onnx_engine = (t2s_decoder, vits_decoder)
+    print(f"[ONNX] 已启用 ONNX Runtime 推理后端 (intra_op_threads={options.intra_op_num_threads})")
+    return True
+
+
+@torch.no_grad()
+def verify_onnx_engine(synthesizer, text: str, text_lang: str, ref_audio_path: str, prompt_text: str,
+                       prompt_lang: str, repeat: int = 3):
+    """
+    在同一组输入上对比 PyTorch 与 ONNX 两条路径：T2S 以 top_k=1 贪心解码比较语义 token 是否一致，
+    SoVITS 以 noise_scale=0 比较波形最大误差，并输出各自耗时与加速比。synthesizer 需已 attach_onnx_engine。
+    """
+    # 计时沿用基准脚本共用的 scratch/bench_utils.timed（导出校验只在源码目录下由 --export-onnx 触发）
+    scratch_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "scratch"))
+    if scratch_dir not in sys.path:
+        sys.path.append(scratch_dir)
+    from bench_utils import timed
+
+    t2s_decoder, vits_decoder = synthesizer.onnx_engine
+    list(synthesizer.run({
+        "text": text, "text_lang": text_lang, "ref_audio_path": ref_audio_path,
+        "prompt_text": prompt_text, "prompt_lang": prompt_lang, "parallel_infer": False,
+    }))  # 借一次完整推理填充参考音频与参考文本的 prompt_cache
+    cache = synthesizer.prompt_cache
+    phones, bert, _ = synthesizer.text_preprocessor.segment_and_extract_feature_for_text(
+        text, text_lang, synthesizer.configs.version
+    )
+    all_phones = torch.LongTensor(cache["phones"] + phones).unsqueeze(0)
+    all_bert = torch.cat([cache["bert_features"], bert], 1).unsqueeze(0).float()
+    x_lens = torch.LongTensor([all_phones.shape[1]])
+    prompts = cache["prompt_semantic"].unsqueeze(0)
+    sampling = dict(top_k=1, top_p=1.0, early_stop_num=synthesizer.configs.hz * synthesizer.configs.max_sec,
+                    temperature=1.0, repetition_penalty=1.35)
+
+    (torch_y, torch_idx), torch_t2s = timed(lambda: t2s_decoder.fallback(
+        [all_phones[0]], x_lens, prompts, [all_bert[0]], **sampling), repeat)
+    (onnx_y, onnx_idx), onnx_t2s = timed(lambda: t2s_decoder.infer_panel_naive_batched(
+        [all_phones[0]], x_lens, prompts, [all_bert[0]], **sampling), repeat)
+    torch_tokens = torch_y[0][-torch_idx[0]:]
+    onnx_tokens = onnx_y[0][-onnx_idx[0]:]
+    same_len = min(len(torch_tokens), len(onnx_tokens))
+    token_match = (torch_tokens[:same_len] == onnx_tokens[:same_len]).float().mean().item() if same_len else 0.0
+
+    codes = torch_tokens.view(1, 1, -1)
+    text_seq = torch.LongTensor(phones).unsqueeze(0)
+    spec, audio_16k = cache["refer_spec"][0]
+    sv_emb = [cache["sv_emb"]] if cache.get("sv_emb") is not None else None
+    torch_audio, torch_vits = timed(lambda: vits_decoder.fallback(
+        codes, text_seq, [spec.float()], noise_scale=0.0, sv_emb=sv_emb), repeat)
+    onnx_audio, onnx_vits = timed(lambda: vits_decoder.decode(
+        codes, text_seq, [spec.float()], noise_scale=0.0, sv_emb=sv_emb), repeat)
+    n = min(torch_audio.shape[-1], onnx_audio.shape[-1])
+    max_diff = (torch_audio[..., :n] - onnx_audio[..., :n]).abs().max().item()
+
+    report = {
+        "t2s_tokens": (len(torch_tokens), len(onnx_tokens)),
+        "t2s_token_match": token_match,
+        "t2s_seconds": (torch_t2s, onnx_t2s),
+        "vits_max_abs_diff": max_diff,
+        "vits_seconds": (torch_vits, onnx_vits),
+    }
+    print(f"[ONNX] T2S 语义 token: PyTorch {len(torch_tokens)} / ONNX {len(onnx_tokens)}，逐位一致率 {token_match:.1%}")
+    print(f"[ONNX] T2S 解码耗时: PyTorch {torch_t2s:.3f}s / ONNX {onnx_t2s:.3f}s，加速比 {torch_t2s / onnx_t2s:.2f}x")
+    print(f"[ONNX] SoVITS 波形最大误差: {max_diff:.2e}")
+    print(f"[ONNX] SoVITS 解码耗时: PyTorch {torch_vits:.3f}s / ONNX {onnx_vits:.3f}s，加速比 {torch_vits / onnx_vits:.2f}x")
+    return report
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+GPT-SoVITS 推理图的 ONNX 导出。
+把 T2S 文本编码器、首步解码器、逐 token 解码器以及 SoVITS 解码器分别导出为独立的 ONNX 图，
+并写入 meta.json 记录源权重指纹，供 onnx_engine 载入时校验是否与当前角色的 ckpt/pth 一致。
+"""
+
+import os
+import json
+
+import torch
+from torch import nn
+
+from AR.models.t2s_lightning_module_onnx import Text2SemanticLightningModule
+from module.models_onnx import SynthesizerTrn
+from process_ckpt import get_sovits_version_from_path_fast, load_sovits_new
+
+T2S_ENCODER_FILE = "t2s_encoder.onnx"
+T2S_FIRST_STAGE_FILE = "t2s_fsdec.onnx"
+T2S_STAGE_FILE = "t2s_sdec.onnx"
+VITS_FILE = "vits.onnx"
+META_FILE = "meta.json"
+
+
+def weights_fingerprint(path: str) -> dict:
+    """权重文件指纹：绝对路径 + 修改时间 + 大小，任一变化即视为需要重新导出"""
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "mtime": st.st_mtime, "size": st.st_size}
+
+
+class T2SEncoder(nn.Module):
+    """音素 id + BERT 特征 -> 带位置编码的文本嵌入"""
+
+    def __init__(self, t2s):
+        super().__init__()
+        self.encoder = t2s.onnx_encoder
+
+    def forward(self, all_phoneme_ids, bert_feature):
+        return self.encoder(all_phoneme_ids, bert_feature)
+
+
+class VitsDecoder(nn.Module):
+    """语义 token + 目标音素 + 参考频谱 (+ v2Pro 说话人嵌入) -> 波形"""
+
+    def __init__(self, vits):
+        super().__init__()
+        self.vits = vits
+
+    def forward(self, codes, text, refer, noise_scale, sv_emb=None):
+        return self.vits(codes, text, refer, noise_scale=noise_scale, sv_emb=sv_emb)[0, 0]
+
+
+def load_t2s_onnx_model(t2s_weights_path: str):
+    """以 ONNX 友好的模块结构载入 GPT(T2S) 权重，返回 (Text2SemanticDecoder, 配置)"""
+    dict_s1 = torch.load(t2s_weights_path, map_location="cpu", weights_only=False)
+    config = dict_s1["config"]
+    module = Text2SemanticLightningModule(config, "****", is_train=False)
+    module.load_state_dict(dict_s1["weight"])
+    model = module.model.float().eval()
+    model.init_onnx()
+    return model, config
+
+
+def load_vits_onnx_model(vits_weights_path: str):
+    """以 ONNX 友好的模块结构载入 SoVITS 权重，返回 (SynthesizerTrn, 模型版本, hps)。v3/v4 依赖 CFM + 声码器，不支持导出"""
+    _, model_version, if_lora_v3 = get_sovits_version_from_path_fast(vits_weights_path)
+    if model_version in {"v3", "v4"} or if_lora_v3:
+        raise ValueError(f"ONNX 导出暂不支持 SoVITS {model_version} 模型，仅支持 v1 / v2 / v2Pro / v2ProPlus")
+
+    dict_s2 = load_sovits_new(vits_weights_path)
+    hps = dict_s2["config"]
+    hps["model"]["semantic_frame_rate"] = "25hz"
+    if dict_s2["weight"]["enc_p.text_embedding.weight"].shape[0] == 322:
+        hps["model"]["version"] = "v1"
+    elif "Pro" in model_version:
+        hps["model"]["version"] = model_version
+    else:
+        hps["model"]["version"] = "v2"
+
+    vits = SynthesizerTrn(
+        hps["data"]["filter_length"] // 2 + 1,
+        hps["train"]["segment_size"] // hps["data"]["hop_length"],
+        n_speakers=hps["data"]["n_speakers"],
+        **hps["model"],
+    )
+    vits.load_state_dict(dict_s2["weight"], strict=False)
+    vits = vits.float().eval()
+    return vits, hps["model"]["version"], hps
+
+
+@torch.no_grad()
+def export_onnx(t2s_weights_path: str, vits_weights_path: str, output_dir: str) -> dict:
+    """
+    导出四张 ONNX 图到 output_dir，返回写入的 meta 信息。
+
+    参数:
+        t2s_weights_path: GPT(T2S) 模型 (.ckpt) 绝对路径
+        vits_weights_path: SoVITS 模型 (.pth) 绝对路径
+        output_dir: 导出目录（通常为角色文件夹下的 onnx/）
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    t2s, t2s_config = load_t2s_onnx_model(t2s_weights_path)
+    vits, vits_version, hps = load_vits_onnx_model(vits_weights_path)
+    is_v2pro = vits_version in {"v2Pro", "v2ProPlus"}
+
+    # 示例输入只决定图结构，长度维度均导出为动态轴
+    phone_len, prompt_len = 40, 100
+    all_phoneme_ids = torch.randint(1, 300, (1, phone_len), dtype=torch.long)
+    bert_feature = torch.randn(1, 1024, phone_len)
+    prompts = torch.randint(0, 1024, (1, prompt_len), dtype=torch.long)
+
+    print("[ONNX] 正在导出 T2S 文本编码器...")
+    encoder = T2SEncoder(t2s)
+    torch.onnx.export(
+        encoder,
+        (all_phoneme_ids, bert_feature),
+        os.path.join(output_dir, T2S_ENCODER_FILE),
+        input_names=["all_phoneme_ids", "bert_feature"],
+        output_names=["x"],
+        dynamic_axes={"all_phoneme_ids": {1: "phone_length"}, "bert_feature": {2: "phone_length"}, "x": {1: "phone_length"}},
+        opset_version=16,
+    )
+
+    print("[ONNX] 正在导出 T2S 首步解码器...")
+    x = encoder(all_phoneme_ids, bert_feature)
+    torch.onnx.export(
+        t2s.first_stage_decoder,
+        (x, prompts),
+        os.path.join(output_dir, T2S_FIRST_STAGE_FILE),
+        input_names=["x", "prompts"],
+        output_names=["y", "k", "v", "y_emb", "x_example", "logits"],
+        dynamic_axes={"x": {1: "x_length"}, "prompts": {1: "prompts_length"}},
+        opset_version=16,
+    )
+
+    print("[ONNX] 正在导出 T2S 逐 token 解码器...")
+    y, k, v, y_emb, x_example, _ = t2s.first_stage_decoder(x, prompts)
+    torch.onnx.export(
+        t2s.stage_decoder,
+        (y, k, v, y_emb, x_example),
+        os.path.join(output_dir, T2S_STAGE_FILE),
+        input_names=["iy", "ik", "iv", "iy_emb", "ix_example"],
+        output_names=["y", "k", "v", "y_emb", "logits", "samples"],
+        dynamic_axes={
+            "iy": {1: "iy_length"},
+            "ik": {1: "ik_length"},
+            "iv": {1: "iv_length"},
+            "iy_emb": {1: "iy_emb_length"},
+            "ix_example": {1: "ix_example_length"},
+        },
+        opset_version=16,
+    )
+
+    print("[ONNX] 正在导出 SoVITS 解码器...")
+    codes = torch.randint(0, 1024, (1, 1, 60), dtype=torch.long)
+    text = torch.randint(1, 300, (1, phone_len), dtype=torch.long)
+    refer = torch.randn(1, hps["data"]["filter_length"] // 2 + 1, 200)
+    noise_scale = torch.tensor(0.5)
+    args = (codes, text, refer, noise_scale)
+    input_names = ["codes", "text", "refer", "noise_scale"]
+    dynamic_axes = {"codes": {2: "code_length"}, "text": {1: "text_length"}, "refer": {2: "refer_length"}, "audio": {0: "audio_length"}}
+    if is_v2pro:
+        args += (torch.randn(1, 20480),)
+        input_names.append("sv_emb")
+    torch.onnx.export(
+        VitsDecoder(vits),
+        args,
+        os.path.join(output_dir, VITS_FILE),
+        input_names=input_names,
+        output_names=["audio"],
+        dynamic_axes=dynamic_axes,
+        opset_version=17,
+    )
+
+    meta = {
+        "t2s": weights_fingerprint(t2s_weights_path),
+        "vits": weights_fingerprint(vits_weights_path),
+        "vits_version": vits_version,
+        "is_v2pro": is_v2pro,
+        "num_layers": t2s.num_layers,
+        "eos": t2s.EOS,
+        "max_sec": t2s_config["data"]["max_sec"],
+        "sampling_rate": hps["data"]["sampling_rate"],
+    }
+    with open(os.path.join(output_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=4)
+    print(f"[ONNX] 导出完成: {output_dir}")
+    return meta
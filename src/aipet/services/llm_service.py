@@ -1,27 +1,119 @@
 import threading
-import requests
 import json
-from aipet.signals import WorkerSignals
+import socket
+
+# 进程内共享的 HTTP 会话：连接池按主机复用 keep-alive 连接，后续每轮对话省去 TCP 与 TLS 握手
+LLM_POOL_MAXSIZE = 4
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """惰性创建全局 requests.Session（requests 体积较大，首次对话时才导入）"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=LLM_POOL_MAXSIZE, pool_maxsize=LLM_POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def close_response(response):
+    """
+    立即中断流式响应：先 shutdown 底层 socket 唤醒阻塞在 recv 上的读取线程，再关闭响应。
+    中途关闭的连接不会回到连接池，池中其余空闲连接不受影响。
+    """
+    try:
+        conn = getattr(response.raw, "_connection", None)
+        sock = getattr(conn, "sock", None)
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    try:
+        response.close()
+    except Exception:
+        pass
+
+# 各发音模式的默认分句策略：
+#   - sentence：仅在句尾标点处切分（原始行为）
+#   - adaptive：首段在逗号处（达到 first_min_chars）或累计到 first_max_chars 仍无标点时提前切出，缩短首包语音延迟；
+#               之后每切出一段，逗号切分所需的最小长度按 growth 倍增（上限 max_min_chars），让后续句子恢复完整语调
+SPLITTER_POLICIES = {
+    # Edge-TTS 单次调用的固定开销主要是一次网络往返，短片段代价低，可尽早切出
+    "edge_tts": {"mode": "adaptive", "first_min_chars": 4, "first_max_chars": 16, "growth": 2.0, "max_min_chars": 48},
+    # RVC 在 Edge-TTS 之后还要做一次 Hubert 特征提取与变声，片段过短时固定开销占比偏高
+    "rvc": {"mode": "adaptive", "first_min_chars": 6, "first_max_chars": 20, "growth": 2.0, "max_min_chars": 48},
+    # GPT-SoVITS 每次调用都要完整跑一遍 T2S 自回归与声码器，且过短文本韵律较差，首段切得稍长
+    "gpt_sovits": {"mode": "adaptive", "first_min_chars": 8, "first_max_chars": 24, "growth": 2.0, "max_min_chars": 64},
+}
+
+
+def get_splitter_policy(voice_mode, overrides=None):
+    """取得某发音模式的分句策略，overrides 为 settings.json 中 app.splitter 的按模式覆盖项"""
+    policy = dict(SPLITTER_POLICIES.get(voice_mode, {"mode": "sentence"}))
+    if overrides:
+        policy.update(overrides.get(voice_mode, {}))
+    return policy
+
 
 class SentenceSplitter:
-    """实时文本分句器，在接收流式文本时动态按句尾标点切分出完整的句子"""
-    def __init__(self):
+    """实时文本分句器，在接收流式文本时动态按句尾标点切分出完整的句子；adaptive 模式下首句可在子句处提前切出"""
+    def __init__(self, policy=None):
         self.buffer = ""
         # 常见的中英文句尾结束符，包含换行
         self.delimiters = {'。', '！', '？', '；', '\n', '!', '?', ';'}
+        # 子句分隔符，仅 adaptive 模式下在达到长度阈值后作为切分点
+        self.soft_delimiters = {'，', '、', '：', ',', ':'}
+
+        policy = policy or {}
+        self.adaptive = policy.get("mode", "sentence") == "adaptive"
+        self.first_min_chars = policy.get("first_min_chars", 6)
+        self.first_max_chars = policy.get("first_max_chars", 20)
+        self.growth = policy.get("growth", 2.0)
+        self.max_min_chars = policy.get("max_min_chars", 48)
+        self.emitted_count = 0  # 已切出的片段数
+
+    @property
+    def min_chars(self):
+        """当前在子句处切分所需的最小长度，随已切出的片段数递增"""
+        # 指数封顶：长回复切出上千段后 growth ** emitted_count 会浮点溢出
+        return min(self.max_min_chars, self.first_min_chars * self.growth ** min(self.emitted_count, 64))
+
+    def _emit(self, sentences, piece):
+        piece = piece.strip()
+        if piece:
+            sentences.append(piece)
+            self.emitted_count += 1
 
     def feed(self, text):
         """输入新增的文本片段，返回切分出的完整句子列表"""
         sentences = []
+        # buffer 中已有的文本在上次 feed 时已按相同的起点与阈值检查过，只需扫描新增部分
+        scan_from = len(self.buffer)
         self.buffer += text
         start = 0
-        for i, char in enumerate(self.buffer):
-            if char in self.delimiters:
-                sentence = self.buffer[start:i+1].strip()
-                if sentence:
-                    sentences.append(sentence)
+        for i in range(scan_from, len(self.buffer)):
+            char = self.buffer[i]
+            if char in self.delimiters or (
+                self.adaptive and char in self.soft_delimiters and i + 1 - start >= self.min_chars
+            ):
+                self._emit(sentences, self.buffer[start:i+1])
                 start = i + 1
         self.buffer = self.buffer[start:]
+
+        # 首段迟迟等不到任何标点时按长度强制切出，优先在空格处断开以免截断英文单词
+        if self.adaptive and self.emitted_count == 0 and len(self.buffer.strip()) >= self.first_max_chars:
+            cut = self.buffer.rstrip().rfind(' ')
+            if cut < len(self.buffer) // 2:
+                cut = len(self.buffer)
+            self._emit(sentences, self.buffer[:cut])
+            self.buffer = self.buffer[cut:]
         return sentences
 
     def flush(self):
@@ -32,8 +124,83 @@ class SentenceSplitter:
             return [sentence]
         return []
 
+def iter_sse_content(lines):
+    """
+    解析 OpenAI 兼容接口的 SSE 流，逐个产出 delta.content 文本增量。
+    遇到 [DONE] 后不再产出，但仍把流读到结尾（分块结束标记），keep-alive 连接才会自动归还连接池供下一轮复用。
+    """
+    done = False
+    for line in lines:
+        if done or not line:
+            continue
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line.startswith("data: "):
+            continue
+
+        data_str = line[6:]
+        if data_str == "[DONE]":
+            done = True
+            continue
+        try:
+            delta = json.loads(data_str)['choices'][0]['delta']
+        except Exception:
+            continue
+        content = delta.get('content')
+        if content:
+            yield content
+
+
+class ThinkTagFilter:
+    """
+    流式过滤推理模型（如 DeepSeek R1）回复开头的 <think>...</think> 思考内容。
+    每个片段只处理一次：开头阶段仅暂存前导空白与可能构成 <think> 前缀的几个字符，思考阶段仅保留可能构成
+    </think> 前缀的尾部，因此标签被拆分到多个片段时也能识别，且不会随回复变长而重复扫描。
+    """
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self.state = "start"  # start: 尚未确定是否以 <think> 开头；think: 思考内容中；answer: 正文
+        self.pending = ""
+
+    def feed(self, chunk):
+        """输入一个文本增量，返回其中应输出的正文部分"""
+        if self.state == "answer":
+            return chunk
+
+        if self.state == "start":
+            self.pending += chunk
+            head = self.pending.lstrip()
+            if not head or (len(head) < len(self.OPEN_TAG) and self.OPEN_TAG.startswith(head)):
+                return ""
+            if not head.startswith(self.OPEN_TAG):
+                # 普通模型：暂存的开头文本（含前导空白）原样输出
+                self.state = "answer"
+                text, self.pending = self.pending, ""
+                return text
+            self.state = "think"
+            chunk, self.pending = head[len(self.OPEN_TAG):], ""
+
+        text = self.pending + chunk
+        end = text.find(self.CLOSE_TAG)
+        if end < 0:
+            self.pending = text[-(len(self.CLOSE_TAG) - 1):]
+            return ""
+        self.state = "answer"
+        self.pending = ""
+        return text[end + len(self.CLOSE_TAG):]
+
+    def flush(self):
+        """流结束时输出开头阶段仍在暂存的文本；未闭合的思考内容直接丢弃"""
+        text = self.pending if self.state == "start" else ""
+        self.pending = ""
+        return text
+
+
 class LLMWorker(threading.Thread):
-    def __init__(self, text, prompt, chat_history, key, url, model, signals: WorkerSignals):
+    def __init__(self, text, prompt, chat_history, key, url, model, signals, splitter_policy=None):
         super().__init__(daemon=True)
         self.text = text
         self.prompt = prompt
@@ -42,11 +209,27 @@ class LLMWorker(threading.Thread):
         self.url = url
         self.model = model
         self.signals = signals
+        self.splitter_policy = splitter_policy
         self._is_aborted = False # 支持在运行中途打断
+        self._response = None
+        self._response_lock = threading.Lock()
 
     def abort(self):
-        """打断标志位设置"""
+        """打断：设置标志位并立即关闭正在读取的响应流，不再继续下载剩余 token"""
         self._is_aborted = True
+        with self._response_lock:
+            response = self._response
+        if response is not None:
+            close_response(response)
+
+    def _set_response(self, response):
+        """登记当前响应；若在请求返回前已被打断，则直接关闭并返回 False"""
+        with self._response_lock:
+            self._response = response
+            aborted = self._is_aborted
+        if aborted:
+            close_response(response)
+        return not aborted
 
     def run(self):
         print(f"[DEBUG] Starting streaming chat thread with input: {repr(self.text)}")
@@ -56,6 +239,7 @@ class LLMWorker(threading.Thread):
             self.signals.chat_finished.emit("大脑配置错误，请在控制台设置 API Key")
             return
             
+        consumed = False
         try:
             # 构建消息上下文
             messages = [{"role": "system", "content": self.prompt}]
@@ -64,7 +248,7 @@ class LLMWorker(threading.Thread):
             
             print(f"[DEBUG] Sending streaming request to LLM...")
 
-            r = requests.post(
+            r = get_session().post(
                 self.url,
                 headers={"Authorization": f"Bearer {self.key}"},
                 json={"model": self.model, "messages": messages, "stream": True},
@@ -72,67 +256,44 @@ class LLMWorker(threading.Thread):
                 proxies={"http": None, "https": None},
                 stream=True
             )
+            if not self._set_response(r):
+                print("[DEBUG] LLMWorker aborted before streaming.")
+                return
             print(f"[DEBUG] Response Status Code: {r.status_code}")
             
             if r.status_code != 200:
                 self.signals.chat_finished.emit(f"大脑出错啦，状态码: {r.status_code}")
                 return
 
-            splitter = SentenceSplitter()
+            splitter = SentenceSplitter(self.splitter_policy)
+            think_filter = ThinkTagFilter()
             sentence_index = 0
-            accumulated_text = ""
-            emitted_text = ""
-            
-            # 按行解析 SSE (Server-Sent Events) 流数据
-            for line in r.iter_lines():
+            emitted_parts = []
+
+            def emit(new_chars):
+                nonlocal sentence_index
+                if not new_chars:
+                    return
+                emitted_parts.append(new_chars)
+                self.signals.chat_chunk.emit(new_chars)
+                for sentence in splitter.feed(new_chars):
+                    self.signals.sentence_ready.emit(sentence_index, sentence)
+                    sentence_index += 1
+
+            # 按行解析 SSE (Server-Sent Events) 流数据，并过滤 DeepSeek R1 等推理模型的 <think> 思考内容
+            for chunk in iter_sse_content(r.iter_lines()):
                 if self._is_aborted:
                     print("[DEBUG] LLMWorker aborted mid-stream.")
                     return
-                    
-                if not line:
-                    continue
-                decoded_line = line.decode('utf-8').strip()
-                if not decoded_line.startswith("data: "):
-                    continue
-                
-                data_str = decoded_line[6:]
-                if data_str == "[DONE]":
-                    break
-                
-                try:
-                    data_json = json.loads(data_str)
-                    delta = data_json['choices'][0]['delta']
-                    if 'content' in delta:
-                        chunk = delta['content']
-                        accumulated_text += chunk
-                        
-                        # 过滤 DeepSeek R1 的 <think> 思考内容
-                        clean_text = accumulated_text.lstrip()
-                        if clean_text.startswith("<think>"):
-                            if "</think>" in clean_text:
-                                # 提取思维链结束后的实际回答部分
-                                actual_content = clean_text.split("</think>", 1)[1]
-                                # 获取最新增量并流式发送
-                                new_chars = actual_content[len(emitted_text):]
-                                if new_chars:
-                                    emitted_text += new_chars
-                                    self.signals.chat_chunk.emit(new_chars)
-                                    sentences = splitter.feed(new_chars)
-                                    for sentence in sentences:
-                                        self.signals.sentence_ready.emit(sentence_index, sentence)
-                                        sentence_index += 1
-                        else:
-                            # 正常非推理模型直接输出
-                            new_chars = accumulated_text[len(emitted_text):]
-                            if new_chars:
-                                emitted_text += new_chars
-                                self.signals.chat_chunk.emit(new_chars)
-                                sentences = splitter.feed(new_chars)
-                                for sentence in sentences:
-                                    self.signals.sentence_ready.emit(sentence_index, sentence)
-                                    sentence_index += 1
-                except Exception:
-                    pass
+                emit(think_filter.feed(chunk))
+
+            # 被打断时响应流已在 abort() 中关闭，迭代可能提前正常结束
+            if self._is_aborted:
+                print("[DEBUG] LLMWorker aborted mid-stream.")
+                return
+            consumed = True
+            emit(think_filter.flush())
+            emitted_text = "".join(emitted_parts)
 
             # 流式结束，清洗分句器缓存
             remaining = splitter.flush()
@@ -152,6 +313,16 @@ class LLMWorker(threading.Thread):
             self.signals.chat_finished.emit(final_resp)
 
         except Exception as e:
+            if self._is_aborted:
+                # abort() 关闭连接后读取线程收到的连接错误属于预期
+                print("[DEBUG] LLMWorker aborted mid-stream.")
+                return
             print(f"LLM Stream Error: {e}")
             self.signals.chat_finished.emit(f"大脑出错啦: {e}")
+        finally:
+            with self._response_lock:
+                response, self._response = self._response, None
+            # 已读到结尾的响应其连接已自动归还连接池，不再关闭；被打断的响应已在 abort() 中关闭
+            if response is not None and not consumed and not self._is_aborted:
+                response.close()
 
@@ -0,0 +1,63 @@
+import os
+import json
+import hashlib
+
+import torch
+from torch import nn
+
+
+def quantize_dynamic_int8(module):
+    """对模块内全部 nn.Linear 做动态 int8 量化（权重离线量化为 int8，激活在运行时按批量化），仅适用于 CPU 推理"""
+    return torch.ao.quantization.quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8)
+
+
+def _source_fingerprint(path):
+    """源权重指纹：文件取修改时间与大小；目录（如 HuggingFace 模型文件夹）取其中每个文件的指纹"""
+    path = os.path.abspath(path)
+    if os.path.isdir(path):
+        files = sorted(
+            (name, os.stat(os.path.join(path, name))) for name in os.listdir(path)
+            if os.path.isfile(os.path.join(path, name))
+        )
+        return [path, [[name, st.st_mtime, st.st_size] for name, st in files]]
+    st = os.stat(path)
+    return [path, st.st_mtime, st.st_size]
+
+
+def quantized_cache_path(cache_dir, kind, source_path):
+    """int8 量化权重的缓存文件路径，按模型类别与源权重指纹寻址；torch 版本变化时同样失效（打包格式随版本变化）"""
+    blob = json.dumps([kind, _source_fingerprint(source_path), torch.__version__], ensure_ascii=False)
+    digest = hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{kind}-{digest}.pt")
+
+
+def load_or_quantize(cache_path, build_float, build_skeleton):
+    """
+    载入或生成动态 int8 量化模型。
+
+    参数:
+        cache_path: 量化权重缓存文件路径（见 quantized_cache_path）
+        build_float: 构造并载入 fp32 权重的模型，缓存缺失时调用
+        build_skeleton: 构造结构相同但不载入权重的模型；缓存命中时在其量化版本上载入缓存的 int8 权重，
+            省去读取 fp32 权重与重新量化的开销
+    """
+    if os.path.exists(cache_path):
+        try:
+            model = quantize_dynamic_int8(build_skeleton().eval())
+            # 量化 Linear 的打包参数不是普通张量，需完整反序列化；缓存文件由本程序生成
+            model.load_state_dict(torch.load(cache_path, map_location="cpu", weights_only=False))
+            print(f"[Quant] 已载入 int8 量化权重缓存: {os.path.basename(cache_path)}")
+            return model
+        except Exception as e:
+            print(f"[Warning] int8 量化权重缓存载入失败，重新量化: {e}")
+
+    model = quantize_dynamic_int8(build_float().eval())
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        torch.save(model.state_dict(), tmp_path)
+        os.replace(tmp_path, cache_path)
+        print(f"[Quant] 已生成 int8 量化权重缓存: {os.path.basename(cache_path)}")
+    except Exception as e:
+        print(f"[Warning] int8 量化权重缓存写入失败: {e}")
+    return model
@@ -26,13 +26,18 @@ if sys.platform == "win32" and hasattr(os, "add_dll_directory"):
                 except Exception:
                     pass
 
+import threading
+from collections import OrderedDict
+
 import torch
 import numpy as np
 import soundfile as sf
 
 from aipet.services.rvc.config import Config
-from aipet.services.rvc.pipeline import Pipeline
+from aipet.services.rvc.pipeline import Pipeline, clear_index_cache
 from aipet.services.rvc.audio import load_audio
+from aipet.services.weights_store import convert_checkpoint, is_converted, load_checkpoint, torch_load
+from aipet.services.quantization import load_or_quantize, quantized_cache_path
 from aipet.services.rvc.infer_pack.models import (
     SynthesizerTrnMs256NSFsid,
     SynthesizerTrnMs256NSFsid_nono,
@@ -41,28 +46,246 @@ from aipet.services.rvc.infer_pack.models import (
 )
 
 _hubert_model = None
+_hubert_int8 = False  # 当前单例是否为 int8 量化版本
+
+# Hubert 权重中推理用不到的字段，载入与转换时都会丢弃
+HUBERT_UNUSED_KEYS = ("mask_emb", "label_embs_concat")
 
-def load_hubert(hubert_path, config):
-    """单例模式载入 Hubert 语义模型，避免重复加载引起内存泄露"""
-    global _hubert_model
-    if _hubert_model is not None:
+def load_hubert(hubert_path, config, int8_cache_dir=None):
+    """
+    单例模式载入 Hubert 语义模型，避免重复加载引起内存泄露。
+    int8_cache_dir 非空且在 CPU 上推理时改为动态 int8 量化版本，量化权重缓存到该目录。
+    """
+    global _hubert_model, _hubert_int8
+    int8 = bool(int8_cache_dir) and config.device == "cpu"
+    if _hubert_model is not None and _hubert_int8 == int8:
         return _hubert_model
-    
+
+    if int8:
+        from aipet.services.rvc.hubert import HubertModel
+        _hubert_model = load_or_quantize(
+            quantized_cache_path(int8_cache_dir, "rvc_hubert", hubert_path),
+            lambda: _load_float_hubert(hubert_path, "cpu"),
+            HubertModel,
+        )
+        _hubert_int8 = True
+        return _hubert_model
+
+    _hubert_model = _load_float_hubert(hubert_path, config.device)
+    _hubert_int8 = False
+    return _hubert_model
+
+
+def _load_float_hubert(hubert_path, device):
     from aipet.services.rvc.hubert import HubertModel
     model = HubertModel()
     
-    # 加载已提取的纯权重 (hubert_base_state.pt / ContentVec)
-    # 显式设置 weights_only=False 以兼容 PyTorch 2.6+ 默认的安全反序列化机制限制
-    state_dict = torch.load(hubert_path, map_location="cpu", weights_only=False)
+    # 加载已提取的纯权重 (hubert_base_state.pt / ContentVec)；已转换为 safetensors 时以内存映射载入
+    state_dict, mmapped = load_checkpoint(hubert_path, torch_load)
     # 过滤掉不需要的 mask_emb 和 label_embs_concat 字段
-    for k in ["mask_emb", "label_embs_concat"]:
+    for k in HUBERT_UNUSED_KEYS:
         if k in state_dict:
             del state_dict[k]
             
-    model.load_state_dict(state_dict)
-    model.to(config.device).eval()
-    _hubert_model = model
-    return _hubert_model
+    model.load_state_dict(state_dict, assign=mmapped)
+    return model.to(device).eval()
+
+class RVCEngine(object):
+    """已构建完毕、可直接推理的 RVC 变声引擎（net_g + tgt_sr + if_f0 + version + Pipeline）"""
+
+    def __init__(self, model_path, device="cpu"):
+        config = Config()
+        config.device = device
+
+        # 1. 载入角色专属变声权重 (.pth)；已转换为 safetensors 时以内存映射载入，参数直接引用映射页
+        cpt, mmapped = load_checkpoint(model_path, torch_load)
+        tgt_sr = cpt["config"][-1]
+        cpt["config"][-3] = cpt["weight"]["emb_g.weight"].shape[0]  # n_spk
+        if_f0 = cpt.get("f0", 1)
+        version = cpt.get("version", "v1")
+
+        # 根据模型版本和是否支持音高，选取对应的前向合成网络类
+        if version == "v1":
+            if if_f0 == 1:
+                net_g = SynthesizerTrnMs256NSFsid(*cpt["config"], is_half=config.is_half)
+            else:
+                net_g = SynthesizerTrnMs256NSFsid_nono(*cpt["config"])
+        else:
+            if if_f0 == 1:
+                net_g = SynthesizerTrnMs768NSFsid(*cpt["config"], is_half=config.is_half)
+            else:
+                net_g = SynthesizerTrnMs768NSFsid_nono(*cpt["config"])
+
+        # 载入 state_dict 权重数据，推理阶段不需要后验编码器 enc_q
+        net_g.load_state_dict(cpt["weight"], strict=False, assign=mmapped)
+        if hasattr(net_g, "enc_q"):
+            del net_g.enc_q
+        net_g.eval().to(config.device)
+        del cpt
+
+        self.model_path = model_path
+        self.device = device
+        self.config = config
+        self.net_g = net_g
+        self.tgt_sr = tgt_sr
+        self.if_f0 = if_f0
+        self.version = version
+        self.pipeline = Pipeline(tgt_sr, config)
+        self.nbytes = _module_nbytes(net_g)
+        # Pipeline 推理非线程安全，对话变声与后台预渲染共用同一引擎时以该锁串行化
+        self.lock = threading.Lock()
+
+
+def _module_nbytes(module):
+    """统计模块全部参数与缓冲区占用的字节数，用于缓存内存上限判定"""
+    total = 0
+    for t in list(module.parameters()) + list(module.buffers()):
+        total += t.numel() * t.element_size()
+    return total
+
+
+# 缓存已构建的 RVC 引擎，键为：(model_path, device)，按最近使用顺序排列 (LRU)
+_engine_cache = OrderedDict()
+_engine_cache_lock = threading.RLock()
+
+# 缓存上限：最多常驻的角色数与总字节数（单个 RVC v2 模型约 55MB）
+RVC_CACHE_MAX_ENTRIES = 4
+RVC_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _enforce_cache_limit():
+    """按 LRU 顺序淘汰旧引擎，直到条目数与总内存都落在上限之内（至少保留最近使用的一个）"""
+    while len(_engine_cache) > 1 and (
+        len(_engine_cache) > RVC_CACHE_MAX_ENTRIES
+        or sum(e.nbytes for e in _engine_cache.values()) > RVC_CACHE_MAX_BYTES
+    ):
+        key, engine = _engine_cache.popitem(last=False)
+        print(f"[RVC] 内存上限已满，淘汰变声引擎: {key[0]} ({engine.nbytes / 1024 / 1024:.1f} MB)")
+
+
+def get_engine(model_path, device="cpu"):
+    """获取或构建指定 (model_path, device) 的 RVC 引擎实例（带 LRU 内存缓存）"""
+    cache_key = (os.path.abspath(model_path), device)
+    with _engine_cache_lock:
+        engine = _engine_cache.get(cache_key)
+        if engine is not None:
+            _engine_cache.move_to_end(cache_key)
+            return engine
+
+        print(f"[RVC] 正在载入变声引擎 (设备: {device}): {model_path}")
+        engine = RVCEngine(model_path, device)
+        _engine_cache[cache_key] = engine
+        _enforce_cache_limit()
+        return engine
+
+
+def warmup(model_path, hubert_path=None, device="cpu", int8_cache_dir=None):
+    """预先载入 RVC 引擎与 Hubert 语义模型，使首句合成时只剩纯推理耗时"""
+    engine = get_engine(model_path, device)
+    if hubert_path:
+        load_hubert(hubert_path, engine.config, int8_cache_dir)
+    return engine
+
+
+def convert_weights(model_path=None, hubert_path=None):
+    """
+    把 RVC 变声权重 (cpt["weight"] 以及 config/f0/version 等配置) 与 Hubert 语义模型一次性转换为
+    safetensors + JSON（写在原文件旁边），之后载入时自动走内存映射。已是最新的会跳过。返回新转换的文件数。
+    """
+    converted = 0
+    for path, weight_key, drop_keys in ((model_path, "weight", ()), (hubert_path, None, HUBERT_UNUSED_KEYS)):
+        if not path:
+            continue
+        if not os.path.exists(path):
+            print(f"[Weights] 权重文件不存在，跳过: {path}")
+            continue
+        if is_converted(path):
+            print(f"[Weights] 已是最新，跳过: {path}")
+            continue
+        convert_checkpoint(path, torch_load(path), weight_key=weight_key, drop_keys=drop_keys)
+        converted += 1
+    return converted
+
+
+def evict(model_path=None, device=None):
+    """从缓存中移除匹配的 RVC 引擎；不传参数时清空全部缓存（连同已载入的 faiss 索引）。返回被移除的引擎数"""
+    if model_path is None and device is None:
+        clear_index_cache()
+    with _engine_cache_lock:
+        keys = [
+            k for k in _engine_cache
+            if (model_path is None or k[0] == os.path.abspath(model_path))
+            and (device is None or k[1] == device)
+        ]
+        for k in keys:
+            del _engine_cache[k]
+    return len(keys)
+
+
+def rvc_convert_audio(
+    model_path,
+    index_path,
+    hubert_path,
+    audio,
+    sr,
+    f0_up_key=0,
+    f0_method="pm",
+    index_rate=0.75,
+    rms_mix_rate=0.25,
+    protect=0.33,
+    device="cpu",
+    int8_cache_dir=None,
+):
+    """
+    对内存中的音频数组执行 RVC 变声，不经过任何临时文件
+
+    参数:
+        audio: float32 单声道音频数组
+        sr: audio 的采样率（非 16kHz 时在内部一次性重采样）
+        int8_cache_dir: 非空时 Hubert 语义模型改用动态 int8 量化版本，量化权重缓存到该目录
+    返回:
+        (tgt_sr, int16 PCM 数组)
+    """
+    # 1. 获取已缓存的角色专属变声引擎（首次调用时才会载入 .pth 并构建网络）
+    engine = get_engine(model_path, device)
+
+    # 2. 载入通用的 Hubert 语义编码模型
+    hubert_model = load_hubert(hubert_path, engine.config, int8_cache_dir)
+
+    # 3. 统一到 Hubert 所需的 16kHz 并做幅度归一
+    audio = np.asarray(audio, dtype=np.float32)
+    if sr != 16000:
+        import librosa
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=16000)
+    audio_max = np.abs(audio).max() / 0.95
+    if audio_max > 1:
+        audio = audio / audio_max
+
+    # 4. 执行变声 Pipeline 推理；基频缓存由 Pipeline 按音频内容寻址，这里只传入标识
+    times = [0, 0, 0]
+
+    with engine.lock:
+        audio_opt = engine.pipeline.pipeline(
+            hubert_model,
+            engine.net_g,
+            0,  # Speaker ID (单说话人默认为 0)
+            audio,
+            "mem://input",
+            times,
+            f0_up_key,
+            f0_method,
+            index_path if index_path and os.path.exists(index_path) else "",
+            index_rate,
+            engine.if_f0,
+            3,  # filter_radius 滤波器半径
+            engine.tgt_sr,
+            engine.tgt_sr,  # resample_sr 目标重采样率
+            rms_mix_rate,
+            engine.version,
+            protect,
+        )
+    return engine.tgt_sr, audio_opt
+
 
 def rvc_convert(
     model_path,
@@ -75,69 +298,30 @@ def rvc_convert(
     index_rate=0.75,
     rms_mix_rate=0.25,
     protect=0.33,
+    device="cpu",
+    int8_cache_dir=None,
 ):
     """
     RVC 一键式变声转换核心包装接口 (自包含推理链)
     """
-    config = Config()
-    
-    # 1. 载入角色专属变声权重 (.pth)
-    # 显式设置 weights_only=False 防止 PyTorch 2.6+ 因反序列化安全规则报错
-    cpt = torch.load(model_path, map_location="cpu", weights_only=False)
-    tgt_sr = cpt["config"][-1]
-    cpt["config"][-3] = cpt["weight"]["emb_g.weight"].shape[0]  # n_spk
-    if_f0 = cpt.get("f0", 1)
-    version = cpt.get("version", "v1")
-    
-    # 根据模型版本和是否支持音高，选取对应的前向合成网络类
-    if version == "v1":
-        if if_f0 == 1:
-            net_g = SynthesizerTrnMs256NSFsid(*cpt["config"], is_half=config.is_half)
-        else:
-            net_g = SynthesizerTrnMs256NSFsid_nono(*cpt["config"])
-    else:
-        if if_f0 == 1:
-            net_g = SynthesizerTrnMs768NSFsid(*cpt["config"], is_half=config.is_half)
-        else:
-            net_g = SynthesizerTrnMs768NSFsid_nono(*cpt["config"])
-            
-    # 载入 state_dict 权重数据
-    net_g.load_state_dict(cpt["weight"], strict=False)
-    net_g.eval().to(config.device)
-    
-    # 2. 载入通用的 Hubert 语义编码模型
-    hubert_model = load_hubert(hubert_path, config)
-    
-    # 3. 读取待变声的普通基础音频
+    # 读取待变声的普通基础音频
     audio = load_audio(input_wav_path, 16000)
-    audio_max = np.abs(audio).max() / 0.95
-    if audio_max > 1:
-        audio /= audio_max
-        
-    # 4. 执行变声 Pipeline 推理
-    pipeline = Pipeline(tgt_sr, config)
-    times = [0, 0, 0]
-    
-    audio_opt = pipeline.pipeline(
-        hubert_model,
-        net_g,
-        0,  # Speaker ID (单说话人默认为 0)
+
+    tgt_sr, audio_opt = rvc_convert_audio(
+        model_path,
+        index_path,
+        hubert_path,
         audio,
-        input_wav_path,
-        times,
-        f0_up_key,
-        f0_method,
-        index_path if os.path.exists(index_path) else "",
-        index_rate,
-        if_f0,
-        3,  # filter_radius 滤波器半径
-        tgt_sr,
-        tgt_sr,  # resample_sr 目标重采样率
-        rms_mix_rate,
-        version,
-        protect,
+        16000,
+        f0_up_key=f0_up_key,
+        f0_method=f0_method,
+        index_rate=index_rate,
+        rms_mix_rate=rms_mix_rate,
+        protect=protect,
+        device=device,
+        int8_cache_dir=int8_cache_dir,
     )
-    
-    # 5. 保存合成后的 wav 音频
+
+    # 保存合成后的 wav 音频
     sf.write(output_wav_path, audio_opt, tgt_sr)
     print(f"RVC Convert Success -> Saved output to {output_wav_path}")
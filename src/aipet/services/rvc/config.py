@@ -16,3 +16,6 @@ class Config:
         self.x_query = 6
         self.x_center = 38
         self.x_max = 41
+
+        # 长音频按静音点切段后并发变声的线程数（各线程均分 torch intra-op 线程），1 为逐段串行
+        self.segment_workers = max(1, min(4, self.n_cpu // 4))
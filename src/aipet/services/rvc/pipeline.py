@@ -2,7 +2,10 @@ import os
 import sys
 import traceback
 import logging
-from functools import lru_cache
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from time import time as ttime
 
 import numpy as np
@@ -42,23 +45,143 @@ except ImportError:
 
 # 设计一个 48Hz 的高通 Butterworth 滤波器，用于去除超低音爆
 bh, ah = signal.butter(N=5, Wn=48, btype="high", fs=16000)
-input_audio_path2wav = {}
 
 
-@lru_cache
-def cache_harvest_f0(input_audio_path, fs, f0max, f0min, frame_period):
-    audio = input_audio_path2wav[input_audio_path]
-    if pyworld is None:
-        raise ImportError("pyworld is required for harvest method.")
-    f0, t = pyworld.harvest(
-        audio,
-        fs=fs,
-        f0_ceil=f0max,
-        f0_floor=f0min,
-        frame_period=frame_period,
-    )
-    f0 = pyworld.stonemask(audio, f0, t, fs)
-    return f0
+class F0Cache:
+    """
+    内容寻址的基频曲线缓存：键为 (音频采样内容, 提取算法, 提取参数) 的摘要，值为未经滤波与升降调的原始 F0。
+    同一段音频以任何路径或文件名再次变声都能命中，不同内容永远不会串用；按总字节数做 LRU 淘汰。
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+
+    @staticmethod
+    def make_key(x, method, *params):
+        h = hashlib.sha1(np.ascontiguousarray(x).view(np.uint8))
+        h.update(repr((str(x.dtype), method) + params).encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            f0 = self._entries.get(key)
+            if f0 is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return f0
+
+    def put(self, key, f0):
+        f0 = np.array(f0, copy=True)
+        f0.setflags(write=False)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old.nbytes
+            self._entries[key] = f0
+            self._total_bytes += f0.nbytes
+            while len(self._entries) > 1 and self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+
+_f0_cache = F0Cache()
+
+
+# 已载入的 faiss 索引缓存，键为：(file_index 绝对路径, mtime)，值为 (index, big_npy)，按最近使用顺序排列 (LRU)
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+# 最多常驻的索引数，与 RVC 引擎缓存的角色数上限 (RVC_CACHE_MAX_ENTRIES) 一致：每个角色至多一个索引
+INDEX_CACHE_MAX_ENTRIES = 4
+
+
+def _big_npy_sidecar_path(file_index):
+    """索引向量矩阵的 .npy 旁路缓存文件路径（与 .index 文件同目录）"""
+    return file_index + ".big_npy.npy"
+
+
+def _load_big_npy(index, file_index, index_mtime):
+    """
+    取得索引的全量向量矩阵 big_npy。
+    优先以 mmap 只读方式打开旁路 .npy 文件，使多次变声与多个进程共享同一份页缓存；
+    旁路文件不存在或比索引旧时，执行一次 reconstruct_n 并落盘。
+    """
+    sidecar = _big_npy_sidecar_path(file_index)
+    try:
+        if os.path.exists(sidecar) and os.path.getmtime(sidecar) >= index_mtime:
+            big_npy = np.load(sidecar, mmap_mode="r")
+            if big_npy.shape == (index.ntotal, index.d) and big_npy.dtype == np.float32:
+                return big_npy
+    except Exception as e:
+        logger.warning(f"读取索引旁路缓存失败，将重新构建: {e}")
+
+    big_npy = np.ascontiguousarray(index.reconstruct_n(0, index.ntotal), dtype=np.float32)
+    try:
+        # 先写入临时文件再原子替换，防止多进程同时构建时读到半截文件
+        tmp_path = f"{sidecar}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, big_npy)
+        os.replace(tmp_path, sidecar)
+        return np.load(sidecar, mmap_mode="r")
+    except Exception as e:
+        # 索引目录只读等情况下退回常驻内存的副本
+        logger.warning(f"写入索引旁路缓存失败，本进程将使用内存副本: {e}")
+        return big_npy
+
+
+def load_index(file_index):
+    """按 (路径, mtime) 获取缓存的 faiss 索引与 mmap 向量矩阵，索引文件被替换后自动失效重建"""
+    file_index = os.path.abspath(file_index)
+    try:
+        mtime = os.path.getmtime(file_index)
+    except OSError as e:
+        logger.error(f"Error loading index: {e}")
+        return None, None
+
+    cache_key = (file_index, mtime)
+    with _index_cache_lock:
+        if cache_key in _index_cache:
+            _index_cache.move_to_end(cache_key)
+            return _index_cache[cache_key]
+
+        # 同一路径的旧版本索引已过期，直接丢弃
+        for k in [k for k in _index_cache if k[0] == file_index]:
+            del _index_cache[k]
+
+        try:
+            index = faiss.read_index(file_index)
+            # 检查索引是否包含向量（ntotal > 0），避免空索引导致后续特征检索越界崩溃
+            if index.ntotal > 0:
+                big_npy = _load_big_npy(index, file_index, mtime)
+            else:
+                logger.warning("RVC Index 文件中没有向量数据(ntotal=0)，将忽略索引检索。")
+                index = big_npy = None
+        except Exception as e:
+            logger.error(f"Error loading index: {e}")
+            index = big_npy = None
+
+        _index_cache[cache_key] = (index, big_npy)
+        while len(_index_cache) > INDEX_CACHE_MAX_ENTRIES:
+            key, _ = _index_cache.popitem(last=False)
+            logger.info(f"索引缓存已满，释放: {key[0]}")
+        return index, big_npy
+
+
+def clear_index_cache():
+    """释放全部已缓存的 faiss 索引"""
+    with _index_cache_lock:
+        _index_cache.clear()
 
 
 def change_rms(data1, sr1, data2, sr2, rate):
@@ -98,6 +221,82 @@ class Pipeline(object):
         self.t_center = self.sr * self.x_center
         self.t_max = self.sr * self.x_max
         self.device = config.device
+        self.segment_workers = getattr(config, "segment_workers", 1)
+
+    def segment_plan(self, audio):
+        """
+        规划长音频的切段方案：每隔 t_center 个采样点，在其前后 t_query 范围内寻找 160 点窗口幅度和最小（最安静）的位置作为切点。
+        窗口幅度和以累积和一次求出，整体为 O(n)。
+
+        参数:
+            audio: 已高通滤波、未填充的 16kHz 音频
+        返回:
+            [(start, end)] 各段在两端 reflect 填充 t_pad 后的音频中的起点与切点（均为 window 的整数倍），
+            最后一段 end 为 None 表示直到末尾；不足 t_max 的短音频只有一段 [(0, None)]
+        """
+        cuts = []
+        if audio.shape[0] + self.window > self.t_max:
+            # audio_sum[j] = sum(|audio_pad[j : j + window]|)，audio_pad 为两端各 reflect 填充 window/2 的音频
+            audio_pad = np.pad(audio, (self.window // 2, self.window // 2), mode="reflect")
+            csum = np.concatenate(([0.0], np.cumsum(np.abs(audio_pad))))
+            audio_sum = csum[self.window : self.window + audio.shape[0]] - csum[: audio.shape[0]]
+            for t in range(self.t_center, audio.shape[0], self.t_center):
+                lo = t - self.t_query
+                cut = lo + int(np.argmin(audio_sum[lo : t + self.t_query]))
+                cuts.append(cut // self.window * self.window)
+
+        starts = [0] + cuts
+        return list(zip(starts, cuts + [None]))
+
+    def _convert_segments(self, plan, model, net_g, sid, audio_pad, pitch, pitchf, times, index, big_npy,
+                          index_rate, version, protect):
+        """
+        按 segment_plan 的方案逐段变声并裁掉两端 t_pad 的重叠；多段时以线程池并发执行，结果按原顺序返回。
+        每段在各自的计时列表中累计耗时，全部完成后再合并进 times，避免并发累加丢失。
+        """
+
+        def convert(segment, seg_times):
+            s, e = segment
+            if e is None:
+                audio_seg = audio_pad[s:]
+                frames = slice(s // self.window, None)
+            else:
+                audio_seg = audio_pad[s : e + self.t_pad2 + self.window]
+                frames = slice(s // self.window, (e + self.t_pad2) // self.window)
+            return self.vc(
+                model,
+                net_g,
+                sid,
+                audio_seg,
+                pitch[:, frames] if pitch is not None else None,
+                pitchf[:, frames] if pitchf is not None else None,
+                seg_times,
+                index,
+                big_npy,
+                index_rate,
+                version,
+                protect,
+            )[self.t_pad_tgt : -self.t_pad_tgt]
+
+        seg_times = [[0, 0, 0] for _ in plan]
+        workers = min(self.segment_workers, len(plan))
+        if workers <= 1:
+            outputs = [convert(segment, t) for segment, t in zip(plan, seg_times)]
+        else:
+            # torch.set_num_threads 作用于整个进程：在线程池启动前一次性按并发段数均分 intra-op 线程，
+            # 避免线程数超订，全部段完成后再恢复原设置
+            total_threads = torch.get_num_threads()
+            torch.set_num_threads(max(1, total_threads // workers))
+            try:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="RVCSegment") as pool:
+                    outputs = list(pool.map(convert, plan, seg_times))
+            finally:
+                torch.set_num_threads(total_threads)
+
+        for t in seg_times:
+            for i, value in enumerate(t):
+                times[i] += value
+        return outputs
 
     def get_f0(
         self,
@@ -109,64 +308,30 @@ class Pipeline(object):
         filter_radius,
         inp_f0=None,
     ):
-        global input_audio_path2wav
         time_step = self.window / self.sr * 1000
         f0_min = 50
         f0_max = 1100
         f0_mel_min = 1127 * np.log(1 + f0_min / 700)
         f0_mel_max = 1127 * np.log(1 + f0_max / 700)
         
-        # 强制兼容：若缺少库，自动退回至 pm 算法
+        # 强制兼容：若缺少库或算法不受支持，自动退回至 pm 算法
         if f0_method == "harvest" and pyworld is None:
             f0_method = "pm"
         if f0_method == "crepe" and torchcrepe is None:
             f0_method = "pm"
+        if f0_method not in ("pm", "harvest", "crepe"):
+            f0_method = "pm"
         if f0_method == "pm" and parselmouth is None:
             # 如果什么库都没装，返回全 0 音高（无音高变声）
             return np.zeros(p_len, dtype=np.int32), np.zeros(p_len, dtype=np.float32)
 
-        if f0_method == "pm":
-            f0 = (
-                parselmouth.Sound(x, self.sr)
-                .to_pitch_ac(
-                    time_step=time_step / 1000,
-                    voicing_threshold=0.6,
-                    pitch_floor=f0_min,
-                    pitch_ceiling=f0_max,
-                )
-                .selected_array["frequency"]
-            )
-            pad_size = (p_len - len(f0) + 1) // 2
-            if pad_size > 0 or p_len - len(f0) - pad_size > 0:
-                f0 = np.pad(f0, [[pad_size, p_len - len(f0) - pad_size]], mode="constant")
-                
-        elif f0_method == "harvest":
-            input_audio_path2wav[input_audio_path] = x.astype(np.double)
-            f0 = cache_harvest_f0(input_audio_path, self.sr, f0_max, f0_min, 10)
-                
-        elif f0_method == "crepe":
-            model = "full"
-            batch_size = 512
-            audio = torch.tensor(np.copy(x))[None].float()
-            f0, pd = torchcrepe.predict(
-                audio,
-                self.sr,
-                self.window,
-                f0_min,
-                f0_max,
-                model,
-                batch_size=batch_size,
-                device=self.device,
-                return_periodicity=True,
-            )
-            pd = torchcrepe.filter.median(pd, 3)
-            f0 = torchcrepe.filter.mean(f0, 3)
-            f0[pd < 0.1] = 0
-            f0 = f0[0].cpu().numpy()
-            
-        else:
-            # 不支持的算法默认转为 pm
-            return self.get_f0(input_audio_path, x, p_len, f0_up_key, "pm", filter_radius, inp_f0)
+        # 原始 F0 按音频内容寻址缓存（input_audio_path 仅为调用方标识，不参与缓存）；缓存值只读，取出后复制再做后处理
+        cache_key = F0Cache.make_key(x, f0_method, self.sr, f0_min, f0_max, time_step, p_len)
+        f0 = _f0_cache.get(cache_key)
+        if f0 is None:
+            f0 = self._extract_f0(x, p_len, f0_method, f0_min, f0_max, time_step)
+            _f0_cache.put(cache_key, f0)
+        f0 = np.array(f0, copy=True)
 
         # 统一对所有音高提取算法得到的 F0 曲线进行中值滤波降噪，消除音高微小突变引发的颤音与破音
         if filter_radius > 2:
@@ -188,6 +353,48 @@ class Pipeline(object):
         f0_coarse = np.rint(f0_mel).astype(np.int32)
         return f0_coarse, f0bak
 
+    def _extract_f0(self, x, p_len, f0_method, f0_min, f0_max, time_step):
+        """按指定算法提取原始 F0 曲线（未做中值滤波与升降调）"""
+        if f0_method == "pm":
+            f0 = (
+                parselmouth.Sound(x, self.sr)
+                .to_pitch_ac(
+                    time_step=time_step / 1000,
+                    voicing_threshold=0.6,
+                    pitch_floor=f0_min,
+                    pitch_ceiling=f0_max,
+                )
+                .selected_array["frequency"]
+            )
+            pad_size = (p_len - len(f0) + 1) // 2
+            if pad_size > 0 or p_len - len(f0) - pad_size > 0:
+                f0 = np.pad(f0, [[pad_size, p_len - len(f0) - pad_size]], mode="constant")
+            return f0
+
+        if f0_method == "harvest":
+            # 在静音处切块后于进程池中并行提取
+            from aipet.services.f0_harvest import harvest_f0
+            return harvest_f0(x, self.sr, f0_min, f0_max, 10)
+
+        model = "full"
+        batch_size = 512
+        audio = torch.tensor(np.copy(x))[None].float()
+        f0, pd = torchcrepe.predict(
+            audio,
+            self.sr,
+            self.window,
+            f0_min,
+            f0_max,
+            model,
+            batch_size=batch_size,
+            device=self.device,
+            return_periodicity=True,
+        )
+        pd = torchcrepe.filter.median(pd, 3)
+        f0 = torchcrepe.filter.mean(f0, 3)
+        f0[pd < 0.1] = 0
+        return f0[0].cpu().numpy()
+
     def vc(
         self,
         model,
@@ -319,40 +526,12 @@ class Pipeline(object):
             and index_rate != 0
             and faiss is not None
         ):
-            try:
-                index = faiss.read_index(file_index)
-                # 检查索引是否包含向量（ntotal > 0），避免空索引导致后续特征检索越界崩溃
-                if index.ntotal > 0:
-                    big_npy = index.reconstruct_n(0, index.ntotal)
-                else:
-                    logger.warning("RVC Index 文件中没有向量数据(ntotal=0)，将忽略索引检索。")
-                    index = big_npy = None
-            except Exception as e:
-                logger.error(f"Error loading index: {e}")
-                index = big_npy = None
+            index, big_npy = load_index(file_index)
         else:
             index = big_npy = None
 
-            
         audio = signal.filtfilt(bh, ah, audio)
-        audio_pad = np.pad(audio, (self.window // 2, self.window // 2), mode="reflect")
-        opt_ts = []
-        if audio_pad.shape[0] > self.t_max:
-            audio_sum = np.zeros_like(audio)
-            for i in range(self.window):
-                audio_sum += np.abs(audio_pad[i : i - self.window])
-            for t in range(self.t_center, audio.shape[0], self.t_center):
-                opt_ts.append(
-                    t
-                    - self.t_query
-                    + np.where(
-                        audio_sum[t - self.t_query : t + self.t_query]
-                        == audio_sum[t - self.t_query : t + self.t_query].min()
-                    )[0][0]
-                )
-        s = 0
-        audio_opt = []
-        t = None
+        plan = self.segment_plan(audio)
         t1 = ttime()
         audio_pad = np.pad(audio, (self.t_pad, self.t_pad), mode="reflect")
         p_len = audio_pad.shape[0] // self.window
@@ -379,79 +558,9 @@ class Pipeline(object):
             
         t2 = ttime()
         times[1] += t2 - t1
-        for t in opt_ts:
-            t = t // self.window * self.window
-            if if_f0 == 1:
-                audio_opt.append(
-                    self.vc(
-                        model,
-                        net_g,
-                        sid,
-                        audio_pad[s : t + self.t_pad2 + self.window],
-                        pitch[:, s // self.window : (t + self.t_pad2) // self.window],
-                        pitchf[:, s // self.window : (t + self.t_pad2) // self.window],
-                        times,
-                        index,
-                        big_npy,
-                        index_rate,
-                        version,
-                        protect,
-                    )[self.t_pad_tgt : -self.t_pad_tgt]
-                )
-            else:
-                audio_opt.append(
-                    self.vc(
-                        model,
-                        net_g,
-                        sid,
-                        audio_pad[s : t + self.t_pad2 + self.window],
-                        None,
-                        None,
-                        times,
-                        index,
-                        big_npy,
-                        index_rate,
-                        version,
-                        protect,
-                    )[self.t_pad_tgt : -self.t_pad_tgt]
-                )
-            s = t
-            
-        if if_f0 == 1:
-            audio_opt.append(
-                self.vc(
-                    model,
-                    net_g,
-                    sid,
-                    audio_pad[t:],
-                    pitch[:, t // self.window :] if t is not None else pitch,
-                    pitchf[:, t // self.window :] if t is not None else pitchf,
-                    times,
-                    index,
-                    big_npy,
-                    index_rate,
-                    version,
-                    protect,
-                )[self.t_pad_tgt : -self.t_pad_tgt]
-            )
-        else:
-            audio_opt.append(
-                self.vc(
-                    model,
-                    net_g,
-                    sid,
-                    audio_pad[t:],
-                    None,
-                    None,
-                    times,
-                    index,
-                    big_npy,
-                    index_rate,
-                    version,
-                    protect,
-                )[self.t_pad_tgt : -self.t_pad_tgt]
-            )
-            
+        audio_opt = self._convert_segments(
+            plan, model, net_g, sid, audio_pad, pitch, pitchf, times, index, big_npy, index_rate, version, protect
+        )
         audio_opt = np.concatenate(audio_opt)
         if rms_mix_rate != 1 and librosa is not None:
             audio_opt = change_rms(audio, 16000, audio_opt, tgt_sr, rms_mix_rate)
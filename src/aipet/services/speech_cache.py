@@ -0,0 +1,142 @@
+import os
+import json
+import wave
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def voice_profile_hash(**params):
+    """
+    计算发音配置指纹：对模式、模型路径、参考音频及各推理参数做稳定哈希。
+    取值为现存文件路径时一并计入其修改时间与大小，模型重新训练或替换参考音频后旧缓存自动失效。
+    """
+    items = {}
+    for name, value in params.items():
+        if isinstance(value, str) and value and os.path.isfile(value):
+            st = os.stat(value)
+            value = [value, st.st_mtime, st.st_size]
+        items[name] = value
+    blob = json.dumps(items, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class SpeechCache:
+    """
+    内容寻址的磁盘语音缓存：键为 (发音配置指纹, 清洗后文本)，值为单句 (采样率, int16 PCM)，以 WAV 文件存放便于直接试听。
+    按总字节数做 LRU 淘汰（以文件修改时间记录最近使用），并统计命中/未命中次数。多个合成线程可并发读写。
+    """
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> 文件字节数，按最近使用排序
+        self._total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """启动时按修改时间重建 LRU 顺序"""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".wav"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            files.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    @staticmethod
+    def make_key(profile_hash, clean_text):
+        return hashlib.sha1(f"{profile_hash}\0{clean_text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".wav")
+
+    def get(self, key):
+        """读取缓存音频，命中返回 (采样率, int16 PCM)，否则返回 None"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            with wave.open(path, 'rb') as f:
+                sr = f.getframerate()
+                pcm = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+            os.utime(path)
+        except Exception as e:
+            print(f"[SpeechCache] 缓存文件读取失败，已丢弃: {e}")
+            self._discard(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return sr, pcm
+
+    def put(self, key, sr, pcm):
+        """写入缓存（先写临时文件再原子替换，避免读到半截文件），超出容量时淘汰最久未使用的条目"""
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with wave.open(tmp_path, 'wb') as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(int(sr))
+                f.writeframes(np.asarray(pcm, dtype=np.int16).tobytes())
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except Exception as e:
+            print(f"[SpeechCache] 缓存写入失败: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict()
+
+    def contains(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def _discard(self, key):
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """调用方需持有锁"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
@@ -3,8 +3,84 @@ import re
 import asyncio
 import shutil
 import threading
-import edge_tts
-from aipet.signals import WorkerSignals
+
+# Edge-TTS 默认发音人（微软高清女声 Xiaoxiao）
+EDGE_TTS_VOICE = "zh-CN-XiaoxiaoNeural"
+
+
+def _add_torch_dll_directory():
+    """动态注入 Windows DLL 路径防止 Python 3.14 下 torch 载入异常"""
+    if os.name != 'nt':
+        return
+    import site
+    for p in site.getsitepackages():
+        torch_lib = os.path.join(p, "torch", "lib")
+        if os.path.exists(torch_lib):
+            try:
+                os.add_dll_directory(torch_lib)
+            except Exception:
+                pass
+
+
+class EdgeTTSClient:
+    """
+    常驻后台事件循环的 Edge-TTS 客户端。
+    所有请求共用同一个事件循环，避免每句话都新建并销毁事件循环；submit() 立即返回 Future，
+    可在上一句仍在变声时提前发出下一句的网络请求。edge_tts 每次合成都会新建会话并建立一条 websocket，
+    合成结束即关闭，连接本身无法跨句复用。
+    """
+
+    # 同时在途的合成请求上限，防止预取过多句子触发服务端限流
+    MAX_CONCURRENT_REQUESTS = 3
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._semaphore = None
+        self._thread = threading.Thread(target=self._run_loop, name="EdgeTTSLoop", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _synthesize(self, text, voice):
+        import edge_tts
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        async with self._semaphore:
+            communicate = edge_tts.Communicate(text, voice)
+            chunks = []
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    chunks.append(chunk["data"])
+            return b"".join(chunks)
+
+    def submit(self, text, voice=EDGE_TTS_VOICE):
+        """非阻塞地提交合成请求，返回 concurrent.futures.Future（结果为 MP3 字节流）"""
+        return asyncio.run_coroutine_threadsafe(self._synthesize(text, voice), self.loop)
+
+    def synthesize(self, text, voice=EDGE_TTS_VOICE, timeout=60):
+        """阻塞式合成，直接返回 MP3 字节流"""
+        return self.submit(text, voice).result(timeout)
+
+
+_edge_tts_client = None
+_edge_tts_client_lock = threading.Lock()
+
+
+def get_edge_tts_client():
+    """获取进程内唯一的 Edge-TTS 客户端（首次调用时启动后台事件循环）"""
+    global _edge_tts_client
+    with _edge_tts_client_lock:
+        if _edge_tts_client is None:
+            _edge_tts_client = EdgeTTSClient()
+        return _edge_tts_client
+
+
+def synthesize_edge_tts(text, voice=EDGE_TTS_VOICE):
+    """调用 Edge-TTS 合成语音，直接在内存中收集并返回 MP3 字节流"""
+    return get_edge_tts_client().synthesize(text, voice)
+
 
 class TextCleaner:
     """发音文本前端清洗与正则化器，防止自回归 TTS 在遇到非标符号/数字时喷射电音噪波"""
@@ -128,7 +204,7 @@ class TextCleaner:
         return text
 
 class TTSWorker(threading.Thread):
-    def __init__(self, text, enable_tts, temp_audio_path, signals: WorkerSignals,
+    def __init__(self, text, enable_tts, temp_audio_path, signals,
                  voice_mode="gpt_sovits", ref_audio_path=None, prompt_text=None, prompt_lang="zh", text_lang="zh",
                  gpt_ckpt_path=None, sovits_pth_path=None, gpt_sovits_version="v2",
                  voice_base_path=None, rvc_pth=None, rvc_index=None, hubert_path=None,
@@ -185,16 +261,8 @@ class TTSWorker(threading.Thread):
                 # 检查参考音频是否存在（零样本克隆和微调模式均必需）
                 if self.ref_audio_path and os.path.exists(self.ref_audio_path):
                     # 动态注入 Windows DLL 路径防止 Python 3.14 下 torch 载入异常
-                    if os.name == 'nt':
-                        import site
-                        for p in site.getsitepackages():
-                            torch_lib = os.path.join(p, "torch", "lib")
-                            if os.path.exists(torch_lib):
-                                try:
-                                    os.add_dll_directory(torch_lib)
-                                except Exception:
-                                    pass
-                    
+                    _add_torch_dll_directory()
+
                     from aipet.services.gpt_sovits import gpt_sovits_convert
                     
                     # 执行本地两阶段 CPU 推理
@@ -225,12 +293,10 @@ class TTSWorker(threading.Thread):
 
         # 2. 调度普通 Edge-TTS 或是级联 RVC 变声模式
         try:
-            # 执行异步 edge-tts 语音合成（默认采用微软高清女声 Xiaoxiao）
-            async def run_edge_tts():
-                communicate = edge_tts.Communicate(self.text, "zh-CN-XiaoxiaoNeural")
-                await communicate.save(temp_raw_path)
-                
-            asyncio.run(run_edge_tts())
+            # 通过常驻事件循环执行 edge-tts 语音合成（默认采用微软高清女声 Xiaoxiao）
+            mp3_bytes = synthesize_edge_tts(self.text)
+            with open(temp_raw_path, "wb") as f:
+                f.write(mp3_bytes)
             
             # 兼容性转换：由于 edge-tts 默认仅生成 MP3 格式音频流
             # 我们通过 load_audio 读入并用 soundfile 重新以标准 PCM_16 WAV 格式保存，避免播放器由于没有 RIFF 头部标识报错
@@ -284,14 +350,58 @@ class TTSWorker(threading.Thread):
 
 import queue
 
+class AudioStream:
+    """流式合成中的单句音频：合成线程逐块写入 (采样率, int16 PCM)，播放端边收边播直至合成结束"""
+
+    _END = object()
+
+    def __init__(self):
+        self._chunks = queue.Queue()
+        self.sample_rate = None
+        self.num_samples = 0  # 已写入的采样点总数
+        self.closed = False
+
+    def put(self, sr, pcm):
+        self.sample_rate = sr
+        self.num_samples += len(pcm)
+        self._chunks.put((sr, pcm))
+
+    def close(self):
+        """标记合成结束，唤醒正在等待下一块的播放端"""
+        self.closed = True
+        self._chunks.put(self._END)
+
+    def __iter__(self):
+        while True:
+            item = self._chunks.get()
+            if item is self._END:
+                return
+            yield item
+
+
 class TTSQueueWorker(threading.Thread):
-    """顺序音频流式合成队列工作线程，从队列中逐句获取文本并进行语音合成，支持安全中止打断"""
-    def __init__(self, enable_tts, signals: WorkerSignals,
+    """
+    多阶段流水线音频合成队列，按句子 index 保序输出，支持安全中止打断。
+
+    各阶段拥有独立的工作线程池，阶段之间以有界队列衔接，使网络与计算相互重叠：
+        1. 声学阶段（文本清洗 + Edge-TTS 网络请求 / GPT-SoVITS 本地推理）
+        2. 变声阶段（RVC CPU 推理，纯 Edge-TTS 模式下仅做格式转换）
+        3. 输出阶段（本线程：按 index 重排、调试落盘并发送 tts_sentence_finished）
+    """
+
+    # Edge-TTS 网络请求并发数；GPT-SoVITS 推理器非线程安全，固定为单线程
+    EDGE_TTS_WORKERS = 3
+    CONVERT_WORKERS = 1
+    STAGE_QUEUE_SIZE = 4
+
+    def __init__(self, enable_tts, signals,
                  voice_mode="gpt_sovits", ref_audio_path=None, prompt_text=None, prompt_lang="zh", text_lang="zh",
                  gpt_ckpt_path=None, sovits_pth_path=None, gpt_sovits_version="v2",
                  voice_base_path=None, rvc_pth=None, rvc_index=None, hubert_path=None,
                  f0_up_key=0, f0_method="harvest", index_rate=0.75, rms_mix_rate=0.25, protect=0.33,
-                 temperature=0.4):
+                 temperature=0.4, dump_audio=False, streaming=True, speech_cache=None, batch_sentences=4,
+                 prompt_cache_dir=None, text_feature_spill_dir=None, gpt_sovits_engine="torch", onnx_dir=None,
+                 synthesizer_cache_mb=None, int8_cache_dir=None):
         super().__init__(daemon=True)
         self.enable_tts = enable_tts
         self.signals = signals
@@ -313,10 +423,33 @@ class TTSQueueWorker(threading.Thread):
         self.rms_mix_rate = rms_mix_rate
         self.protect = protect
         self.temperature = temperature
-        
+        self.dump_audio = dump_audio # 调试开关：开启后才将每句合成音频写入 temp_audio 目录
+        self.streaming = streaming # GPT-SoVITS 流式合成：首个语义 token 块解码后即开始播放
+        self.speech_cache = speech_cache # 磁盘语音缓存，命中时跳过整条合成链路
+        self.batch_sentences = batch_sentences # GPT-SoVITS 积压多句时一次批量合成的最大句数，1 为逐句合成
+        self.prompt_cache_dir = prompt_cache_dir # GPT-SoVITS 参考音频预处理结果的磁盘缓存目录
+        self.text_feature_spill_dir = text_feature_spill_dir # GPT-SoVITS 短语级文本特征缓存的落盘目录，None 为仅内存
+        self.synthesizer_cache_mb = synthesizer_cache_mb # GPT-SoVITS 推理器缓存的内存上限 (MB)，None 为默认值
+        self._gpt_sovits_configured = False # 上面两项设置是否已下发给 gpt_sovits 模块（每个队列只需一次）
+        self.gpt_sovits_engine = gpt_sovits_engine # GPT-SoVITS 推理后端："torch" 或 "onnx"
+        self.onnx_dir = onnx_dir # engine 为 "onnx" 时导出图所在目录
+        self.int8_cache_dir = int8_cache_dir # 非空时启用动态 int8 量化推理，量化权重缓存到该目录
+        if voice_mode == "gpt_sovits" and gpt_sovits_engine == "onnx" and (self.streaming or self.batch_sentences > 1):
+            # ONNX 后端只替换了逐句整段合成的 T2S 解码与 SoVITS 解码；流式 (infer_panel_naive + decode_streaming)
+            # 与批量 (infer_panel_batch_infer) 路径仍是 PyTorch，因此关闭二者，保证每句都走 ONNX
+            print("[TTSQueueWorker] GPT-SoVITS ONNX 后端不支持流式与批量合成，已改为逐句整段合成")
+            self.streaming = False
+            self.batch_sentences = 1
+        self.profile_hash = self._voice_profile_hash() if speech_cache is not None else None
+
+        # 输入队列由 UI 线程写入，保持无界以免阻塞界面；阶段间队列有界，形成背压
         self.task_queue = queue.Queue()
+        # 变声队列按 index 优先出队，保证靠前的句子优先占用 CPU
+        self.convert_queue = queue.PriorityQueue(maxsize=self.STAGE_QUEUE_SIZE)
+        self.output_queue = queue.Queue(maxsize=self.STAGE_QUEUE_SIZE)
         self.running = True
         self._is_aborted = False
+        self._stage_threads = []
 
     def add_task(self, index, text):
         """向任务队列添加分句文本"""
@@ -327,123 +460,436 @@ class TTSQueueWorker(threading.Thread):
         """打断清空队列并退出"""
         self._is_aborted = True
         self.running = False
-        while not self.task_queue.empty():
+        for q in (self.task_queue, self.convert_queue, self.output_queue):
+            while not q.empty():
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+        # 毒丸唤醒各阶段（变声队列为优先队列，毒丸取最小优先级以便立即出队）
+        for _ in range(self._acoustic_workers()):
+            self.task_queue.put((None, None))
+        for i in range(self.CONVERT_WORKERS):
+            self._put(self.convert_queue, (-1 - i, None), force=True)
+        self._put(self.output_queue, (None, None, None), force=True)
+
+    def _voice_profile_hash(self):
+        """按发音模式选取影响合成结果的参数计算配置指纹"""
+        from aipet.services.speech_cache import voice_profile_hash
+        if self.voice_mode == "gpt_sovits":
+            return voice_profile_hash(
+                voice_mode=self.voice_mode,
+                gpt_ckpt_path=self.gpt_ckpt_path,
+                sovits_pth_path=self.sovits_pth_path,
+                version=self.gpt_sovits_version,
+                ref_audio_path=self.ref_audio_path,
+                prompt_text=self.prompt_text,
+                prompt_lang=self.prompt_lang,
+                text_lang=self.text_lang,
+                temperature=self.temperature,
+                engine=self.gpt_sovits_engine,
+                int8=bool(self.int8_cache_dir)
+            )
+        params = {"voice_mode": self.voice_mode, "edge_voice": EDGE_TTS_VOICE}
+        if self.voice_mode == "rvc":
+            base = self.voice_base_path or ""
+            params.update(
+                rvc_pth=os.path.join(base, self.rvc_pth) if self.rvc_pth else "",
+                rvc_index=os.path.join(base, self.rvc_index) if self.rvc_index else "",
+                hubert_path=self.hubert_path,
+                f0_up_key=self.f0_up_key,
+                f0_method=self.f0_method,
+                index_rate=self.index_rate,
+                rms_mix_rate=self.rms_mix_rate,
+                protect=self.protect,
+                int8=bool(self.int8_cache_dir)
+            )
+        return voice_profile_hash(**params)
+
+    def _cache_key(self, clean_text):
+        if self.speech_cache is None or not clean_text:
+            return None
+        return self.speech_cache.make_key(self.profile_hash, clean_text)
+
+    def _cache_store(self, cache_key, audio):
+        if cache_key is not None and audio is not None and len(audio[1]) > 0:
+            self.speech_cache.put(cache_key, *audio)
+
+    def _load_gpt_sovits(self):
+        """按需导入 GPT-SoVITS 引擎模块；首次调用时应用文本特征缓存的落盘设置与推理器缓存上限"""
+        _add_torch_dll_directory()
+        from aipet.services import gpt_sovits
+        if not self._gpt_sovits_configured:
+            if self.text_feature_spill_dir:
+                gpt_sovits.set_text_feature_spill_dir(self.text_feature_spill_dir)
+            if self.synthesizer_cache_mb:
+                gpt_sovits.set_cache_budget(int(self.synthesizer_cache_mb * 1024 * 1024))
+            self._gpt_sovits_configured = True
+        return gpt_sovits
+
+    def _acoustic_workers(self):
+        return 1 if self.voice_mode == "gpt_sovits" else self.EDGE_TTS_WORKERS
+
+    def _put(self, q, item, force=False):
+        """向有界队列写入，队列满时周期性检查中止标志，防止打断后阻塞挂死"""
+        while self.running or force:
             try:
-                self.task_queue.get_nowait()
-            except queue.Empty:
-                break
-        self.task_queue.put((None, None)) # 毒丸唤醒
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if force:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+        return False
 
     def run(self):
         if not self.enable_tts:
             return
 
+        for i in range(self._acoustic_workers()):
+            t = threading.Thread(target=self._acoustic_loop, name=f"TTSAcoustic-{i}", daemon=True)
+            t.start()
+            self._stage_threads.append(t)
+
+        # RVC 模式下趁 LLM 仍在思考时预热变声引擎，使首句合成只剩纯推理耗时
+        if self.voice_mode == "rvc" and self.rvc_pth and self.voice_base_path and self.hubert_path:
+            pth_abs = os.path.join(self.voice_base_path, self.rvc_pth)
+            if os.path.exists(pth_abs) and os.path.exists(self.hubert_path):
+                try:
+                    from aipet.services.rvc import warmup
+                    warmup(pth_abs, self.hubert_path, int8_cache_dir=self.int8_cache_dir)
+                except Exception as e:
+                    print(f"[Warning] RVC 变声引擎预热失败: {e}")
+
+        for i in range(self.CONVERT_WORKERS):
+            t = threading.Thread(target=self._convert_loop, name=f"TTSConvert-{i}", daemon=True)
+            t.start()
+            self._stage_threads.append(t)
+
+        self._output_loop()
+
+    def _acoustic_loop(self):
+        """声学阶段：文本清洗 + Edge-TTS 网络请求 / GPT-SoVITS 推理"""
         while self.running:
             index, raw_text = self.task_queue.get()
             if index is None or not self.running or self._is_aborted:
                 break
-                
-            clean_text = TextCleaner.clean(raw_text)
-            if not clean_text or not clean_text.strip():
-                # 空白文本直接发送完成信号以推进播放队列
-                self.signals.tts_sentence_finished.emit(index, "", "")
+
+            tasks = [(index, raw_text)]
+            if self.voice_mode == "gpt_sovits" and self.batch_sentences > 1:
+                # 播放端忙于前面的句子、队列里已积压多句时，合并为一次批量推理以提高吞吐
+                tasks += self._drain_tasks(self.batch_sentences - 1)
+
+            pending = []
+            for index, raw_text in tasks:
+                item = self._prepare_task(index, raw_text)
+                if item is not None:
+                    pending.append(item)
+
+            if len(pending) > 1 and self._batch_gpt_sovits(pending):
                 continue
+            for item in pending:
+                if self._is_aborted:
+                    break
+                self._synthesize_task(*item)
 
-            from aipet.config import TEMP_AUDIO_DIR
-            out_wav_path = os.path.join(TEMP_AUDIO_DIR, f"temp_speech_{index}.wav")
-            print(f"[TTSQueueWorker] 正在合成句段 [{index}]: {repr(clean_text)}")
-            success = False
-            
-            # 1. 尝试使用 GPT-SoVITS 本地直接合成模式
-            if self.voice_mode == "gpt_sovits":
-                try:
-                    if self.ref_audio_path and os.path.exists(self.ref_audio_path):
-                        if os.name == 'nt':
-                            import site
-                            for p in site.getsitepackages():
-                                torch_lib = os.path.join(p, "torch", "lib")
-                                if os.path.exists(torch_lib):
-                                    try:
-                                        os.add_dll_directory(torch_lib)
-                                    except Exception:
-                                        pass
-                        
-                        from aipet.services.gpt_sovits import gpt_sovits_convert
-                        gpt_sovits_convert(
-                            text=clean_text,
-                            text_lang=self.text_lang,
-                            ref_wav_path=self.ref_audio_path,
-                            prompt_text=self.prompt_text,
-                            prompt_lang=self.prompt_lang,
-                            output_wav_path=out_wav_path,
-                            gpt_ckpt_path=self.gpt_ckpt_path,
-                            sovits_pth_path=self.sovits_pth_path,
-                            version=self.gpt_sovits_version,
-                            device="cpu",
-                            temperature=self.temperature
-                        )
-                        success = True
-                    else:
-                        print(f"[Warning] GPT-SoVITS 缺失参考音频. 降级使用 Edge-TTS.")
-                except Exception as e:
-                    print(f"[Warning] GPT-SoVITS 合成失败: {e}. 降级使用 Edge-TTS.")
-            
-            # 2. 调度普通 Edge-TTS 或是级联 RVC 变声模式
-            if not success:
-                temp_raw_path = out_wav_path + ".raw.wav"
-                try:
-                    async def run_edge_tts():
-                        import edge_tts
-                        communicate = edge_tts.Communicate(clean_text, "zh-CN-XiaoxiaoNeural")
-                        await communicate.save(temp_raw_path)
-                    
-                    import asyncio
-                    asyncio.run(run_edge_tts())
-                    
-                    if os.path.exists(temp_raw_path):
-                        from aipet.services.rvc.audio import load_audio
-                        import soundfile as sf
-                        raw_wav_data = load_audio(temp_raw_path, 24000)
-                        sf.write(temp_raw_path, raw_wav_data, 24000, format="wav", subtype="PCM_16")
-                        
-                        if self.voice_mode == "rvc" and self.rvc_pth and self.voice_base_path and self.hubert_path:
-                            pth_abs = os.path.join(self.voice_base_path, self.rvc_pth)
-                            index_abs = os.path.join(self.voice_base_path, self.rvc_index) if self.rvc_index else ""
-                            
-                            if os.path.exists(pth_abs) and os.path.exists(self.hubert_path):
-                                from aipet.services.rvc import rvc_convert
-                                rvc_convert(
-                                    model_path=pth_abs,
-                                    index_path=index_abs,
-                                    hubert_path=self.hubert_path,
-                                    input_wav_path=temp_raw_path,
-                                    output_wav_path=out_wav_path,
-                                    f0_up_key=self.f0_up_key,
-                                    f0_method=self.f0_method,
-                                    index_rate=self.index_rate,
-                                    rms_mix_rate=self.rms_mix_rate,
-                                    protect=self.protect
-                                )
-                                success = True
-                            else:
-                                print("[Warning] RVC pth 或 hubert 基础模型不存在。")
-                                shutil.copy(temp_raw_path, out_wav_path)
-                                success = True
-                        else:
-                            shutil.copy(temp_raw_path, out_wav_path)
-                            success = True
-                except Exception as e:
-                    print(f"Edge-TTS / RVC 语音合成错误: {e}")
-                finally:
-                    if os.path.exists(temp_raw_path):
-                        try:
-                            os.remove(temp_raw_path)
-                        except:
-                            pass
-            
-            if success and os.path.exists(out_wav_path) and not self._is_aborted:
-                self.signals.tts_sentence_finished.emit(index, out_wav_path, raw_text)
+    def _drain_tasks(self, limit):
+        """非阻塞地取出队列中已在等待的至多 limit 条任务；遇到毒丸时放回队列留给下一轮退出"""
+        tasks = []
+        while len(tasks) < limit:
+            try:
+                index, raw_text = self.task_queue.get_nowait()
+            except queue.Empty:
+                break
+            if index is None:
+                self.task_queue.put((None, None))
+                break
+            tasks.append((index, raw_text))
+        return tasks
+
+    def _prepare_task(self, index, raw_text):
+        """
+        文本清洗并查询语音缓存。空白文本与缓存命中直接交给输出阶段并返回 None，
+        否则返回待合成的 (index, clean_text, raw_text, cache_key)。
+        """
+        clean_text = TextCleaner.clean(raw_text)
+        if not clean_text or not clean_text.strip():
+            # 空白文本直接交给输出阶段以推进播放队列
+            self._put(self.output_queue, (index, None, ""))
+            return None
+
+        cache_key = self._cache_key(clean_text)
+        if cache_key is not None:
+            cached = self.speech_cache.get(cache_key)
+            if cached is not None:
+                stats = self.speech_cache.stats()
+                print(f"[TTSQueueWorker] 句段 [{index}] 命中语音缓存 (命中 {stats['hits']} / 未命中 {stats['misses']})")
+                self._put(self.output_queue, (index, cached, raw_text))
+                return None
+        return index, clean_text, raw_text, cache_key
+
+    def _synthesize_task(self, index, clean_text, raw_text, cache_key):
+        """逐句合成：GPT-SoVITS 流式 / 整句合成，失败时降级 Edge-TTS，需要变声的音频交给变声阶段"""
+        print(f"[TTSQueueWorker] 正在合成句段 [{index}]: {repr(clean_text)}")
+        use_gpt_sovits = True
+        if self.voice_mode == "gpt_sovits" and self.streaming:
+            if self._stream_gpt_sovits(index, clean_text, raw_text, cache_key):
+                return
+            # 流式合成失败时不再重复尝试 GPT-SoVITS，直接降级至 Edge-TTS
+            use_gpt_sovits = False
+
+        audio, needs_conversion = self.acoustic(clean_text, use_gpt_sovits)
+        if self.voice_mode == "gpt_sovits" and needs_conversion:
+            # GPT-SoVITS 失败后降级产出的 Edge-TTS 音频不属于当前发音配置，不写入缓存
+            cache_key = None
+        if audio is None:
+            self._put(self.output_queue, (index, None, ""))
+        elif needs_conversion:
+            self._put(self.convert_queue, (index, (audio, raw_text, cache_key)))
+        else:
+            self._cache_store(cache_key, audio)
+            self._put(self.output_queue, (index, audio, raw_text))
+
+    def _batch_gpt_sovits(self, pending):
+        """
+        GPT-SoVITS 批量合成：把积压的多句按长度分桶后并行解码，按句交给输出阶段。
+        批量推理失败时返回 False，由调用方逐句重试（含流式与 Edge-TTS 降级）。
+        """
+        if not (self.ref_audio_path and os.path.exists(self.ref_audio_path)):
+            return False
+
+        indices = [item[0] for item in pending]
+        print(f"[TTSQueueWorker] 正在批量合成句段 {indices}")
+        try:
+            gpt_sovits = self._load_gpt_sovits()
+            results = gpt_sovits.gpt_sovits_synthesize_batch(
+                texts=[item[1] for item in pending],
+                text_lang=self.text_lang,
+                ref_wav_path=self.ref_audio_path,
+                prompt_text=self.prompt_text,
+                prompt_lang=self.prompt_lang,
+                gpt_ckpt_path=self.gpt_ckpt_path,
+                sovits_pth_path=self.sovits_pth_path,
+                version=self.gpt_sovits_version,
+                device="cpu",
+                temperature=self.temperature,
+                prompt_cache_dir=self.prompt_cache_dir,
+                engine=self.gpt_sovits_engine,
+                onnx_dir=self.onnx_dir,
+                int8_cache_dir=self.int8_cache_dir
+            )
+        except Exception as e:
+            print(f"[Warning] GPT-SoVITS 批量合成失败: {e}. 改为逐句合成.")
+            return False
+
+        for (index, _, raw_text, cache_key), audio in zip(pending, results):
+            if len(audio[1]) == 0:
+                self._put(self.output_queue, (index, None, ""))
             else:
-                self.signals.tts_sentence_finished.emit(index, "", "")
+                self._cache_store(cache_key, audio)
+                self._put(self.output_queue, (index, audio, raw_text))
+        return True
+
+    def _stream_gpt_sovits(self, index, clean_text, raw_text, cache_key=None):
+        """
+        GPT-SoVITS 流式合成：首块音频就绪即以 AudioStream 形式交给输出阶段，后续块边合成边写入。
+        完整合成结束后拼接各块写入语音缓存。返回是否成功产出了音频。
+        """
+        if not (self.ref_audio_path and os.path.exists(self.ref_audio_path)):
+            print(f"[Warning] GPT-SoVITS 缺失参考音频. 降级使用 Edge-TTS.")
+            return False
+
+        stream = None
+        chunks = None
+        chunks_done = []
+        completed = False
+        try:
+            gpt_sovits = self._load_gpt_sovits()
+            chunks = gpt_sovits.gpt_sovits_stream(
+                text=clean_text,
+                text_lang=self.text_lang,
+                ref_wav_path=self.ref_audio_path,
+                prompt_text=self.prompt_text,
+                prompt_lang=self.prompt_lang,
+                gpt_ckpt_path=self.gpt_ckpt_path,
+                sovits_pth_path=self.sovits_pth_path,
+                version=self.gpt_sovits_version,
+                device="cpu",
+                temperature=self.temperature,
+                prompt_cache_dir=self.prompt_cache_dir,
+                engine=self.gpt_sovits_engine,
+                onnx_dir=self.onnx_dir,
+                int8_cache_dir=self.int8_cache_dir
+            )
+            for sr, pcm in chunks:
+                if self._is_aborted:
+                    break
+                chunks_done.append(pcm)
+                if stream is None:
+                    stream = AudioStream()
+                    stream.put(sr, pcm)
+                    self._put(self.output_queue, (index, stream, raw_text))
+                else:
+                    stream.put(sr, pcm)
+            else:
+                completed = True
+        except Exception as e:
+            print(f"[Warning] GPT-SoVITS 流式合成失败: {e}")
+        finally:
+            # 关闭生成器以立即释放推理器的推理锁（中止或出错时不必等到垃圾回收）
+            if chunks is not None:
+                chunks.close()
+            if stream is not None:
+                stream.close()
+        if completed and stream is not None:
+            import numpy as np
+            self._cache_store(cache_key, (stream.sample_rate, np.concatenate(chunks_done)))
+        return stream is not None
+
+    def _convert_loop(self):
+        """变声阶段：对 Edge-TTS 底音执行 RVC 推理"""
+        while self.running:
+            index, item = self.convert_queue.get()
+            if item is None or not self.running or self._is_aborted:
+                break
+            raw_audio, raw_text, cache_key = item
+            audio = self.convert(raw_audio)
+            self._cache_store(cache_key, audio)
+            self._put(self.output_queue, (index, audio, raw_text if audio is not None else ""))
+
+    def _output_loop(self):
+        """输出阶段：按 index 重排后依次发送完成信号，保持与播放队列一致的顺序语义"""
+        pending = {}
+        next_index = 0
+        while self.running:
+            index, audio, text = self.output_queue.get()
+            if index is None or not self.running or self._is_aborted:
+                break
+            pending[index] = (audio, text)
+            while next_index in pending:
+                audio, text = pending.pop(next_index)
+                if isinstance(audio, tuple) and self.dump_audio:
+                    self.dump_wav(next_index, audio)
+                self.signals.tts_sentence_finished.emit(next_index, audio, text)
+                next_index += 1
+
+    def synthesize(self, clean_text):
+        """
+        对单句清洗后的文本顺序执行完整的合成链路，全程在内存中传递音频数据。
+        返回 (采样率, int16 PCM 数组)，全部引擎失败时返回 None。
+        """
+        audio, needs_conversion = self.acoustic(clean_text)
+        if audio is not None and needs_conversion:
+            return self.convert(audio)
+        return audio
+
+    def prerender(self, texts):
+        """预渲染固定语句（如 random_talk / thinking_talk）写入语音缓存，已缓存的句子直接跳过；可通过 abort() 中止"""
+        if self.speech_cache is None:
+            return
+        rendered = 0
+        for text in texts:
+            if self._is_aborted:
+                break
+            clean_text = TextCleaner.clean(text)
+            cache_key = self._cache_key(clean_text)
+            if cache_key is None or self.speech_cache.contains(cache_key):
+                continue
+            audio, needs_conversion = self.acoustic(clean_text)
+            if audio is None or (self.voice_mode == "gpt_sovits" and needs_conversion):
+                continue
+            if needs_conversion:
+                audio = self.convert(audio)
+            if self._is_aborted:
+                break
+            self._cache_store(cache_key, audio)
+            rendered += 1
+        print(f"[TTSQueueWorker] 固定语句预渲染结束，新写入 {rendered} 条语音缓存")
+
+    def acoustic(self, clean_text, use_gpt_sovits=True):
+        """
+        声学阶段合成。返回 (audio, needs_conversion)：
+        GPT-SoVITS 直接产出最终的 (采样率, int16 PCM)；Edge-TTS 产出待变声的 (采样率, float32 数组)。
+        """
+        # 1. 尝试使用 GPT-SoVITS 本地直接合成模式
+        if self.voice_mode == "gpt_sovits" and use_gpt_sovits:
+            try:
+                if self.ref_audio_path and os.path.exists(self.ref_audio_path):
+                    gpt_sovits = self._load_gpt_sovits()
+                    audio = gpt_sovits.gpt_sovits_synthesize(
+                        text=clean_text,
+                        text_lang=self.text_lang,
+                        ref_wav_path=self.ref_audio_path,
+                        prompt_text=self.prompt_text,
+                        prompt_lang=self.prompt_lang,
+                        gpt_ckpt_path=self.gpt_ckpt_path,
+                        sovits_pth_path=self.sovits_pth_path,
+                        version=self.gpt_sovits_version,
+                        device="cpu",
+                        temperature=self.temperature,
+                        prompt_cache_dir=self.prompt_cache_dir,
+                        engine=self.gpt_sovits_engine,
+                        onnx_dir=self.onnx_dir,
+                        int8_cache_dir=self.int8_cache_dir
+                    )
+                    return audio, False
+                else:
+                    print(f"[Warning] GPT-SoVITS 缺失参考音频. 降级使用 Edge-TTS.")
+            except Exception as e:
+                print(f"[Warning] GPT-SoVITS 合成失败: {e}. 降级使用 Edge-TTS.")
 
+        # 2. 调度 Edge-TTS 网络合成，保持原生 24kHz 采样率解码，避免多余的重采样
+        try:
+            from aipet.audio_utils import decode_audio_bytes
+            mp3_bytes = synthesize_edge_tts(clean_text)
+            if not mp3_bytes:
+                return None, False
+            raw_audio, raw_sr = decode_audio_bytes(mp3_bytes)
+            return (raw_sr, raw_audio), True
+        except Exception as e:
+            print(f"Edge-TTS 语音合成错误: {e}")
+        return None, False
 
+    def convert(self, raw):
+        """变声阶段：RVC 模式执行音色转换，纯 Edge-TTS 模式直接转为 int16 PCM"""
+        raw_sr, raw_audio = raw
+        try:
+            from aipet.audio_utils import float_to_pcm16
+            if self.voice_mode == "rvc" and self.rvc_pth and self.voice_base_path and self.hubert_path:
+                pth_abs = os.path.join(self.voice_base_path, self.rvc_pth)
+                index_abs = os.path.join(self.voice_base_path, self.rvc_index) if self.rvc_index else ""
+
+                if os.path.exists(pth_abs) and os.path.exists(self.hubert_path):
+                    from aipet.services.rvc import rvc_convert_audio
+                    return rvc_convert_audio(
+                        model_path=pth_abs,
+                        index_path=index_abs,
+                        hubert_path=self.hubert_path,
+                        audio=raw_audio,
+                        sr=raw_sr,
+                        f0_up_key=self.f0_up_key,
+                        f0_method=self.f0_method,
+                        index_rate=self.index_rate,
+                        rms_mix_rate=self.rms_mix_rate,
+                        protect=self.protect,
+                        int8_cache_dir=self.int8_cache_dir
+                    )
+                print("[Warning] RVC pth 或 hubert 基础模型不存在。")
+
+            return raw_sr, float_to_pcm16(raw_audio)
+        except Exception as e:
+            print(f"RVC 语音合成错误: {e}")
+        return None
+
+    def dump_wav(self, index, audio):
+        """调试模式下将单句合成结果落盘，便于试听排查音质问题"""
+        try:
+            import soundfile as sf
+            from aipet.config import TEMP_AUDIO_DIR
+            sr, pcm = audio
+            out_wav_path = os.path.join(TEMP_AUDIO_DIR, f"temp_speech_{index}.wav")
+            sf.write(out_wav_path, pcm, sr, format="wav", subtype="PCM_16")
+        except Exception as e:
+            print(f"[Warning] 调试音频落盘失败: {e}")
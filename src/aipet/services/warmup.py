@@ -0,0 +1,83 @@
+import os
+import time
+import threading
+
+
+class WarmupWorker(threading.Thread):
+    """
+    启动预热线程：窗口显示后在后台依次载入当前发音模式所需的 torch 与推理引擎，
+    通过 warmup_progress 信号汇报进度，全部完成后发送 warmup_finished。
+    任一步骤失败仅打印警告并继续，首次合成时会按原有路径再次尝试载入。
+    """
+
+    def __init__(self, signals, voice_mode="gpt_sovits",
+                 gpt_ckpt_path=None, sovits_pth_path=None, gpt_sovits_version="v2",
+                 rvc_pth_path=None, hubert_path=None, gpt_sovits_engine="torch", onnx_dir=None,
+                 synthesizer_cache_mb=None, int8_cache_dir=None):
+        super().__init__(daemon=True, name="Warmup")
+        self.signals = signals
+        self.voice_mode = voice_mode
+        self.gpt_ckpt_path = gpt_ckpt_path
+        self.sovits_pth_path = sovits_pth_path
+        self.gpt_sovits_version = gpt_sovits_version
+        self.gpt_sovits_engine = gpt_sovits_engine
+        self.onnx_dir = onnx_dir
+        self.synthesizer_cache_mb = synthesizer_cache_mb
+        self.int8_cache_dir = int8_cache_dir
+        self.rvc_pth_path = rvc_pth_path
+        self.hubert_path = hubert_path
+        self._is_aborted = False
+
+    def abort(self):
+        self._is_aborted = True
+
+    def steps(self):
+        """按发音模式列出预热步骤：[(显示名称, 可调用对象)]"""
+        steps = []
+        if self.voice_mode in ("gpt_sovits", "rvc"):
+            steps.append(("PyTorch", self._load_torch))
+        if self.voice_mode == "gpt_sovits":
+            steps.append(("GPT-SoVITS", self._load_gpt_sovits))
+        if self.voice_mode in ("rvc", "edge_tts"):
+            steps.append(("Edge-TTS", self._load_edge_tts))
+        if self.voice_mode == "rvc" and self.rvc_pth_path and os.path.exists(self.rvc_pth_path):
+            steps.append(("RVC", self._load_rvc))
+        return steps
+
+    def run(self):
+        steps = self.steps()
+        start = time.perf_counter()
+        for i, (name, load) in enumerate(steps):
+            if self._is_aborted:
+                return
+            self.signals.warmup_progress.emit(name, i, len(steps))
+            t0 = time.perf_counter()
+            try:
+                load()
+                print(f"[Warmup] {name} 载入完成，耗时 {time.perf_counter() - t0:.2f}s")
+            except Exception as e:
+                print(f"[Warning] 预热 {name} 失败: {e}")
+        print(f"[Warmup] 后台预热结束，总耗时 {time.perf_counter() - start:.2f}s")
+        self.signals.warmup_progress.emit("", len(steps), len(steps))
+        self.signals.warmup_finished.emit()
+
+    def _load_torch(self):
+        from aipet.services.tts_service import _add_torch_dll_directory
+        _add_torch_dll_directory()
+        import torch  # noqa: F401
+
+    def _load_gpt_sovits(self):
+        from aipet.services.gpt_sovits import get_synthesizer, set_cache_budget, _resolve_weights_paths
+        if self.synthesizer_cache_mb:
+            set_cache_budget(int(self.synthesizer_cache_mb * 1024 * 1024))
+        gpt_ckpt, sovits_pth = _resolve_weights_paths(self.gpt_ckpt_path, self.sovits_pth_path, self.gpt_sovits_version)
+        get_synthesizer(gpt_ckpt, sovits_pth, self.gpt_sovits_version, "cpu", self.gpt_sovits_engine, self.onnx_dir,
+                        self.int8_cache_dir)
+
+    def _load_edge_tts(self):
+        from aipet.services.tts_service import get_edge_tts_client
+        get_edge_tts_client()
+
+    def _load_rvc(self):
+        from aipet.services.rvc import warmup
+        warmup(self.rvc_pth_path, self.hubert_path, int8_cache_dir=self.int8_cache_dir)
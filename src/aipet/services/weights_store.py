@@ -0,0 +1,116 @@
+import os
+import json
+
+import torch
+
+# 转换产物与源权重并排存放：<源文件名>.safetensors 存张量，<源文件名>.safetensors.json 存非张量配置与源文件指纹
+TENSORS_SUFFIX = ".safetensors"
+META_SUFFIX = ".safetensors.json"
+
+
+def converted_paths(src_path):
+    """源权重文件对应的 (safetensors 张量文件, JSON 配置文件) 路径"""
+    return src_path + TENSORS_SUFFIX, src_path + META_SUFFIX
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return {"mtime": st.st_mtime, "size": st.st_size}
+
+
+def is_converted(src_path):
+    """是否已存在由当前源文件转换出的 safetensors（源文件被替换或重新训练后视为过期）"""
+    tensors_path, meta_path = converted_paths(src_path)
+    if not (os.path.exists(tensors_path) and os.path.exists(meta_path)):
+        return False
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return meta.get("source") == _fingerprint(src_path)
+    except (OSError, ValueError):
+        return False
+
+
+def convert_checkpoint(src_path, checkpoint, weight_key="weight", drop_keys=()):
+    """
+    把已载入的 pickle 检查点写成 safetensors + JSON，只需执行一次。
+
+    参数:
+        src_path: 源权重文件路径，转换产物写在其旁边
+        checkpoint: torch.load 得到的检查点字典
+        weight_key: 张量字典所在的键；为 None 表示整个检查点就是 state_dict（如 Hubert）
+        drop_keys: 推理不需要、转换时直接丢弃的张量名
+    浮点张量统一存为 float32（CPU 推理实际使用的精度），载入时可不经转换直接映射为模型参数。
+    """
+    from safetensors.torch import save_file
+
+    state_dict = checkpoint if weight_key is None else checkpoint[weight_key]
+    tensors = {}
+    for name, tensor in state_dict.items():
+        if name in drop_keys:
+            continue
+        tensor = tensor.detach().cpu()
+        if tensor.is_floating_point():
+            tensor = tensor.float()
+        tensors[name] = tensor.contiguous().clone()  # clone 解除共享存储，safetensors 不允许张量间共享内存
+
+    extra = {}
+    if weight_key is not None:
+        for key, value in checkpoint.items():
+            if key == weight_key:
+                continue
+            try:
+                json.dumps(value)
+            except TypeError:
+                print(f"[Weights] 字段 {key} 无法序列化为 JSON，已跳过")
+                continue
+            extra[key] = value
+
+    tensors_path, meta_path = converted_paths(src_path)
+    save_file(tensors, tensors_path + ".tmp")
+    os.replace(tensors_path + ".tmp", tensors_path)
+    meta = {"source": _fingerprint(src_path), "weight_key": weight_key, "extra": extra}
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=4)
+    os.replace(meta_path + ".tmp", meta_path)
+
+    nbytes = sum(t.numel() * t.element_size() for t in tensors.values())
+    print(f"[Weights] 已转换: {tensors_path} ({len(tensors)} 个张量, {nbytes / 1024 / 1024:.1f} MB)")
+    return tensors_path
+
+
+def load_converted(src_path):
+    """
+    若源权重旁有未过期的转换产物，以内存映射方式载入并还原为与 torch.load 相同结构的检查点字典；否则返回 None。
+    张量直接引用 safetensors 文件的只读映射页（写时复制），按需从磁盘换入，多个进程载入同一模型时共享页缓存。
+    配合 load_state_dict(..., assign=True) 使用，参数不会再复制到私有堆内存。
+    """
+    if not is_converted(src_path):
+        return None
+    from safetensors.torch import load_file
+
+    tensors_path, meta_path = converted_paths(src_path)
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    state_dict = load_file(tensors_path, device="cpu")
+    if meta["weight_key"] is None:
+        return state_dict
+    checkpoint = dict(meta["extra"])
+    checkpoint[meta["weight_key"]] = state_dict
+    return checkpoint
+
+
+def load_checkpoint(src_path, fallback):
+    """
+    优先载入 safetensors 转换产物，缺失或过期时调用 fallback(src_path) 走原有的 pickle 载入。
+    返回 (检查点, 是否来自内存映射)；后者为 True 时调用方应以 assign=True 载入 state_dict。
+    """
+    checkpoint = load_converted(src_path)
+    if checkpoint is not None:
+        return checkpoint, True
+    return fallback(src_path), False
+
+
+def torch_load(path):
+    """原 pickle 格式检查点的载入方式（显式 weights_only=False 兼容 PyTorch 2.6+ 的安全反序列化限制）"""
+    return torch.load(path, map_location="cpu", weights_only=False)
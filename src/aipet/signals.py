@@ -7,5 +7,16 @@ class WorkerSignals(QObject):
     # --- 流式交互与分句音频队列新增信号 ---
     chat_chunk = pyqtSignal(str)                     # 流式文字块增量信号
     sentence_ready = pyqtSignal(int, str)             # 分句就绪信号 (index, sentence_text)
-    tts_sentence_finished = pyqtSignal(int, str, str) # 单句 TTS 合成完成信号 (index, wav_path, sentence_text)
+    tts_sentence_finished = pyqtSignal(int, object, str) # 单句 TTS 合成完成信号 (index, (sample_rate, int16 PCM) / AudioStream / None, sentence_text)
+    audio_playback_started = pyqtSignal(int, int)     # 放音设备开始播放某句信号 (播放代次 generation, index)
+    audio_playback_finished = pyqtSignal(int, int)    # 放音设备播完某句信号 (播放代次 generation, index)
 
+    # --- 启动后台预热信号 ---
+    warmup_progress = pyqtSignal(str, int, int)       # 预热进度信号 (当前步骤名称, 已完成步数, 总步数)
+    warmup_finished = pyqtSignal()                    # 预热全部完成信号
+
+    # --- 对话运行时 (PetRuntime) 对外发布的事件，由 EventBus.forward_to 转发并排队切回界面线程 ---
+    reply_started = pyqtSignal(int)                   # 新一轮回复开始信号 (播放代次 generation)
+    playback_started = pyqtSignal(int, int, str, int) # 某句开始播放信号 (generation, index, 文本, 时长 ms，流式音频为 0)
+    playback_finished = pyqtSignal(int, int, str, bool) # 某句播完信号 (generation, index, 文本, 设备是否已空闲)
+    reply_finished = pyqtSignal(int, str)             # 回复全文生成完毕且全部语音播完信号 (generation, 全文)
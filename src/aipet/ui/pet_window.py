@@ -2,10 +2,6 @@ import os
 import sys
 import glob
 import random
-import winsound
-import contextlib
-import wave
-import threading
 from urllib.parse import quote
 
 from PyQt5.QtWidgets import QApplication, QWidget, QLabel, QMenu
@@ -16,8 +12,7 @@ from aipet.config import (CONFIG_PATH, CHAR_DIR, TEMP_AUDIO_PATH,
                           WEB_TEMPLATE_PATH, WEB_ENGINE_AVAILABLE)
 from aipet.utils import load_json, save_json
 from aipet.signals import WorkerSignals
-from aipet.services.llm_service import LLMWorker
-from aipet.services.tts_service import TTSWorker, TTSQueueWorker
+from aipet.runtime import PetRuntime
 
 from aipet.ui.webview import DraggableWebView
 from aipet.ui.bubble import ChatBubble
@@ -68,8 +63,6 @@ class DesktopPet(QWidget):
                 save_json(CONFIG_PATH, self.config)
 
         self.visual_profile = {}
-        self.voice_profile = {}
-        self.voice_full_profile = {}
         
         # 获取当前选中的形象和声音，若配置中没有则默认使用 default_hutao
         self.active_avatar = self.config.get('active_avatar', 'default_hutao')
@@ -111,14 +104,16 @@ class DesktopPet(QWidget):
         self.is_dragging = False
         self.drag_pos = QPoint()
         
+        # --- 与界面无关的对话运行时：聊天记忆、LLM / TTS 工作线程与放音队列均由其管理 ---
+        # 桌宠只是运行时事件的订阅者，事件经 Qt 信号排队切回界面线程处理
+        self.runtime = PetRuntime(self.config)
         self.signals = WorkerSignals()
+        self.runtime.events.forward_to(self.signals)
         self.signals.chat_finished.connect(self.on_chat)
-        self.signals.tts_finished.connect(self.on_tts)
-        
-        # --- 连接流式交互与分句放音队列信号 ---
         self.signals.chat_chunk.connect(self.on_chat_chunk)
-        self.signals.sentence_ready.connect(self.on_sentence_ready)
-        self.signals.tts_sentence_finished.connect(self.on_tts_sentence_finished)
+        self.signals.playback_started.connect(self.on_playback_started)
+        self.signals.playback_finished.connect(self.on_playback_finished)
+        self.signals.warmup_progress.connect(self.on_warmup_progress)
 
         self.initUI()
         
@@ -137,29 +132,16 @@ class DesktopPet(QWidget):
         self.load_audio_pool()
         self.settings_window = SettingsWindow(self)
         
-        # --- 聊天记忆与放音队列初始化 ---
-        self.chat_history = [] 
-        self.max_history_len = 5
         self.current_response_text = ""
-        
-        self.synthesized_audio = {}      # 缓存已合成的单句 {index: (wav_path, text)}
-        self.next_play_index = 0         # 顺序放音索引
-        self.is_playing_audio = False    # 当前句播放状态
         self.accumulated_chat_text = ""  # 流式累计文字
         
-        self.llm_worker = None
-        self.tts_queue_worker = None
-        
-        # 单句播放计时器
-        self.audio_timer = QTimer(self)
-        self.audio_timer.setSingleShot(True)
-        self.audio_timer.timeout.connect(self.on_audio_finished)
-        
         # --- 新增打字机状态与定时器 ---
         self.typewriter_timer = QTimer(self)
         self.typewriter_timer.timeout.connect(self.on_typewriter_step)
         self.typewriter_text = ""
         self.typewriter_current_len = 0
+        self.typewriter_key = None
+        self.typewriter_duration = 0
         self.displayed_history_text = ""
         
         # --- 思考专属互动语录与恢复定时器 ---
@@ -168,6 +150,13 @@ class DesktopPet(QWidget):
         self.restore_thinking_timer.setSingleShot(True)
         self.restore_thinking_timer.timeout.connect(self.restore_thinking_bubble)
 
+        # 窗口显示后再在后台预热推理引擎，避免 torch / transformers 的导入拖慢启动
+        if self.config['app'].get('enable_tts', True) and self.config['app'].get('warmup_on_start', True):
+            QTimer.singleShot(0, self.runtime.start_warmup)
+        elif self.config['app'].get('prerender_phrases', False):
+            # 可选：空闲时在后台预渲染配置中的固定语句，之后说出这些话时可直接命中缓存
+            self.runtime.start_prerender()
+
     def initUI(self):
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground)
@@ -187,11 +176,12 @@ class DesktopPet(QWidget):
         self.config['active_voice'] = vo
         save_json(CONFIG_PATH, self.config)
         
-        self.chat_history = []  # 切换角色搭配时清空对话记忆
+        self.runtime.chat_memory.clear()  # 切换角色搭配时清空对话记忆
         
         char_path = os.path.join(CHAR_DIR, av)
         prof = load_json(os.path.join(char_path, "profile.json")) or {}
         self.visual_profile = prof
+        self.runtime.system_prompt = prof.get('system_prompt', '')
         
         renderer = prof.get('renderer', 'image')
         
@@ -205,11 +195,7 @@ class DesktopPet(QWidget):
             self.image_label.show()
             self.load_images(char_path)
 
-        v_path = os.path.join(CHAR_DIR, vo)
-        v_prof = load_json(os.path.join(v_path, "profile.json")) or {}
-        self.voice_profile = v_prof.get('tts', {})
-        self.voice_profile['_base_path'] = v_path
-        self.voice_full_profile = v_prof
+        self.runtime.set_voice(os.path.join(CHAR_DIR, vo))
 
     def load_images(self, path):
         self.frames = []
@@ -382,16 +368,8 @@ class DesktopPet(QWidget):
 
     def closeEvent(self, event):
         """主窗口关闭事件，安全释放所有后台工作线程与资源，防止程序退出挂死"""
-        winsound.PlaySound(None, 0)
-        self.audio_timer.stop()
         self.typewriter_timer.stop()
-        
-        if hasattr(self, 'llm_worker') and self.llm_worker and self.llm_worker.is_alive():
-            self.llm_worker.abort()
-        if hasattr(self, 'tts_queue_worker') and self.tts_queue_worker and self.tts_queue_worker.is_alive():
-            self.tts_queue_worker.abort()
-            
-        self.cleanup_temp_audios()
+        self.runtime.close()
         event.accept()
 
     def mousePressEvent(self, e):
@@ -449,40 +427,15 @@ class DesktopPet(QWidget):
             js_code = f"window.playMotion('{group}');"
             self.webview.page().runJavaScript(js_code)
 
-    def cleanup_temp_audios(self):
-        """清理本次对话产生的临时语音缓存文件，避免硬盘膨胀"""
-        import glob
-        from aipet.config import TEMP_AUDIO_DIR
-        pattern = os.path.join(TEMP_AUDIO_DIR, "temp_speech_*.wav")
-        for f in glob.glob(pattern):
-            try:
-                os.remove(f)
-            except Exception:
-                pass
-
     def process_chat(self, t):
         """用户提交对话主入口，支持中断上一次未完成的会话与音频"""
-        # 1. 强行中止当前正在播放的音频、Live2D 口型动作以及所有定时器
-        winsound.PlaySound(None, 0)
-        self.audio_timer.stop()
+        # 1. 强行中止当前的打字机、Live2D 口型动作以及所有定时器
         self.typewriter_timer.stop()
         self.restore_thinking_timer.stop()
         if self.visual_profile.get('renderer') == 'live2d' and hasattr(self, 'webview') and self.webview.isVisible():
             self.webview.page().runJavaScript("window.stopSpeaking();")
 
-        # 2. 安全中止并销毁仍在运行的流式 LLM 或 TTS 工作线程
-        if hasattr(self, 'llm_worker') and self.llm_worker and self.llm_worker.is_alive():
-            self.llm_worker.abort()
-        if hasattr(self, 'tts_queue_worker') and self.tts_queue_worker and self.tts_queue_worker.is_alive():
-            self.tts_queue_worker.abort()
-
-        # 3. 清理上一轮生成的临时音频
-        self.cleanup_temp_audios()
-
-        # 4. 初始化本轮放音队列状态、打字机变量与流式累计缓存
-        self.synthesized_audio.clear()
-        self.next_play_index = 0
-        self.is_playing_audio = False
+        # 2. 初始化打字机变量与流式累计缓存
         self.accumulated_chat_text = ""
         self.displayed_history_text = ""
         self.typewriter_text = ""
@@ -492,82 +445,14 @@ class DesktopPet(QWidget):
         # 气泡显示 Thinking 状态
         self.bubble.show_message("Thinking...", self.get_head_pos(), 60000)
 
-        # 5. 追加用户提问至记忆上下文
-        self.chat_history.append({"role": "user", "content": t})
-        if len(self.chat_history) > self.max_history_len * 2:
-            self.chat_history = self.chat_history[-self.max_history_len * 2:]
-
-        prompt = self.visual_profile.get('system_prompt', '')
-        key = self.config['llm'].get('api_key', '')
-        url = self.config['llm'].get('base_url', '')
-        model = self.config['llm'].get('model', '')
-
-        # 6. 启动流式大语言模型 Worker
-        self.llm_worker = LLMWorker(t, prompt, self.chat_history, key, url, model, self.signals)
-        self.llm_worker.start()
+        # 3. 交给运行时：停止放音、中止上一轮的 LLM / TTS 工作线程并开始新一轮回复
+        self.runtime.process_chat(t)
 
-        # 7. 如果开启了 TTS 语音合成，则并行拉起顺序 TTS 队列合成器
-        enable_tts = self.config['app'].get('enable_tts', True)
-        if enable_tts:
-            ref_audio = self.voice_profile.get('ref_audio')
-            voice_base_path = self.voice_profile.get('_base_path')
-            prompt_text = self.voice_profile.get('prompt_text', '')
-            prompt_lang = self.voice_profile.get('prompt_lang', 'zh')
-            text_lang = self.voice_profile.get('text_lang', 'zh')
-            
-            # 读取发音配置文件参数，保持平滑向后兼容
-            voice_mode = self.voice_full_profile.get('voice_mode')
-            rvc_cfg = self.voice_full_profile.get('rvc', {})
-            rvc_enable = rvc_cfg.get('enable', False)
-            if not voice_mode:
-                voice_mode = 'rvc' if rvc_enable else 'gpt_sovits'
-                
-            # 加载 GPT-SoVITS 专属推理模型与参数
-            gsv_cfg = self.voice_full_profile.get('gpt_sovits', {})
-            gpt_ckpt = gsv_cfg.get('ckpt', '')
-            sovits_pth = gsv_cfg.get('pth', '')
-            gpt_version = gsv_cfg.get('version', 'v2')
-            temperature = gsv_cfg.get('temperature', 0.4)
-            
-            gpt_ckpt_abs = os.path.join(voice_base_path, gpt_ckpt) if gpt_ckpt else ""
-            sovits_pth_abs = os.path.join(voice_base_path, sovits_pth) if sovits_pth else ""
-            ref_audio_abs = os.path.join(voice_base_path, ref_audio) if ref_audio else ""
-            
-            # 提取 RVC 参数与 Hubert 基础特征模型文件绝对路径
-            rvc_pth = rvc_cfg.get('pth', '')
-            rvc_index = rvc_cfg.get('index', '')
-            f0_up_key = rvc_cfg.get('f0_up_key', 0)
-            f0_method = rvc_cfg.get('f0_method', 'harvest')
-            index_rate = rvc_cfg.get('index_rate', 0.75)
-            rms_mix_rate = rvc_cfg.get('rms_mix_rate', 0.25)
-            protect = rvc_cfg.get('protect', 0.33)
-            
-            from aipet.config import BASE_DIR
-            hubert_path = os.path.join(BASE_DIR, "resources", "models", "hubert_base_state.pt")
-            
-            self.tts_queue_worker = TTSQueueWorker(
-                enable_tts=enable_tts,
-                signals=self.signals,
-                voice_mode=voice_mode,
-                ref_audio_path=ref_audio_abs,
-                prompt_text=prompt_text,
-                prompt_lang=prompt_lang,
-                text_lang=text_lang,
-                gpt_ckpt_path=gpt_ckpt_abs,
-                sovits_pth_path=sovits_pth_abs,
-                gpt_sovits_version=gpt_version,
-                voice_base_path=voice_base_path,
-                rvc_pth=rvc_pth,
-                rvc_index=rvc_index,
-                hubert_path=hubert_path,
-                f0_up_key=f0_up_key,
-                f0_method=f0_method,
-                index_rate=index_rate,
-                rms_mix_rate=rms_mix_rate,
-                protect=protect,
-                temperature=temperature
-            )
-            self.tts_queue_worker.start()
+    def on_warmup_progress(self, name, done, total):
+        """预热进度回调：空闲时在气泡中提示当前正在载入的引擎"""
+        if not name or self.is_thinking_state or self.runtime.is_speaking():
+            return
+        self.bubble.show_message(f"正在加载 {name} ({done + 1}/{total})……", self.get_head_pos(), 3000)
 
     def on_chat_chunk(self, chunk):
         """流式字符片段接收槽"""
@@ -580,74 +465,45 @@ class DesktopPet(QWidget):
             self.restore_thinking_timer.stop()
             self.bubble.update_text(self.accumulated_chat_text, self.get_head_pos())
 
-    def on_sentence_ready(self, index, text):
-        """分句就绪后推送给后台 TTS 队列合成线程"""
-        if hasattr(self, 'tts_queue_worker') and self.tts_queue_worker and self.tts_queue_worker.is_alive():
-            self.tts_queue_worker.add_task(index, text)
-
-    def on_tts_sentence_finished(self, index, wav_path, text):
-        """单句音频合成完毕回调，载入缓存并触发队列放音"""
-        if wav_path and os.path.exists(wav_path):
-            self.synthesized_audio[index] = (wav_path, text)
-        else:
-            # 兼容处理：若合成出错则存空占位，防止索引缺失卡死播放链
-            self.synthesized_audio[index] = ("", text)
-        self.check_playback_queue()
-
-    def check_playback_queue(self):
-        """核心播放队列调度逻辑：严格按 index 顺序同步放音与打字机效果"""
-        if self.is_playing_audio:
+    def on_playback_started(self, generation, index, text, duration):
+        """放音设备开始播放某句回调：同步启动打字机与 Live2D 口型"""
+        if generation != self.runtime.play_generation:
             return
 
-        if self.next_play_index in self.synthesized_audio:
-            wav_path, text = self.synthesized_audio[self.next_play_index]
-            self.next_play_index += 1
-
-            # 若此句音频为空（合成失败），则跳过放音直接递归播放下一句
-            if not wav_path or not os.path.exists(wav_path):
-                self.check_playback_queue()
-                return
-
-            self.is_playing_audio = True
-            
-            # 进入放音阶段，解除思考状态并停止恢复定时器
-            self.is_thinking_state = False
-            self.restore_thinking_timer.stop()
-            
-            # 1. 计算本句音频的精确时长
-            duration = 3000
-            try:
-                import contextlib
-                import wave
-                with contextlib.closing(wave.open(wav_path, 'r')) as f:
-                    frames = f.getnframes()
-                    rate = f.getframerate()
-                    duration = int((frames / float(rate)) * 1000)
-            except Exception as e:
-                print(f"Error calculating wav duration: {e}")
-
-            # 2. 初始化打字机状态，并启动打字机定时器
-            self.typewriter_text = text
-            self.typewriter_current_len = 0
-            
-            # 动态计算打字间隔：根据音频时长除以文字长度，使打字速率与说话速率完美吻合
-            char_count = len(text) if len(text) > 0 else 1
-            # 限制打字间隔在 50ms 到 250ms 之间，防止过快或过慢，确保文字打印清晰好读
-            char_delay = max(50, min(250, int(duration / char_count)))
-            self.typewriter_timer.start(char_delay)
+        # 进入放音阶段，解除思考状态并停止恢复定时器
+        self.is_thinking_state = False
+        self.restore_thinking_timer.stop()
 
-            # 3. 触发 Live2D 口型动画
-            if self.visual_profile.get('renderer') == 'live2d' and hasattr(self, 'webview') and self.webview.isVisible():
-                self.webview.page().runJavaScript("window.startSpeaking();")
+        # 1. 初始化打字机状态，并启动打字机定时器
+        self.typewriter_text = text
+        self.typewriter_current_len = 0
+        self.typewriter_key = (generation, index)
+        self.typewriter_duration = duration
+        if duration > 0:
+            # 时长已知：按设备汇报的真实播放进度逐字显示，使打字速率与说话速率完美吻合
+            self.typewriter_timer.start(50)
+        else:
+            # 流式音频时长未知：按常规语速估算打字间隔
+            self.typewriter_timer.start(200)
 
-            # 4. 异步播放音频并设定单句结束计时器 (添加 300ms 停顿缓冲)
-            winsound.PlaySound(wav_path, winsound.SND_FILENAME | winsound.SND_ASYNC)
-            self.audio_timer.start(duration + 300)
+        # 2. 触发 Live2D 口型动画
+        if self.visual_profile.get('renderer') == 'live2d' and hasattr(self, 'webview') and self.webview.isVisible():
+            self.webview.page().runJavaScript("window.startSpeaking();")
 
     def on_typewriter_step(self):
         """打字机步进回调，逐字打印当前正在播放音频的文本"""
         if self.typewriter_current_len < len(self.typewriter_text):
-            self.typewriter_current_len += 1
+            if self.typewriter_duration > 0:
+                # 按放音设备汇报的真实播放进度计算应显示的字数
+                key, played = self.runtime.audio_sink.position()
+                if key != self.typewriter_key:
+                    return
+                target = int(len(self.typewriter_text) * played * 1000 / self.typewriter_duration) + 1
+                if target <= self.typewriter_current_len:
+                    return
+                self.typewriter_current_len = min(len(self.typewriter_text), target)
+            else:
+                self.typewriter_current_len += 1
             current_chunk = self.typewriter_text[:self.typewriter_current_len]
             
             chat_mode = self.config['app'].get('chat_mode', 'subtitle')
@@ -662,32 +518,33 @@ class DesktopPet(QWidget):
         else:
             self.typewriter_timer.stop()
 
-    def on_audio_finished(self):
-        """单句音频播放定时完毕回调"""
-        self.is_playing_audio = False
+    def on_playback_finished(self, generation, index, text, idle):
+        """放音设备播完某句回调"""
+        if generation != self.runtime.play_generation:
+            return
         self.typewriter_timer.stop()
-        
-        # 将当前句全文字并入已播放历史
-        self.displayed_history_text += self.typewriter_text
-        
+
+        # 补全当前句剩余文字，并将全文字并入已播放历史
+        if self.typewriter_key == (generation, index) and self.typewriter_current_len < len(self.typewriter_text):
+            self.typewriter_duration = 0
+            self.typewriter_current_len = len(self.typewriter_text) - 1
+            self.on_typewriter_step()
+        self.displayed_history_text += text
+
+        # 下一句已在设备中排队时无缝衔接，不打断口型动画
+        if not idle:
+            return
+
         # 1. 停止 Live2D 说话动画
         if self.visual_profile.get('renderer') == 'live2d' and hasattr(self, 'webview') and self.webview.isVisible():
             self.webview.page().runJavaScript("window.stopSpeaking();")
 
-        # 2. 检查是否为最后一讲，若已无待合成/待播放项，重置气泡自动隐藏倒计时
-        if self.next_play_index not in self.synthesized_audio:
-            self.bubble.timer.start(3000) # 3秒后隐去气泡
-            
-        # 3. 递归读取下一句放音
-        self.check_playback_queue()
+        # 2. 已无待合成/待播放项，重置气泡自动隐藏倒计时
+        self.bubble.timer.start(3000) # 3秒后隐去气泡
 
     def on_chat(self, t):
-        """流式大模型生成全文本结束回调，用于保存对话历史"""
+        """流式大模型生成全文本结束回调（对话历史已由运行时保存）"""
         self.current_response_text = t
-        
-        self.chat_history.append({"role": "assistant", "content": t})
-        if len(self.chat_history) > self.max_history_len * 2:
-            self.chat_history = self.chat_history[-self.max_history_len * 2:]
             
         # 静音模式下，由于无法触发 check_playback_queue 放音驱动，在这里执行最终隐退倒计时
         enable_tts = self.config['app'].get('enable_tts', True)
@@ -695,13 +552,12 @@ class DesktopPet(QWidget):
             duration = max(3000, len(t) * 200)
             self.bubble.show_message(t, self.get_head_pos(), duration)
 
-    def on_tts(self, p):
-        # 兼容旧单音合成回调，当前已被流式分句播放队列接管
-        pass
-    
     def load_audio_pool(self): 
         self.audio_files = []
 
     def talk_random(self):
         d = self.config.get('interaction', {}).get('random_talk', ["Hi~"])
-        self.bubble.show_message(random.choice(d), self.get_head_pos())
+        phrase = random.choice(d)
+        self.bubble.show_message(phrase, self.get_head_pos())
+        # 已预渲染进语音缓存的语句同时以语音说出（未命中缓存时只显示气泡）
+        self.runtime.speak_phrase(phrase)
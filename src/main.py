@@ -1,14 +1,212 @@
-# 必须在最前面导入 torch，以防在 Windows 系统下与 PyQt5 的初始化发生冲突
-# 导致 [WinError 1114] 动态链接库(DLL)初始化例程失败 (c10.dll)
-import torch
+import os
 import sys
-from PyQt5.QtWidgets import QApplication
-from aipet.ui.pet_window import DesktopPet
+import argparse
+
+
+def profile_imports(top_n=30):
+    """在独立子进程中以 -X importtime 分别导入界面与各推理引擎模块，按累计耗时输出导入耗时报告"""
+    import subprocess
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=src_dir + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    targets = ["aipet.ui.pet_window", "aipet.services.gpt_sovits", "aipet.services.rvc"]
+
+    for target in targets:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+            env=env, capture_output=True, text=True, encoding="utf-8", errors="replace"
+        )
+        # 每行格式: "import time: self [us] | cumulative | imported package"
+        rows = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            parts = line[len("import time:"):].split("|")
+            if len(parts) != 3:
+                continue
+            try:
+                self_us, cumulative_us = int(parts[0]), int(parts[1])
+            except ValueError:
+                continue  # 表头行
+            rows.append((cumulative_us, self_us, parts[2].strip()))
+
+        print(f"\n===== import {target} =====")
+        if proc.returncode != 0:
+            print(f"导入失败 (返回码 {proc.returncode}):")
+            print("\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:"))[-2000:])
+        total = next((cum for cum, _, name in rows if name == target), 0)
+        print(f"累计耗时: {total / 1000:.1f} ms，共导入 {len(rows)} 个模块")
+        print(f"{'累计(ms)':>10} {'自身(ms)':>10}  模块")
+        for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top_n]:
+            print(f"{cumulative_us / 1000:>10.1f} {self_us / 1000:>10.1f}  {name}")
+
+
+def export_voice_onnx(voice):
+    """把指定角色的 GPT-SoVITS 权重导出为 ONNX 图（写入角色文件夹下的 onnx/），并校验一致性、报告加速比"""
+    from aipet.config import CHAR_DIR
+    from aipet.utils import load_json
+    voice_dir = os.path.join(CHAR_DIR, voice)
+    profile = load_json(os.path.join(voice_dir, "profile.json"))
+    if not profile:
+        print(f"未找到角色配置: {os.path.join(voice_dir, 'profile.json')}")
+        return 1
+
+    gsv_cfg = profile.get('gpt_sovits', {})
+    tts_cfg = profile.get('tts', {})
+    gpt_ckpt = gsv_cfg.get('ckpt', '')
+    sovits_pth = gsv_cfg.get('pth', '')
+    ref_audio = tts_cfg.get('ref_audio', '')
+
+    from aipet.services.gpt_sovits import export_voice_onnx as export
+    export(
+        gpt_ckpt_path=os.path.join(voice_dir, gpt_ckpt) if gpt_ckpt else "",
+        sovits_pth_path=os.path.join(voice_dir, sovits_pth) if sovits_pth else "",
+        version=gsv_cfg.get('version', 'v2'),
+        onnx_dir=os.path.join(voice_dir, "onnx"),
+        ref_wav_path=os.path.join(voice_dir, ref_audio) if ref_audio else "",
+        prompt_text=tts_cfg.get('prompt_text', ''),
+        prompt_lang=tts_cfg.get('prompt_lang', 'zh'),
+        text_lang=tts_cfg.get('text_lang', 'zh'),
+    )
+    print(f"在 {voice} 的 profile.json 中设置 \"gpt_sovits\": {{\"engine\": \"onnx\"}} 即可启用 ONNX 推理后端")
+    return 0
+
+
+def convert_voice_weights(voice):
+    """把指定角色的 GPT-SoVITS / RVC 权重以及共用的 Hubert 模型一次性转换为 safetensors，之后载入走内存映射"""
+    from aipet.config import BASE_DIR, CHAR_DIR
+    from aipet.utils import load_json
+    voice_dir = os.path.join(CHAR_DIR, voice)
+    profile = load_json(os.path.join(voice_dir, "profile.json"))
+    if not profile:
+        print(f"未找到角色配置: {os.path.join(voice_dir, 'profile.json')}")
+        return 1
+
+    gsv_cfg = profile.get('gpt_sovits', {})
+    rvc_cfg = profile.get('rvc', {})
+    gpt_ckpt = gsv_cfg.get('ckpt', '')
+    sovits_pth = gsv_cfg.get('pth', '')
+    rvc_pth = rvc_cfg.get('pth', '')
+
+    from aipet.services.gpt_sovits import convert_voice_weights as convert_gpt_sovits
+    from aipet.services.rvc import convert_weights as convert_rvc
+    count = convert_gpt_sovits(
+        gpt_ckpt_path=os.path.join(voice_dir, gpt_ckpt) if gpt_ckpt else "",
+        sovits_pth_path=os.path.join(voice_dir, sovits_pth) if sovits_pth else "",
+        version=gsv_cfg.get('version', 'v2'),
+    )
+    count += convert_rvc(
+        model_path=os.path.join(voice_dir, rvc_pth) if rvc_pth else None,
+        hubert_path=os.path.join(BASE_DIR, "resources", "models", "hubert_base_state.pt"),
+    )
+    print(f"转换完成，共新转换 {count} 个权重文件")
+    return 0
+
+
+def run_headless(args):
+    """不启动界面，直接驱动对话 + 语音运行时：逐条回答 --say 给出的提问（缺省逐行读取标准输入）"""
+    import time
+    import threading
+    from aipet.config import CONFIG_PATH, CHAR_DIR
+    from aipet.utils import load_json
+    from aipet.runtime import PetRuntime
+
+    config = load_json(CONFIG_PATH) or load_json(CONFIG_PATH + ".example")
+    if not config:
+        print(f"未找到配置文件: {CONFIG_PATH}")
+        return 1
+    if args.no_tts:
+        config['app']['enable_tts'] = False
+    avatar = config.get('active_avatar', 'default_hutao')
+    voice = args.voice or config.get('active_voice', 'default_hutao')
+    system_prompt = (load_json(os.path.join(CHAR_DIR, avatar, "profile.json")) or {}).get('system_prompt', '')
+
+    runtime = PetRuntime(config, voice_dir=os.path.join(CHAR_DIR, voice), system_prompt=system_prompt,
+                         audio_backend="null" if args.audio_out else None, audio_output_file=args.audio_out)
+    finished = threading.Event()
+    state = {}
+
+    def on_chat_chunk(chunk):
+        state.setdefault('first_chunk', time.perf_counter())
+        print(chunk, end="", flush=True)
+
+    runtime.events.chat_chunk.connect(on_chat_chunk)
+    runtime.events.playback_started.connect(lambda g, i, text, ms: state.setdefault('first_audio', time.perf_counter()))
+    runtime.events.reply_finished.connect(lambda g, text: finished.set())
+
+    questions = args.say or (line.strip() for line in sys.stdin)
+    try:
+        for question in questions:
+            if not question:
+                continue
+            state.clear()
+            finished.clear()
+            start = time.perf_counter()
+            runtime.process_chat(question)
+            if not finished.wait(args.timeout):
+                print(f"\n[Headless] 本轮在 {args.timeout}s 内未完成，已打断")
+                runtime.interrupt()
+                continue
+            report = [f"整轮 {time.perf_counter() - start:.2f}s"]
+            if 'first_chunk' in state:
+                report.insert(0, f"首字 {state['first_chunk'] - start:.2f}s")
+            if 'first_audio' in state:
+                report.insert(1, f"首次出声 {state['first_audio'] - start:.2f}s")
+            print(f"\n[Headless] {'，'.join(report)}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runtime.close()
+    return 0
+
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    # harvest 基频提取使用进程池；打包后的 exe 在 Windows spawn 子进程时需要此调用
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="AiPet 桌面宠物")
+    parser.add_argument("--fast-start", action="store_true",
+                        help="快速启动：不在界面之前预载 torch，窗口先显示，推理引擎由后台预热线程载入")
+    parser.add_argument("--profile-imports", nargs="?", const=30, type=int, metavar="N",
+                        help="输出界面与各推理引擎模块的导入耗时报告（按累计耗时前 N 项，默认 30）后退出")
+    parser.add_argument("--export-onnx", metavar="VOICE",
+                        help="把指定角色的 GPT-SoVITS 权重导出为 ONNX 图并校验与 PyTorch 输出的一致性后退出")
+    parser.add_argument("--convert-weights", metavar="VOICE",
+                        help="把指定角色的 GPT-SoVITS / RVC 权重与 Hubert 模型转换为 safetensors（载入改为内存映射）后退出")
+    parser.add_argument("--headless", action="store_true",
+                        help="无界面运行：逐条回答 --say 给出的提问（缺省逐行读取标准输入），文字输出到终端、语音照常播放")
+    parser.add_argument("--say", action="append", metavar="TEXT", help="无界面模式下的提问，可重复指定多条")
+    parser.add_argument("--voice", metavar="VOICE", help="无界面模式下使用的声音角色，缺省为配置中的 active_voice")
+    parser.add_argument("--audio-out", metavar="PATH", help="无界面模式下不放音，把合成的语音写入 WAV 文件")
+    parser.add_argument("--no-tts", action="store_true", help="无界面模式下只输出文字，不合成语音")
+    parser.add_argument("--timeout", type=float, default=120.0, help="无界面模式下单轮回复的超时（秒）")
+    args, qt_args = parser.parse_known_args()
+
+    if args.profile_imports:
+        profile_imports(args.profile_imports)
+        sys.exit(0)
+
+    if args.export_onnx:
+        sys.exit(export_voice_onnx(args.export_onnx))
+
+    if args.convert_weights:
+        sys.exit(convert_voice_weights(args.convert_weights))
+
+    if args.headless:
+        sys.exit(run_headless(args))
+
+    if not args.fast_start:
+        # 默认在最前面导入 torch，以防在 Windows 系统下与 PyQt5 的初始化发生冲突
+        # 导致 [WinError 1114] 动态链接库(DLL)初始化例程失败 (c10.dll)
+        # 快速启动模式下依赖 aipet 包初始化时注入的 torch/lib DLL 搜索路径，由后台线程稍后导入
+        import torch
+
+    from PyQt5.QtWidgets import QApplication
+    from aipet.ui.pet_window import DesktopPet
+
+    app = QApplication(sys.argv[:1] + qt_args)
     # 保证关闭所有窗口时程序依然运行（驻留托盘/后台模式，通常桌宠右键退出才是真正退出）
     app.setQuitOnLastWindowClosed(False)
-    
+
     pet = DesktopPet()
     sys.exit(app.exec_())